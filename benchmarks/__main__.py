@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""run benchmarks, and save the results as json
+
+    python -m benchmarks                          # run all
+    python -m benchmarks -k bujo -k repl          # run benchmarks whose name contains bujo or repl
+    python -m benchmarks -o new.json -c old.json  # save results and compare with an old run
+
+every `bench_*` function of `benchmarks/bench_*.py` is a benchmark, it
+returns the stats of `benchmarks.common.measure`.
+"""
+import os
+import sys
+import ast
+import json
+import time
+import argparse
+import platform
+import importlib
+import subprocess
+
+from .common import report
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def discover(keywords=None):
+    """find benchmark functions
+
+    :param keywords: list of keyword, match any of them
+    :return: list of (name, module name, function name)
+    """
+    benches = []
+    for filename in sorted(os.listdir(BENCH_DIR)):
+        if not filename.startswith("bench_") or not filename.endswith(".py"):
+            continue
+        module_name = os.path.splitext(filename)[0]
+        # find functions without importing, some modules prepare data when imported
+        with open(os.path.join(BENCH_DIR, filename), "rb") as f:
+            tree = ast.parse(f.read(), filename)
+        names = [node.name for node in tree.body
+                 if isinstance(node, ast.FunctionDef) and node.name.startswith("bench_")]
+        for func_name in names:
+            name = "{}.{}".format(module_name[len("bench_"):], func_name[len("bench_"):])
+            if keywords and not any(keyword in name for keyword in keywords):
+                continue
+            benches.append((name, module_name, func_name))
+    return benches
+
+
+def git_revision():
+    try:
+        output = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                         cwd=BENCH_DIR, stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.decode("utf-8").strip()
+
+
+def run(benches):
+    results = {}
+    for name, module_name, func_name in benches:
+        module = importlib.import_module("benchmarks." + module_name)
+        stats = getattr(module, func_name)()
+        report(name, stats)
+        results[name] = stats
+    return results
+
+
+def compare(results, baseline):
+    """print median ratio of current run to baseline, >1 means slower
+    """
+    print("\ncompare with baseline, median ratio (current / baseline):")
+    for name, stats in sorted(results.items()):
+        base = baseline.get(name)
+        if not base:
+            continue
+        ratio = stats["median"] / base["median"] if base["median"] else float("inf")
+        flag = "  SLOWER" if ratio > 1.1 else ""
+        print("{:<40} {:>8.2f}x{}".format(name, ratio, flag))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("-k", dest="keywords", action="append", help="run benchmarks whose name contains it")
+    parser.add_argument("-o", "--output", help="save results to this json file")
+    parser.add_argument("-c", "--compare", help="compare with the results of this json file")
+    args = parser.parse_args(argv)
+
+    results = run(discover(args.keywords))
+    data = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f)["results"])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
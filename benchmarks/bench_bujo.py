@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""bujo queries against a generated journal, the size is set by environment
+    variable EASIER_BENCH_BULLETS, default is 100000.
+
+    EASIER_BENCH_BULLETS=1000000 python -m benchmarks -k bujo
+"""
+import os
+import shutil
+import tempfile
+
+from .common import measure, report, make_bullet_db
+
+BULLETS = int(os.environ.get("EASIER_BENCH_BULLETS", 100000))
+_topic = []
+
+
+def bujo_topic():
+    """generate database once, and return a `BujoTopic`
+    """
+    if not _topic:
+        from easier.context import Context
+        from easier.topic.bujo import BujoTopic
+
+        make_bullet_db(BULLETS)
+        _topic.append(BujoTopic(Context()))
+    return _topic[0]
+
+
+def bench_today_bullets():
+    topic = bujo_topic()
+    return measure(lambda: list(topic.get_today_bullets()), repeat=20)
+
+
+def bench_all_bullets():
+    topic = bujo_topic()
+    return measure(lambda: list(topic.get_all_bullets()), repeat=3)
+
+
+def bench_incomplete_tasks():
+    topic = bujo_topic()
+    return measure(lambda: list(topic.get_incomplete_tasks()), repeat=5)
+
+
+def bench_history_first_page():
+    """time to the first line of `list_history_bullet`
+    """
+    from easier.topic.bujo import Bullet
+
+    bujo_topic()
+    return measure(lambda: next(Bullet.iter_history()), repeat=20)
+
+
+def bench_search_word():
+    from easier.topic.bujo import search_bullets
+
+    bujo_topic()
+    return measure(lambda: search_bullets("meeting"), repeat=20)
+
+
+def bench_search_prefix():
+    from easier.topic.bujo import search_bullets
+
+    bujo_topic()
+    return measure(lambda: search_bullets("rev*"), repeat=20)
+
+
+def bench_search_hanzi():
+    from easier.topic.bujo import Bullet, search_bullets
+
+    bujo_topic()
+    # a word of the generated vocabulary, and a character of it
+    word = Bullet.get_by_id(1).content[:2]
+    return measure(lambda: search_bullets(word + " " + word[0]), repeat=20)
+
+
+def bench_report_month():
+    from easier.topic.bujo import daily_report, report_range
+
+    bujo_topic()
+    start, end = report_range("month")
+    return measure(lambda: daily_report(start, end), repeat=20)
+
+
+def _bullet_index():
+    from easier.topic.bujo import BulletIndex
+
+    bujo_topic()
+    index = BulletIndex()
+    index.complete("1")
+    return index
+
+
+def bench_complete_id():
+    index = _bullet_index()
+    return measure(lambda: index.complete("12"), repeat=20, number=100)
+
+
+def bench_complete_content():
+    index = _bullet_index()
+    return measure(lambda: index.complete("rev"), repeat=20, number=100)
+
+
+def bench_complete_after_write():
+    """a write of topic rebuilds the lookup structures at next completion
+    """
+    from easier.topic.bujo import Bullet
+
+    index = _bullet_index()
+    bullet = Bullet.get_by_id(1)
+
+    def complete():
+        index.put(bullet)
+        index.complete("12")
+    return measure(complete, repeat=10)
+
+
+def bench_export_jsonl():
+    from easier.topic.bujo import dump_bullets
+
+    bujo_topic()
+    dirname = tempfile.mkdtemp()
+
+    def export():
+        with open(os.path.join(dirname, "bujo.jsonl"), "w", encoding="utf-8") as f:
+            dump_bullets(f)
+    try:
+        return measure(export, repeat=3)
+    finally:
+        shutil.rmtree(dirname)
+
+
+def bench_import_jsonl():
+    """import the exported journal into an empty database
+    """
+    from easier.db import database, BaseModel
+    from easier.topic.bujo import dump_bullets, load_bullets
+
+    bujo_topic()
+    dirname = tempfile.mkdtemp()
+    path = os.path.join(dirname, "bujo.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        dump_bullets(f)
+    origin = database.database
+
+    def load():
+        database.init(os.path.join(dirname, "import.db"))
+        BaseModel.check_schema_migration()
+        with open(path, encoding="utf-8") as f:
+            load_bullets(f)
+        database.close()
+        os.remove(os.path.join(dirname, "import.db"))
+    try:
+        return measure(load, repeat=3)
+    finally:
+        database.init(origin)
+        shutil.rmtree(dirname)
+
+
+if __name__ == "__main__":
+    report("bujo: today bullets of %d" % BULLETS, bench_today_bullets())
+    report("bujo: all bullets of %d" % BULLETS, bench_all_bullets())
+    report("bujo: incomplete tasks of %d" % BULLETS, bench_incomplete_tasks())
+    report("bujo: first history page of %d" % BULLETS, bench_history_first_page())
+    report("bujo: search word in %d" % BULLETS, bench_search_word())
+    report("bujo: search prefix in %d" % BULLETS, bench_search_prefix())
+    report("bujo: search hanzi in %d" % BULLETS, bench_search_hanzi())
+    report("bujo: report of month in %d" % BULLETS, bench_report_month())
+    report("bujo: complete id in %d" % BULLETS, bench_complete_id())
+    report("bujo: complete content in %d" % BULLETS, bench_complete_content())
+    report("bujo: complete after write in %d" % BULLETS, bench_complete_after_write())
+    report("bujo: export %d" % BULLETS, bench_export_jsonl())
+    report("bujo: import %d" % BULLETS, bench_import_jsonl())
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""command history of 100k lines, loading and auto suggestion
+
+    python -m benchmarks.bench_history
+"""
+import os
+import random
+import tempfile
+
+from prompt_toolkit.buffer import Buffer
+from prompt_toolkit.document import Document
+from prompt_toolkit.history import FileHistory
+from prompt_toolkit.auto_suggest import AutoSuggestFromHistory
+
+from easier.history import CommandHistory, HistoryAutoSuggest
+
+from .common import measure, report
+
+LINES = 100000
+
+_files = {}
+
+
+def make_history_file(lines=LINES, seed=0, file_history=False):
+    """a history file of `lines` commands, a fifth of them repeated
+
+    :param file_history: in the format of prompt_toolkit's FileHistory
+    """
+    if (lines, file_history) in _files:
+        return _files[lines, file_history]
+
+    rnd = random.Random(seed)
+    commands = ["add_bullet task {}".format(idx) if idx % 5 else "list_bullet" for idx in range(lines)]
+    rnd.shuffle(commands)
+    filename = os.path.join(tempfile.mkdtemp(), "bujo")
+    with open(filename, "w") as f:
+        for command in commands:
+            f.write("\n+" + command + "\n" if file_history else command + "\n")
+    _files[lines, file_history] = filename
+    return filename
+
+
+def _suggest(auto_suggest, history):
+    buffer = Buffer(history=history)
+    words = ["a", "ad", "add_", "add_bullet task 1", "add_bullet task 12", "add_bullet task 123", "zzz"]
+    return [auto_suggest.get_suggestion(buffer, Document(word)) for word in words]
+
+
+def _command_history():
+    return CommandHistory(make_history_file(), max_size=LINES)
+
+
+def bench_load_100k():
+    return measure(lambda: _command_history().get_strings(), repeat=5)
+
+
+def bench_suggest_100k():
+    """keystrokes with auto suggestion
+    """
+    history = _command_history()
+    history.get_strings()
+    return measure(lambda: _suggest(HistoryAutoSuggest(), history), repeat=20)
+
+
+def bench_file_history_suggest_100k():
+    """the same keystrokes with prompt_toolkit's FileHistory, for reference
+    """
+    history = FileHistory(make_history_file(file_history=True))
+    history._loaded_strings = list(history.load_history_strings())
+    history._loaded = True
+    return measure(lambda: _suggest(AutoSuggestFromHistory(), history), repeat=5)
+
+
+if __name__ == "__main__":
+    report("history: load 100k lines", bench_load_100k())
+    report("history: suggest 100k lines", bench_suggest_100k())
+    report("history: FileHistory suggest 100k", bench_file_history_suggest_100k())
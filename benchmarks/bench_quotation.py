@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""per tick quotation processing of `watch`
+
+    python -m benchmarks.bench_quotation
+"""
+from easier.topic.stock import Stock
+from easier.util import CurseHelper
+
+from .common import measure, report, make_quotation
+
+COLUMNS = ["code", "name", "open", "low", "high", "price"]
+QUOTATION = make_quotation(1000)
+
+
+def legacy_rows(quotation):
+    """the per row processing replaced by `prepare_quotation`, for comparison
+    """
+    df = quotation.copy()
+    for field in ["open", "price", "low", "high", "pre_close"]:
+        df[field] = df[field].astype('float64')
+
+    records = [{} for i in range(len(df))]
+    for column, dict_val in df.to_dict().items():
+        for idx, val in dict_val.items():
+            records[idx][column] = val
+
+    for d in records:
+        price, pre_close = float(d["price"]), float(d["pre_close"])
+        diff = price - pre_close
+        ratio = diff / pre_close
+        if diff > 0:
+            color, sig = CurseHelper.RED, "+"
+        elif diff < 0:
+            color, sig = CurseHelper.GREEN, ""
+        else:
+            color, sig = CurseHelper.YELLOW, ""
+        d.update({"ratio": ratio, "color": color, "percentage": "%s%.2f%%" % (sig, ratio * 100)})
+
+    records.sort(key=lambda item: -item["ratio"])
+    return [[(d[col], 0) for col in COLUMNS] + [(d["percentage"], d["color"])] for d in records]
+
+
+def bench_tick_1000():
+    from easier.market.quotation import to_float_prices
+    return measure(lambda: Stock._quotation_rows(to_float_prices(QUOTATION), COLUMNS), repeat=20)
+
+
+def bench_legacy_tick_1000():
+    return measure(lambda: legacy_rows(QUOTATION), repeat=20)
+
+
+if __name__ == "__main__":
+    report("quotation: tick of 1000 symbols", bench_tick_1000())
+    report("quotation: legacy tick of 1000 symbols", bench_legacy_tick_1000())
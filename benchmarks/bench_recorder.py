@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""tick recorder throughput, snapshots of 3000 symbols
+
+    python -m benchmarks.bench_recorder
+"""
+import time
+import shutil
+import tempfile
+
+from easier.market.quotation import to_float_prices
+from easier.market.recorder import TickRecorder, to_ticks, read_ticks
+
+from .common import measure, report, make_quotation
+
+QUOTATION = to_float_prices(make_quotation(3000))
+
+
+def bench_snapshot_to_ticks():
+    return measure(lambda: to_ticks(QUOTATION, time.time()), repeat=20)
+
+
+def bench_write_batch_of_5():
+    """one flush of the writer thread, 5 snapshots at 1Hz polling
+    """
+    root = tempfile.mkdtemp()
+    recorder = TickRecorder(root=root)
+    recorder.close()
+    batch = [(time.time() + i, to_ticks(QUOTATION, time.time() + i)) for i in range(5)]
+    try:
+        return measure(lambda: recorder.write(batch), repeat=5)
+    finally:
+        shutil.rmtree(root)
+
+
+def bench_read_range():
+    root = tempfile.mkdtemp()
+    recorder = TickRecorder(root=root)
+    recorder.close()
+    start = time.mktime(time.strptime("20190708 093000", "%Y%m%d %H%M%S"))
+    recorder.write([(start + i, to_ticks(QUOTATION.head(10), start + i)) for i in range(4 * 3600)])
+    code = QUOTATION["code"][0]
+    try:
+        return measure(lambda: read_ticks(code, "20190708", start + 600, start + 1200, root=root), repeat=20)
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    report("recorder: snapshot of 3000 to ticks", bench_snapshot_to_ticks())
+    report("recorder: write 5 snapshots of 3000", bench_write_batch_of_5())
+    report("recorder: read 10min of a 4h day", bench_read_range())
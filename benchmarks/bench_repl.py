@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""REPL hot paths, which run on every command or keystroke
+
+    python -m benchmarks.bench_repl
+"""
+from prompt_toolkit.document import Document
+from prompt_toolkit.completion import CompleteEvent
+
+from easier.completer import CommandCompleter
+from easier.main import run_script
+from easier.stats import CommandStats
+from easier.topic.core import Topic, TopicMeta, entrypoint
+from easier.util import parse_command, pandas_to_list, common_ljust
+
+from .common import measure, report, make_quotation
+
+_topics = {}
+
+
+def make_topic(size):
+    """create a topic with `size` entrypoints, a third of them have an alias
+    """
+    if size in _topics:
+        return _topics[size]
+
+    members = {"_name": "bench_%d" % size, "_description": "benchmark"}
+    for idx in range(size):
+        def command(self, content=None):
+            pass
+        command.__name__ = "command_{:04d}".format(idx)
+        alias = ["alias_{:04d}".format(idx)] if idx % 3 == 0 else None
+        members[command.__name__] = entrypoint(alias=alias, doc="benchmark command")(command)
+    tcls = TopicMeta("BenchTopic%d" % size, (Topic,), members)
+    _topics[size] = tcls
+    return tcls
+
+
+class BenchContext(object):
+
+    def __init__(self, topic_class):
+        self.current = topic_class.__new__(topic_class)
+        self.inputting = ""
+
+
+def complete(completer, text):
+    return list(completer.get_completions(Document(text), CompleteEvent()))
+
+
+def bench_parse_command():
+    texts = ["select_topic stock", "add_bullet task buy some milk", "list_bullet", "watch 601318 zgpa"] * 250
+    return measure(lambda: [parse_command(text) for text in texts], repeat=20)
+
+
+def bench_complete_command_1000():
+    """keystrokes of typing a command with 1000 entrypoints
+    """
+    completer = CommandCompleter(BenchContext(make_topic(1000)))
+    words = ["c", "co", "com", "comm", "command_0", "command_05"]
+    return measure(lambda: [complete(completer, word) for word in words], repeat=20)
+
+
+def bench_complete_fuzzy_1000():
+    """keystrokes of typing an abbreviation, matched by subsequence
+    """
+    completer = CommandCompleter(BenchContext(make_topic(1000)))
+    words = ["c", "cm", "cmd", "cmd0", "cmd05", "cmd059"]
+    return measure(lambda: [complete(completer, word) for word in words], repeat=20)
+
+
+def bench_complete_content_1000():
+    """typing command content, the completer looks up the entrypoint
+    """
+    completer = CommandCompleter(BenchContext(make_topic(1000)))
+    return measure(lambda: complete(completer, "command_0999 some content"), repeat=20, number=100)
+
+
+def bench_script_1000():
+    """a script of 1000 commands, run without prompt session
+    """
+    context = BenchContext(make_topic(1000))
+    lines = ["command_{:04d} some content".format(idx) for idx in range(1000)]
+    return measure(lambda: run_script(context, lines), repeat=20)
+
+
+def bench_command_stats_1000():
+    """instrumentation added to every command
+    """
+    stats = CommandStats()
+
+    def record():
+        for _ in range(1000):
+            stats.stop("bench", "command", stats.start())
+    return measure(record, repeat=20)
+
+
+def bench_pandas_to_list_1000():
+    quotation = make_quotation(1000)
+    return measure(lambda: pandas_to_list(quotation), repeat=20)
+
+
+def bench_common_ljust():
+    values = ["中国平安", "京东方Ａ", "601318", "12.34", "+1.23%", "万科Ａ", "000725"] * 1000
+    return measure(lambda: [common_ljust(value, 12) for value in values], repeat=20)
+
+
+if __name__ == "__main__":
+    report("repl: parse 1000 commands", bench_parse_command())
+    report("repl: complete command of 1000", bench_complete_command_1000())
+    report("repl: complete fuzzy of 1000", bench_complete_fuzzy_1000())
+    report("repl: complete content x100", bench_complete_content_1000())
+    report("repl: script of 1000 commands", bench_script_1000())
+    report("repl: command stats x1000", bench_command_stats_1000())
+    report("repl: pandas_to_list 1000 rows", bench_pandas_to_list_1000())
+    report("repl: common_ljust 7000 values", bench_common_ljust())
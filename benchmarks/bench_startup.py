@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""cold startup benchmark, from launching `easier` to the first prompt
+
+    python -m benchmarks.bench_startup
+"""
+import os
+import sys
+import time
+import subprocess
+
+from ptyprocess import PtyProcessUnicode
+
+from .common import measure, report
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAUNCH = "from easier.main import main; main()"
+HEAVY_MODULES = ("tushare", "pandas")
+
+
+def launch_to_prompt(prompt="default>", timeout=30):
+    """spawn easier in a pseudo terminal, wait until the first prompt shows
+
+    :param prompt: the prompt text of default topic
+    :param timeout: seconds
+    """
+    proc = PtyProcessUnicode.spawn([sys.executable, "-c", LAUNCH], cwd=ROOT_DIR)
+    try:
+        output = ""
+        deadline = time.time() + timeout
+        while prompt not in output:
+            if time.time() > deadline:
+                raise RuntimeError("no prompt after {}s, output: {!r}".format(timeout, output))
+            output += proc.read(1024)
+        proc.sendeof()
+    finally:
+        proc.terminate(force=True)
+
+
+def bench_cold_start():
+    return measure(launch_to_prompt, repeat=5)
+
+
+def bench_import_main():
+    cmd = [sys.executable, "-c", "import easier.main"]
+    return measure(lambda: subprocess.check_call(cmd, cwd=ROOT_DIR), repeat=5)
+
+
+def heavy_modules_at_startup():
+    """return heavy modules imported by `easier.main`, it should be empty
+    """
+    code = "import sys, easier.main; print(' '.join(m for m in {!r} if m in sys.modules))".format(HEAVY_MODULES)
+    output = subprocess.check_output([sys.executable, "-c", code], cwd=ROOT_DIR)
+    return output.decode("utf-8").split()
+
+
+if __name__ == "__main__":
+    report("startup: launch to first prompt", bench_cold_start())
+    report("startup: import easier.main", bench_import_main())
+    print("heavy modules imported at startup: {}".format(heavy_modules_at_startup() or "none"))
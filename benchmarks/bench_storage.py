@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""insert and read throughput of bullets by storage profile
+
+    python -m benchmarks -k storage
+"""
+import os
+import shutil
+import tempfile
+
+from .common import measure, report, make_bullet_db
+
+# bullets written per round
+WRITES = 200
+# size of the database for reads
+READ_BULLETS = 50000
+
+
+class profile_db(object):
+    """a temporary database with the storage profile applied, the global
+        database is restored on exit.
+    """
+
+    def __init__(self, profile, size=0):
+        self.profile = profile
+        self.size = size
+
+    def __enter__(self):
+        from easier.db import database, apply_storage_profile, run_migrations, SystemParameter
+        from easier.topic.bujo import Bullet, BulletDaily
+
+        self.origin = database.database, database._pragmas
+        self.dirname = tempfile.mkdtemp()
+        path = os.path.join(self.dirname, "bench.db")
+        database.init(path)
+        apply_storage_profile(self.profile)
+        if self.size:
+            make_bullet_db(self.size, path)
+        else:
+            database.create_tables([SystemParameter, Bullet, BulletDaily])
+            run_migrations()
+        return database
+
+    def __exit__(self, *args):
+        from easier.db import database
+
+        database.close()
+        database.init(self.origin[0], pragmas=self.origin[1])
+        shutil.rmtree(self.dirname)
+
+
+def _save(bullets):
+    from easier.topic.bujo import Bullet
+
+    for idx in range(bullets):
+        Bullet(date_str="2019-07-08", bullet_type="task", content="bullet %d" % idx).save()
+
+
+def _save_in_batch(bullets):
+    from easier.db import batch
+
+    with batch():
+        _save(bullets)
+
+
+def _read():
+    from easier.topic.bujo import Bullet
+
+    return list(Bullet.select().where(Bullet.date_str == "2019-07-08"))
+
+
+def _insert(profile, func):
+    with profile_db(profile):
+        return measure(lambda: func(WRITES), repeat=5)
+
+
+def _select(profile):
+    from easier.topic.bujo import BujoTopic
+    from easier.context import Context
+
+    with profile_db(profile, READ_BULLETS):
+        topic = BujoTopic(Context())
+        return measure(lambda: list(topic.get_all_bullets()), repeat=5)
+
+
+def bench_save_safe():
+    return _insert("safe", _save)
+
+
+def bench_save_default():
+    return _insert("default", _save)
+
+
+def bench_save_fast():
+    return _insert("fast", _save)
+
+
+def bench_batch_save_safe():
+    return _insert("safe", _save_in_batch)
+
+
+def bench_batch_save_default():
+    return _insert("default", _save_in_batch)
+
+
+def bench_read_safe():
+    return _select("safe")
+
+
+def bench_read_default():
+    return _select("default")
+
+
+def bench_read_fast():
+    return _select("fast")
+
+
+if __name__ == "__main__":
+    for profile in ("safe", "default", "fast"):
+        report("storage: %d saves, %s" % (WRITES, profile), _insert(profile, _save))
+        report("storage: %d saves in batch, %s" % (WRITES, profile), _insert(profile, _save_in_batch))
+        report("storage: read %d, %s" % (READ_BULLETS, profile), _select(profile))
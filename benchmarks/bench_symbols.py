@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""stock symbol resolving benchmark
+
+    python -m benchmarks.bench_symbols
+"""
+import random
+
+from easier.market.symbols import SymbolIndex, SymbolCompleter, INDEX_SYMBOLS
+from easier.util import quanjiao2banjiao
+
+from .common import measure, report, make_stock_basis
+
+BASIS = make_stock_basis(4000)
+
+
+def banjiao2quanjiao(ustring):
+    return "".join(chr(ord(c) + 65248) if 33 <= ord(c) <= 126 else c for c in ustring)
+
+
+def mixed_identifiers(size=5000, seed=0):
+    """codes, names, full width names, pinyin initials and index names
+    """
+    rand = random.Random(seed)
+    rows = BASIS.to_dict("records")
+    choices = [
+        lambda row: row["code"],
+        lambda row: row["name"],
+        lambda row: banjiao2quanjiao(row["code"]),
+        lambda row: row["pinyin"],
+        lambda row: rand.choice(list(INDEX_SYMBOLS)),
+    ]
+    return [rand.choice(choices)(rand.choice(rows)) for _ in range(size)]
+
+
+IDENTIFIERS = mixed_identifiers()
+
+
+def bench_build_index():
+    return measure(lambda: SymbolIndex.from_frame(BASIS), repeat=5)
+
+
+def bench_normalize_5000():
+    index = SymbolIndex.from_frame(BASIS)
+    return measure(lambda: index.normalize(IDENTIFIERS), repeat=10)
+
+
+def bench_stock_normalize_5000():
+    from easier.context import Context
+    from easier.market.source import SyntheticSource
+    from easier.topic.stock import Stock
+
+    stock = Stock(Context(), source=SyntheticSource(basics=BASIS))
+    return measure(lambda: stock.normalize(IDENTIFIERS), repeat=10)
+
+
+def _switch_back(hibernate):
+    """select the stock topic again after it was evicted
+    """
+    import tempfile
+    from easier.context import Context
+    from easier.market.source import SyntheticSource
+    from easier.topic import stock as stock_module
+
+    stock_module.HIBERNATE_DIR = tempfile.mkdtemp()
+    stock = stock_module.Stock(Context(), source=SyntheticSource(basics=BASIS))
+
+    def switch():
+        if hibernate:
+            stock.hibernate()
+        else:
+            stock._stock_basis = stock._symbols = stock._completer = None
+        stock.normalize("zgpa")
+    return measure(switch, repeat=10)
+
+
+def bench_stock_rehydrate():
+    return _switch_back(True)
+
+
+def bench_stock_reload():
+    """the state is dropped by release, for comparison
+    """
+    return _switch_back(False)
+
+
+def bench_legacy_normalize_5000():
+    """the `isin` scans replaced by `SymbolIndex`, for comparison
+    """
+    def normalize():
+        stocks = [quanjiao2banjiao(s) for s in IDENTIFIERS]
+        return BASIS[BASIS["name"].isin(stocks) | BASIS["code"].isin(stocks)]["code"].to_list()
+    return measure(normalize, repeat=10)
+
+
+def bench_complete_prefix():
+    """one completion per keystroke, over a table as big as the A-share list
+    """
+    completer = SymbolCompleter.from_frame(make_stock_basis(5000))
+    prefixes = ["6", "60", "601", "z", "zg", "zgp", "中", "中国", "0007"]
+    return measure(lambda: [completer.complete(p) for p in prefixes], repeat=20, number=100)
+
+
+if __name__ == "__main__":
+    report("symbols: build index of 4000 stocks", bench_build_index())
+    report("symbols: normalize 5000 identifiers", bench_normalize_5000())
+    report("symbols: Stock.normalize 5000", bench_stock_normalize_5000())
+    report("symbols: Stock hibernate and rehydrate", bench_stock_rehydrate())
+    report("symbols: Stock reload after release", bench_stock_reload())
+    report("symbols: legacy isin normalize 5000", bench_legacy_normalize_5000())
+    report("symbols: complete 9 prefixes", bench_complete_prefix())
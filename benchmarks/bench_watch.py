@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""offline `watch` throughput, fetch + post-processing + rendering, with
+    synthetic quotations at 10x market speed.
+
+    python -m benchmarks.bench_watch
+"""
+import curses
+
+from easier.context import Context
+from easier.market.source import SyntheticSource
+from easier.screen import GridRenderer
+from easier.topic.stock import Stock
+
+from .common import measure, report, NullScreen
+
+COLUMNS = ["code", "name", "open", "low", "high", "price"]
+
+
+def watch_tick(size, speed=10):
+    """return a function running one `watch` tick over `size` symbols
+    """
+    stock = Stock(Context(), source=SyntheticSource(size=size, speed=speed))
+    codes = stock.normalize(stock.get_source().get_stock_basics()["code"].tolist())
+    renderer = GridRenderer(NullScreen(), [12] * (len(COLUMNS) + 1))
+    renderer._terminal_size = lambda: renderer.scr.size
+    curses.color_pair = lambda color: color
+
+    def tick():
+        rows, colors = stock._quotation_rows(stock._fetch_quotation(codes), COLUMNS)
+        renderer.render(rows, colors)
+    return tick
+
+
+def bench_watch_tick_1000():
+    return measure(watch_tick(1000), repeat=50)
+
+
+def bench_watch_tick_5000():
+    return measure(watch_tick(5000), repeat=20)
+
+
+if __name__ == "__main__":
+    report("watch: tick of 1000 symbols at 10x", bench_watch_tick_1000())
+    report("watch: tick of 5000 symbols at 10x", bench_watch_tick_5000())
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+
+
+def measure(func, repeat=5, number=1):
+    """run `func` for `repeat` rounds, `number` calls per round
+
+    :param func: callable without arguments
+    :param repeat: rounds
+    :param number: calls per round
+    :return: dict, seconds per call
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    timings.sort()
+    return {
+        "min": timings[0],
+        "median": timings[len(timings) // 2],
+        "max": timings[-1],
+        "repeat": repeat,
+        "number": number,
+    }
+
+
+def report(name, stats):
+    """print one benchmark result in a line
+    """
+    print("{:<40} min {:>10.3f}ms  median {:>10.3f}ms  max {:>10.3f}ms".format(
+        name, stats["min"] * 1000, stats["median"] * 1000, stats["max"] * 1000))
+
+
+HANZI = "中国平安银行科技电子能源医药股份建设招商证券万科华夏光大东方"
+
+
+def make_stock_basis(size=4000, seed=0):
+    """generate a stock basis table like `tushare.get_stock_basics()`
+
+    :param size: number of stocks
+    :param seed: random seed
+    :return: DataFrame with `code`, `name` and `pinyin` columns
+    """
+    import random
+    import pandas as pd
+    from easier.market.symbols import add_pinyin_column
+
+    rand = random.Random(seed)
+    codes = ["{:06d}".format(code) for code in rand.sample(range(1, 700000), size)]
+    names, seen = [], set()
+    while len(names) < size:
+        name = "".join(rand.choice(HANZI) for _ in range(4))
+        if name in seen:
+            continue
+        seen.add(name)
+        names.append(name)
+    return add_pinyin_column(pd.DataFrame({"code": codes, "name": names}))
+
+
+def make_quotation(size=1000, seed=0):
+    """generate realtime quotation like `tushare.get_realtime_quotes()`, the
+        prices are strings as tushare returns.
+
+    :param size: number of stocks
+    :param seed: random seed
+    :return: DataFrame
+    """
+    import random
+    import pandas as pd
+
+    rand = random.Random(seed)
+    basis = make_stock_basis(size, seed)
+    rows = []
+    for code, name in zip(basis["code"], basis["name"]):
+        pre_close = rand.uniform(2, 200)
+        prices = [pre_close * rand.uniform(0.9, 1.1) for _ in range(4)]
+        rows.append({
+            "code": code, "name": name,
+            "open": "%.3f" % prices[0], "price": "%.3f" % prices[1],
+            "low": "%.3f" % min(prices), "high": "%.3f" % max(prices),
+            "pre_close": "%.3f" % pre_close,
+        })
+    return pd.DataFrame(rows)
+
+
+class NullScreen(object):
+    """curses window which draws nothing, for rendering benchmarks
+    """
+
+    def __init__(self, lines=60, cols=200):
+        self.size = (lines, cols)
+        self.writes = 0
+
+    def getmaxyx(self):
+        return self.size
+
+    def addstr(self, *args):
+        self.writes += 1
+
+    def idlok(self, flag):
+        pass
+
+    def move(self, y, x):
+        pass
+
+    def clrtoeol(self):
+        pass
+
+    def clear(self):
+        pass
+
+    def refresh(self):
+        pass
+
+
+def make_bullet_db(size=100000, path=None, seed=0, days=1000):
+    """generate a bujo database, bullets are spread over `days` days until
+        today, and 10% of them are sub tasks. the content is made of random
+        words.
+
+    :param size: number of bullets
+    :param path: database file, default is a temporary file
+    :param seed: random seed
+    :param days: days of history
+    :return: database file path
+    """
+    import random
+    import tempfile
+    from datetime import datetime, timedelta
+    from easier.db import database, SystemParameter, run_migrations
+    from easier.topic.bujo import Bullet, BulletDaily
+
+    path = path or os.path.join(tempfile.mkdtemp(), "bench.db")
+    database.init(path)
+    database.create_tables([SystemParameter, Bullet, BulletDaily])
+
+    rand = random.Random(seed)
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    statuses = ["complete"] * 14 + ["incomplete"] * 2 + ["movefuture"] * 3 + ["delaycomplete"]
+    # a vocabulary of 5000 chinese words, and some english words
+    words = ["".join(chr(0x4e00 + rand.randint(0, 3000)) for _ in range(2)) for _ in range(5000)]
+    words += ["meeting", "review", "release", "report", "email", "call", "plan", "bug"]
+
+    def rows():
+        for idx in range(1, size + 1):
+            # older bullets first, so create_date grows with id like a real journal
+            day = today - timedelta(days=days - 1 - (idx - 1) * days // size)
+            created = day + timedelta(seconds=rand.randint(0, 86399))
+            btype = rand.choice(["task"] * 12 + ["note"] * 5 + ["event"] * 3)
+            parent = rand.randint(max(1, idx - 50), idx - 1) if idx > 1 and rand.random() < 0.1 else None
+            if parent is not None:
+                btype = "task"
+            status = rand.choice(statuses) if btype == "task" else "incomplete"
+            content = "".join(rand.choice(words) for _ in range(rand.randint(2, 8)))
+            yield (idx, 0, day.strftime("%Y-%m-%d"), "%s %d" % (content, idx), btype, status,
+                   parent, str(created), str(created))
+
+    sql = ("INSERT INTO bullet (id, version, date_str, content, bullet_type, task_status, "
+           "parent_id, create_date, update_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+    with database.atomic():
+        database.connection().executemany(sql, rows())
+    # indexes and the full text index
+    run_migrations()
+    return path
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+import tempfile
+
+from datetime import datetime as dte, timedelta
+
+from .db import STORAGE_DIR, DATA_DIR
+
+CACHE_DIR = os.path.join(STORAGE_DIR, "cache")
+# state of hibernated topics, one file per topic, named by the topic and the
+# pid of its process, such as stock-1234-xxxx.pkl
+HIBERNATE_DIR = os.path.join(DATA_DIR, "hibernate")
+
+
+def hibernate_file(name, root=None):
+    """create a file to save the state of a hibernated topic
+
+    :param name: topic name
+    :param root: directory, default is `HIBERNATE_DIR`
+    :return: tuple, (fd, path)
+    """
+    root = root or HIBERNATE_DIR
+    if not os.path.exists(root):
+        os.makedirs(root)
+    return tempfile.mkstemp(prefix="{}-{}-".format(name, os.getpid()), suffix=".pkl", dir=root)
+
+
+def _process_exists(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def sweep_hibernated(root=None):
+    """remove the files of hibernated topics left by exited processes, such
+        as a crash
+
+    :param root: directory, default is `HIBERNATE_DIR`
+    :return: number of removed files
+    """
+    root = root or HIBERNATE_DIR
+    if not os.path.exists(root):
+        return 0
+    count = 0
+    for filename in os.listdir(root):
+        parts = filename.split("-")
+        if len(parts) > 2 and parts[1].isdigit():
+            pid = int(parts[1])
+            if pid == os.getpid() or _process_exists(pid):
+                continue
+        try:
+            os.remove(os.path.join(root, filename))
+            count += 1
+        except OSError:
+            pass
+    return count
+
+
+def last_trading_open(now=None, hour=9, minute=0):
+    """return the open time of the latest trading day, holidays are ignored,
+        only weekend is skipped.
+
+    :param now: datetime, default is now
+    :param hour: hour of market open
+    :param minute: minute of market open
+    :return: datetime
+    """
+    now = now or dte.now()
+    opening = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if opening > now:
+        opening -= timedelta(days=1)
+    while opening.weekday() >= 5:
+        opening -= timedelta(days=1)
+    return opening
+
+
+class FrameCache(object):
+    """cache a DataFrame on local disk, and in memory.
+
+        the frame is saved by pickle, it keeps the column blocks of numpy array,
+        so loading it is a memory copy rather than parsing.
+
+        cache = FrameCache("stock_basis")
+        frame = cache.get(fetch_func, ttl=86400)
+    """
+
+    def __init__(self, name, ttl=86400):
+        self.name = name
+        self.ttl = ttl
+        self._frame = None
+        self._saved_at = None
+
+    @property
+    def path(self):
+        return os.path.join(CACHE_DIR, "{}.pkl".format(self.name))
+
+    def is_fresh(self, saved_at, ttl=None, now=None):
+        """a cache is fresh when it's younger than ttl, and it was saved after
+            the latest trading day opened.
+
+        :param saved_at: timestamp of the cache
+        :param ttl: seconds
+        :param now: timestamp, default is now
+        :return: bool
+        """
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time() if now is None else now
+        if now - saved_at >= ttl:
+            return False
+        opening = last_trading_open(dte.fromtimestamp(now))
+        return dte.fromtimestamp(saved_at) >= opening
+
+    def load(self):
+        """load cache from memory or disk, no matter it's fresh or not
+
+        :return: tuple, (frame, saved_at), or (None, None) if no cache
+        """
+        import pandas as pd
+
+        try:
+            saved_at = os.path.getmtime(self.path)
+        except OSError:
+            return None, None
+        if self._frame is not None and self._saved_at == saved_at:
+            return self._frame, self._saved_at
+
+        try:
+            frame = pd.read_pickle(self.path)
+        except Exception:       # broken cache file, treat as no cache
+            return None, None
+        self._frame, self._saved_at = frame, saved_at
+        return frame, saved_at
+
+    def save(self, frame):
+        dirname = os.path.dirname(self.path)
+        if not os.path.exists(dirname):
+            os.makedirs(dirname)
+
+        tmp = self.path + ".tmp"
+        frame.to_pickle(tmp)
+        os.replace(tmp, self.path)
+        self._frame, self._saved_at = frame, os.path.getmtime(self.path)
+
+    def clear(self):
+        self._frame = self._saved_at = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def get(self, fetch, ttl=None):
+        """return the cached frame, call `fetch` to refresh it when it's stale.
+            if `fetch` fails, fall back to the stale one.
+
+        :param fetch: function return a DataFrame, None means failure
+        :param ttl: seconds, default is `self.ttl`
+        :return: DataFrame
+        """
+        frame, saved_at = self.load()
+        if frame is not None and self.is_fresh(saved_at, ttl):
+            return frame
+
+        try:
+            fetched = fetch()
+        except Exception:
+            if frame is None:
+                raise
+            return frame
+
+        if fetched is None:
+            return frame
+        self.save(fetched)
+        return fetched
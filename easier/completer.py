@@ -17,9 +17,7 @@ class CommandCompleter(Completer):
         self.context.inputting = document.text
 
         if word == document.text:                       # suppose user is typing command
-            for cmd, obj in topic.get_entrypoints().items():
-                if word and not cmd.startswith(word):
-                    continue
+            for cmd in topic.complete_command(word):
                 yield Completion(
                     cmd,
                     start_position=-len(word),
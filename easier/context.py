@@ -1,6 +1,12 @@
 # -*- coding: utf-8 -*-
+from collections import OrderedDict
+
+from .db import SystemParameter
 from .topic import DefaultTopic, TopicMeta
 
+# memory of topics in MB, `> config context.memory_budget 512` to change it
+MEMORY_BUDGET = 256
+
 
 class Context(object):
     """a context used to represent current session and save other
@@ -10,10 +16,10 @@ class Context(object):
     def __init__(self):
         self.current = DefaultTopic(self)
 
-        # save history topic, order by add time, and without duplicate
-        self.queue = []
-        # define the max size of queue
-        self.queue_max_size = 5
+        # previous topics by name, least recently used first
+        self.topics = OrderedDict()
+        # bytes, the least recently used topics are hibernated beyond it
+        self.memory_budget = SystemParameter.get_value("context.memory_budget", MEMORY_BUDGET, int) * 1024 * 1024
 
         # the realtime input text
         self.inputting = ""
@@ -44,23 +50,55 @@ class Context(object):
 
         if self.current == topic:
             return
-        if self.current in self.queue:
-            self.queue.remove(self.current)
-        self.queue.append(self.current)
+        self._cache(self.current)
+        cached = self.topics.pop(topic.name, None)
+        if cached is not None and cached is not topic:
+            cached.release()
         self.current = topic
-        self._check_queue_size()
+        self._check_memory()
+
+    def _cache(self, topic):
+        """keep the topic as the most recently used one
+        """
+        cached = self.topics.pop(topic.name, None)
+        if cached is not None and cached is not topic:
+            cached.release()
+        self.topics[topic.name] = topic
+
+    def close(self):
+        """
+        release the current and cached topics, such as the files of
+        hibernated topics, call it on exit
 
-    def _check_queue_size(self):
+        :return:
+        """
+        for topic in list(self.topics.values()) + [self.current]:
+            topic.release()
+        self.topics.clear()
+
+    def memory_usage(self):
         """
-        check weather the size of queue is exceed the limit.
+        approximate bytes of the current and cached topics
 
-        if exceeded, then pop the head topic
+        :return: bytes
+        """
+        return self.current.memory_usage() + sum(topic.memory_usage() for topic in self.topics.values())
+
+    def _check_memory(self):
+        """
+        hibernate the least recently used topics until the memory usage is
+        within budget, the current topic is never hibernated.
 
         :return:
         """
-        while len(self.queue) > self.queue_max_size:
-            to_del = self.queue.pop(0)
-            to_del.release()
+        usages = [(topic, topic.memory_usage()) for topic in self.topics.values()]
+        total = self.current.memory_usage() + sum(usage for _, usage in usages)
+        for topic, usage in usages:
+            if total <= self.memory_budget:
+                break
+            if usage:
+                topic.hibernate()
+                total -= usage
 
     def get_topic(self, name):
         """
@@ -75,9 +113,8 @@ class Context(object):
         if self.current.name == name:
             return self.current
 
-        for topic in self.queue:
-            if topic.name != name:
-                continue
+        topic = self.topics.get(name)
+        if topic is not None:
             return topic
         topic = TopicMeta.create_topic(name, self)
         return topic
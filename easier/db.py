@@ -1,11 +1,225 @@
 # -*- coding: utf-8 -*-
 import os
+import warnings
 
 import peewee as pw
 
+from configparser import ConfigParser
+from contextlib import contextmanager
+
+from datetime import datetime as dte
+
+from .stats import sql_queries
+
 CUR_DIR = os.path.abspath(os.path.dirname(__file__))
+STORAGE_DIR = os.path.join(CUR_DIR, "storage")
+# runtime data of user, such as command history, the package directory may
+# be not writable once installed
+DATA_DIR = os.environ.get("EASIER_HOME", os.path.join(os.path.expanduser("~"), ".easier"))
+
+
+class SqliteDatabase(pw.SqliteDatabase):
+    """count the statements executed, for command stats
+    """
+
+    def execute_sql(self, sql, params=None, *args, **kwargs):
+        sql_queries.incr()
+        return super(SqliteDatabase, self).execute_sql(sql, params, *args, **kwargs)
+
+
+database = SqliteDatabase(os.path.join(STORAGE_DIR, "easier.db"))
+
+# config file of storage, such as:
+#
+#   [storage]
+#   profile = fast
+#   cache_size = -65536
+CONFIG_FILE = os.environ.get("EASIER_CONFIG", os.path.join(STORAGE_DIR, "easier.ini"))
+
+# sqlite pragmas of storage profiles
+#   safe:    rollback journal and full sync, the defaults of sqlite
+#   default: WAL, sync at checkpoint, 16M page cache, 64M mmap
+#   fast:    WAL without sync, a crash of OS may lose the last commits
+STORAGE_PROFILES = {
+    "safe": {
+        "journal_mode": "delete",
+        "synchronous": "full",
+        "cache_size": -2000,
+        "mmap_size": 0,
+        "busy_timeout": 5000,
+    },
+    "default": {
+        "journal_mode": "wal",
+        "synchronous": "normal",
+        "cache_size": -16000,
+        "mmap_size": 64 * 1024 * 1024,
+        "busy_timeout": 5000,
+    },
+    "fast": {
+        "journal_mode": "wal",
+        "synchronous": "off",
+        "cache_size": -64000,
+        "mmap_size": 256 * 1024 * 1024,
+        "busy_timeout": 5000,
+    },
+}
+STORAGE_PRAGMAS = ("journal_mode", "synchronous", "cache_size", "mmap_size", "busy_timeout")
+# valid values of pragmas, the others take integers
+STORAGE_PRAGMA_CHOICES = {
+    "journal_mode": ("delete", "truncate", "persist", "memory", "wal", "off"),
+    "synchronous": ("off", "normal", "full", "extra", "0", "1", "2", "3"),
+}
+
+# schema migrations, name -> function, applied once per database in name order
+MIGRATIONS = {}
+
+
+def migration(name):
+    """register a schema migration, such as:
+
+            @migration("bujo_0001_composite_indexes")
+            def add_indexes():
+                database.execute_sql("CREATE INDEX IF NOT EXISTS ...")
+
+        the tables of models are created before migrations run, so a
+        migration should also work on a new database.
+
+    :param name: unique name, it's the order of migrations too
+    :return: decorator
+    """
+    def wrap(func):
+        MIGRATIONS[name] = func
+        return func
+    return wrap
+
+
+def run_migrations():
+    """run the migrations which haven't been applied to the database, the
+        applied migrations are recorded in `SystemParameter`.
+    """
+    prefix = "migration."
+    applied = set(key for key, in SystemParameter.select(SystemParameter.key)
+                  .where(SystemParameter.key.startswith(prefix)).tuples())
+    for name in sorted(MIGRATIONS):
+        if prefix + name in applied:
+            continue
+        with batch():
+            MIGRATIONS[name]()
+            SystemParameter.create(key=prefix + name, value=dte.now().strftime("%Y-%m-%d %H:%M:%S"))
+
+
+def read_config(section, path=None):
+    """read one section of the config file
+
+    :param section: section name
+    :param path: config file, default is `CONFIG_FILE`
+    :return: dict
+    """
+    parser = ConfigParser()
+    parser.read(path or CONFIG_FILE, encoding="utf-8")
+    if not parser.has_section(section):
+        return {}
+    return dict(parser.items(section))
 
-database = pw.SqliteDatabase(os.path.join(CUR_DIR, "storage", "easier.db"))
+
+def check_storage_setting(key, value):
+    """check a setting of storage before it's saved, such as `> config
+        storage.profile fast`
+
+    :param key: `profile` or one of `STORAGE_PRAGMAS`
+    :param value: value
+    :raise ValueError: unknown key or invalid value
+    """
+    if key == "profile":
+        if value not in STORAGE_PROFILES:
+            raise ValueError("unknown storage profile: {}, choose from {}".format(
+                value, ", ".join(sorted(STORAGE_PROFILES))))
+        return
+    if key not in STORAGE_PRAGMAS:
+        raise ValueError("unknown storage setting: {}, choose from profile, {}".format(key, ", ".join(STORAGE_PRAGMAS)))
+    if key in STORAGE_PRAGMA_CHOICES:
+        if str(value).lower() not in STORAGE_PRAGMA_CHOICES[key]:
+            raise ValueError("invalid {}: {}, choose from {}".format(
+                key, value, ", ".join(STORAGE_PRAGMA_CHOICES[key])))
+        return
+    try:
+        int(value)
+    except (TypeError, ValueError):
+        raise ValueError("invalid {}: {}, an integer is expected".format(key, value))
+
+
+def storage_settings(profile=None, path=None):
+    """pragmas of the storage, the later overrides the former:
+
+            1. the profile, `default` if not set
+            2. the `storage` section of config file
+            3. `SystemParameter` such as `storage.profile`, `storage.cache_size`
+
+    invalid settings of config file or `SystemParameter` are ignored with a
+    warning, so a typo never stops the program from starting.
+
+    :param profile: profile name, override all the settings of profile
+    :param path: config file
+    :return: dict, pragma -> value
+    """
+    if profile:
+        check_storage_setting("profile", profile)
+        return dict(STORAGE_PROFILES[profile])
+
+    config = read_config("storage", path)
+    name = SystemParameter.get_value("storage.profile") or config.get("profile") or "default"
+    if name not in STORAGE_PROFILES:
+        warnings.warn("unknown storage profile: {}, use default".format(name))
+        name = "default"
+
+    settings = dict(STORAGE_PROFILES[name])
+    for key in STORAGE_PRAGMAS:
+        value = SystemParameter.get_value("storage." + key, config.get(key))
+        if value is None:
+            continue
+        try:
+            check_storage_setting(key, value)
+        except ValueError as e:
+            warnings.warn("{}, ignored".format(e))
+            continue
+        settings[key] = value
+    return settings
+
+
+def apply_storage_profile(profile=None, path=None):
+    """set pragmas of the storage, they are applied to new connections too
+
+        apply_storage_profile()         # by config
+        apply_storage_profile("fast")
+
+    :param profile: profile name
+    :param path: config file
+    :return: dict, pragma -> value
+    """
+    settings = storage_settings(profile, path)
+    for key in STORAGE_PRAGMAS:
+        database.pragma(key, settings[key], permanent=True)
+    return settings
+
+
+@contextmanager
+def batch():
+    """write in one transaction, commit once at the end
+
+            with batch():
+                for bullet in bullets:
+                    bullet.save()
+
+        the outermost batch takes the write lock at the beginning, so a
+        concurrent writer waits by busy timeout instead of failing on lock
+        upgrade. nested batches are savepoints.
+    """
+    if database.in_transaction():
+        with database.atomic():
+            yield
+    else:
+        with database.atomic(lock_type="IMMEDIATE"):
+            yield
 
 
 class BaseModel(pw.Model):
@@ -26,9 +240,32 @@ class BaseModel(pw.Model):
         to_created = filter(lambda obj: not obj.table_exists(),
                             cls.sub_models().values())
         database.create_tables(to_created)
+        run_migrations()
 
 
 class SystemParameter(BaseModel):
 
     key = pw.CharField(index=True, unique=True, max_length=128)
     value = pw.CharField(max_length=1024)
+
+    @classmethod
+    def get_value(cls, key, default=None, cast=str):
+        """return the parameter value, or default if it's not set
+
+            SystemParameter.get_value("stock.basis_ttl", 86400, int)
+
+        :param key: parameter key
+        :param default: returned if the parameter not exist
+        :param cast: convert the stored string by it
+        :return:
+        """
+        try:
+            param = cls.get_or_none(cls.key == key)
+        except pw.OperationalError:     # table not created yet
+            return default
+        if param is None:
+            return default
+        try:
+            return cast(param.value)
+        except ValueError:
+            return default
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+import os
+import bisect
+
+from collections import OrderedDict
+from prompt_toolkit.history import History
+from prompt_toolkit.auto_suggest import AutoSuggest, Suggestion
+
+from .db import DATA_DIR, SystemParameter
+
+# command history of every topic is saved in this directory, one file per topic
+HISTORY_DIR = os.environ.get("EASIER_HISTORY_DIR", os.path.join(DATA_DIR, "history"))
+# FileHistory of previous versions, under the working directory, it's
+# imported when the topic has no history yet
+LEGACY_HISTORY_DIR = ".history"
+
+# entries kept per topic, `> config history.max_size 50000` to change it
+HISTORY_MAX_SIZE = 10000
+
+_histories = {}
+
+
+def get_history(name):
+    """history of the topic, shared by topic instances of the same name
+
+    :param name: topic name
+    :return: `CommandHistory`
+    """
+    history = _histories.get(name)
+    if history is None:
+        history = _histories[name] = CommandHistory(os.path.join(HISTORY_DIR, name),
+                                                    legacy=os.path.join(LEGACY_HISTORY_DIR, name))
+    return history
+
+
+def read_file_history(filename):
+    """commands in the file of prompt_toolkit's FileHistory, oldest first
+
+    :param filename: history file
+    :return: generator of command
+    """
+    lines = []
+    with open(filename, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if line.startswith("+"):
+                lines.append(line[1:].rstrip("\n"))
+            elif lines:
+                yield " ".join(lines)
+                lines = []
+    if lines:
+        yield " ".join(lines)
+
+
+class CommandHistory(History):
+    """deduplicated command history, at most `max_size` entries.
+
+        the file is loaded at first use, new commands are appended to it, and
+        it's rewritten without duplicates once it doubles the entries. a sorted
+        list of entries makes a suggestion a lookup instead of a scan.
+    """
+
+    def __init__(self, filename, max_size=None, legacy=None):
+        super(CommandHistory, self).__init__()
+        self.filename = filename
+        self.max_size = max_size
+        # FileHistory to import when `filename` doesn't exist
+        self.legacy = legacy
+        # entry -> sequence number, oldest first
+        self._recent = OrderedDict()
+        self._sorted = []
+        self._seq = 0
+        # lines in the file
+        self._lines = 0
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if self.max_size is None:
+            self.max_size = SystemParameter.get_value("history.max_size", HISTORY_MAX_SIZE, int)
+
+        imported = False
+        if os.path.exists(self.filename):
+            with open(self.filename, encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    self._lines += 1
+                    self._add(line.rstrip("\n"))
+        elif self.legacy and os.path.exists(self.legacy):
+            for string in read_file_history(self.legacy):
+                self._add(string)
+            imported = bool(self._recent)
+        self._sorted = sorted(self._recent)
+        self._trim()
+        if imported or self._lines > 2 * len(self._recent):
+            self.compact()
+
+    def _add(self, string):
+        """add or refresh an entry, return True if it's a new one
+        """
+        self._seq += 1
+        exists = string in self._recent
+        if exists:
+            self._recent.move_to_end(string)
+        self._recent[string] = self._seq
+        return not exists
+
+    def _trim(self):
+        while len(self._recent) > self.max_size:
+            string, _ = self._recent.popitem(last=False)
+            idx = bisect.bisect_left(self._sorted, string)
+            del self._sorted[idx]
+
+    def compact(self):
+        """rewrite the file with the entries in memory
+        """
+        dirname = os.path.dirname(self.filename)
+        if dirname and not os.path.exists(dirname):
+            os.makedirs(dirname)
+        tmp = self.filename + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for string in self._recent:
+                f.write(string + "\n")
+        os.replace(tmp, self.filename)
+        self._lines = len(self._recent)
+
+    async def load(self):
+        self._ensure_loaded()
+        for string in reversed(self._recent):
+            yield string
+
+    def load_history_strings(self):
+        self._ensure_loaded()
+        return reversed(self._recent)
+
+    def get_strings(self):
+        self._ensure_loaded()
+        return list(self._recent)
+
+    def append_string(self, string):
+        self.store_string(string)
+
+    def store_string(self, string):
+        self._ensure_loaded()
+        string = string.replace("\n", " ")
+        if not string.strip():
+            return
+        if self._add(string):
+            bisect.insort(self._sorted, string)
+            self._trim()
+
+        if self._lines >= 2 * max(self.max_size, len(self._recent)):
+            self.compact()
+            return
+        dirname = os.path.dirname(self.filename)
+        if dirname and not os.path.exists(dirname):
+            os.makedirs(dirname)
+        with open(self.filename, "a", encoding="utf-8") as f:
+            f.write(string + "\n")
+        self._lines += 1
+
+    def suggest(self, prefix):
+        """the most recent entry starting with prefix
+
+        :param prefix: typed text
+        :return: entry, or None
+        """
+        self._ensure_loaded()
+        lo = bisect.bisect_left(self._sorted, prefix)
+        hi = bisect.bisect_left(self._sorted, prefix + "\U0010ffff", lo)
+        if lo == hi:
+            return None
+        # k matches of n entries: compare the k, or scan about n / k recent
+        # entries to meet one of them, whichever is fewer
+        matches = hi - lo
+        if matches * matches <= len(self._sorted):
+            return max(self._sorted[lo:hi], key=self._recent.__getitem__)
+        for string in reversed(self._recent):
+            if string.startswith(prefix):
+                return string
+        return None
+
+
+class HistoryAutoSuggest(AutoSuggest):
+    """suggest the most recent command in history starting with the typed text
+    """
+
+    def get_suggestion(self, buffer, document):
+        history = buffer.history
+        text = document.text.rsplit("\n", 1)[-1]
+        if not text.strip() or not isinstance(history, CommandHistory):
+            return None
+        string = history.suggest(text)
+        if string is None or string == text:
+            return None
+        return Suggestion(string[len(text):])
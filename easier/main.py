@@ -1,10 +1,23 @@
 # -*- coding: utf-8 -*-
+import io
+import os
+import sys
+import json
+import argparse
+import tempfile
 import tableprint
 
+from contextlib import contextmanager
+from prompt_toolkit.application.current import create_app_session
+from prompt_toolkit.output.plain_text import PlainTextOutput
+
 from .context import Context
 from .completer import CommandCompleter
 from .util import parse_command
 from .topic import check_schema_migration
+from .db import apply_storage_profile
+from .cache import sweep_hibernated
+from .stats import command_stats
 
 
 def process_input(context):
@@ -26,24 +39,173 @@ def process_input(context):
                                complete_in_thread=True).strip()
     context.input_over()
 
-    parsed = parse_command(inp)
-    if parsed:
-        cmd, val = parsed["cmd"].strip(), (parsed["content"] or "").strip()
-        topic.execute_command(cmd, val)
+    run_command(context, inp)
     return topic
 
 
-def main():
+def run_command(context, inp):
+    """run one command line in the current topic, no prompt session needed
 
-    check_schema_migration()
-    tableprint.banner("Easier Life! Easier Work!")
-    context = Context()
+    :param context: context
+    :param inp: command line, eg: "list_bullet"
+    :return: True if the command succeeded
+    """
+    parsed = parse_command(inp)
+    if not parsed:
+        return True
+    cmd, val = parsed["cmd"].strip(), (parsed["content"] or "").strip()
+    return context.current.execute_command(cmd, val)
+
+
+def iter_commands(lines):
+    """command lines of a script, one command per line, blank lines and `#`
+        comments are skipped. `;` is a part of the command, such as bullet
+        content.
+    """
+    for line in lines:
+        inp = line.strip()
+        if inp and not inp.startswith("#"):
+            yield inp
+
+
+def split_commands(text):
+    """commands of `-c`, separated by `;` or new lines
+    """
+    return text.replace("\n", ";").split(";")
+
+
+class _Capture(object):
+    """capture everything written to stdout by one command, at fd level,
+        because tableprint holds its own reference of `sys.stdout`.
+    """
+
+    def __init__(self):
+        self.buffer = tempfile.TemporaryFile()
+        self.saved = None
+
+    @contextmanager
+    def __call__(self):
+        sys.stdout.flush()
+        self.saved = os.dup(1)
+        os.dup2(self.buffer.fileno(), 1)
+        try:
+            yield
+        finally:
+            sys.stdout.flush()
+            os.dup2(self.saved, 1)
+            os.close(self.saved)
+
+    def pop(self):
+        self.buffer.seek(0)
+        text = self.buffer.read().decode("utf-8", "replace").replace("\r\n", "\n")
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return text
+
+
+def run_script(context, lines, as_json=False):
+    """run commands without prompt session
 
-    while True:
+    :param context: context
+    :param lines: iterable of command lines
+    :param as_json: print one json object per command,
+        `{"command": ..., "ok": ..., "output": ...}`
+    :return: exit status, 0 if all commands succeeded, else 1
+    """
+    status = 0
+    capture = _Capture() if as_json else None
+    for inp in iter_commands(lines):
+        stop = False
         try:
-            process_input(context)
-        except KeyboardInterrupt:
-            continue
+            if capture:
+                with capture():
+                    ok = run_command(context, inp)
+            else:
+                ok = run_command(context, inp)
         except EOFError:
+            ok, stop = True, True
+        except Exception as e:
+            ok = False
+            sys.stderr.write("{}: {}\n".format(inp, e))
+        if not ok:
+            status = 1
+        if capture:
+            record = {"command": inp, "ok": ok, "output": capture.pop()}
+            sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+        if stop:
             break
-    print('GoodBye!')
+    sys.stdout.flush()
+    return status
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="easier", description="make work easier, make life easier")
+    parser.add_argument("-c", dest="commands",
+                        help='run commands separated by ";", eg: -c "select_topic bujo; list_bullet"')
+    parser.add_argument("-f", dest="file", help='run commands from a utf-8 file, one per line, "-" for stdin')
+    parser.add_argument("--json", action="store_true", help="print one json line per command")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="save wall time, cpu time, sql and network calls of every command to a json file")
+    return parser.parse_args(argv)
+
+
+def save_trace(path, trace):
+    """
+    :param path: json file
+    :param trace: list of command dict, in the order they ran
+    """
+    with open(path, "w") as f:
+        json.dump({"commands": trace}, f, indent=1, ensure_ascii=False)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    apply_storage_profile()
+    check_schema_migration()
+
+    if args.trace:
+        command_stats.trace = []
+    try:
+        return run(args)
+    finally:
+        if args.trace:
+            save_trace(args.trace, command_stats.trace)
+            command_stats.trace = None
+
+
+def run(args):
+    """run commands of script, or the prompt loop if there is no script
+
+    :return: exit status
+    """
+    sweep_hibernated()
+    context = Context()
+    try:
+        if args.commands is not None or args.file or not sys.stdin.isatty():
+            if args.commands is not None:
+                lines = split_commands(args.commands)
+            elif args.file and args.file != "-":
+                with open(args.file, encoding="utf-8") as f:
+                    lines = f.readlines()
+            else:
+                lines = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8")
+            with create_app_session(output=PlainTextOutput(sys.stdout)):
+                return run_script(context, lines, as_json=args.json)
+
+        tableprint.banner("Easier Life! Easier Work!")
+        while True:
+            try:
+                process_input(context)
+            except KeyboardInterrupt:
+                continue
+            except EOFError:
+                break
+        print('GoodBye!')
+        return 0
+    finally:
+        context.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
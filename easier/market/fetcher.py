@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import time
+
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+def chunked(items, size):
+    """split list into chunks
+
+        chunked([1, 2, 3], 2)   # [[1, 2], [3]]
+    """
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def fixed_schedule(interval, clock=time.monotonic, sleep=time.sleep):
+    """yield on a fixed schedule, the time spent by the caller between two
+        ticks doesn't delay the next tick. ticks missed by a slow caller
+        are skipped rather than fired in a burst.
+
+            for tick in fixed_schedule(1):
+                refresh()
+
+    :param interval: seconds between two ticks
+    :param clock: monotonic clock
+    :param sleep: sleep function
+    :return: generator of tick time
+    """
+    next_tick = clock()
+    while True:
+        yield next_tick
+        next_tick += interval
+        now = clock()
+        if next_tick < now:
+            next_tick += ((now - next_tick) // interval + 1) * interval
+        sleep(next_tick - now)
+
+
+class QuotationFetcher(object):
+    """fetch quotations of many codes, codes are split into chunks and the
+        chunks are fetched in parallel on a bounded thread pool.
+
+        fetcher = QuotationFetcher(tushare.get_realtime_quotes)
+        df = fetcher.fetch(codes)
+        fetcher.close()
+
+        a chunk which doesn't finish in `timeout` is left out of the result,
+        and it isn't requested again until the running request finishes, so
+        a hanging upstream can't fill up the pool.
+    """
+
+    def __init__(self, fetch, chunk_size=50, max_workers=8, timeout=3.0):
+        """
+        :param fetch: function, accept list of codes and return DataFrame
+        :param chunk_size: max codes of one request
+        :param max_workers: max parallel requests
+        :param timeout: seconds to wait for one round of requests
+        """
+        self._fetch = fetch
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        # chunk -> future of running request
+        self._running = {}
+
+    def _submit(self, chunk):
+        key = tuple(chunk)
+        future = self._running.get(key)
+        if future is not None and not future.done():
+            return future
+        future = self._executor.submit(self._fetch, chunk)
+        self._running[key] = future
+        return future
+
+    def fetch(self, codes):
+        """fetch quotations and merge them into one frame, keep the order of
+            chunks.
+
+        :param codes: list of code
+        :return: DataFrame, or None if all requests fail
+        """
+        import pandas as pd
+
+        chunks = chunked(list(codes), self.chunk_size)
+        if not chunks:
+            return None
+        futures = [self._submit(chunk) for chunk in chunks]
+        wait(futures, timeout=self.timeout)
+
+        frames = []
+        for future in futures:
+            if not future.done() or future.exception() is not None:
+                continue
+            frame = future.result()
+            if frame is not None and len(frame):
+                frames.append(frame)
+
+        self._running = {key: future for key, future in self._running.items() if not future.done()}
+        if not frames:
+            return None
+        return pd.concat(frames, ignore_index=True)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self._running = {}
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+
+from ..util import CurseHelper
+
+PRICE_FIELDS = ["open", "price", "low", "high", "pre_close"]
+
+
+def to_float_prices(df):
+    """convert price columns of realtime quotation from string to float
+
+    :param df: DataFrame of `tushare.get_realtime_quotes`
+    :return: DataFrame
+    """
+    df = df.reset_index(drop=True)
+    df[PRICE_FIELDS] = df[PRICE_FIELDS].astype("float64").round(2)
+    return df
+
+
+def prepare_quotation(df):
+    """compute change ratio, color and percentage text of each stock column
+        by column, and sort stocks by ratio descending.
+
+            code   price  pre_close  ratio   color  percentage
+            601318 10.5   10.0       0.05    RED    +5.00%
+
+    :param df: DataFrame with float `price` and `pre_close` columns
+    :return: new DataFrame with `ratio`, `color` and `percentage` columns
+    """
+    price = df["price"].to_numpy(dtype="float64")
+    pre_close = df["pre_close"].to_numpy(dtype="float64")
+    diff = price - pre_close
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(pre_close != 0, diff / pre_close, 0.0)
+
+    color = np.select([diff > 0, diff < 0], [CurseHelper.RED, CurseHelper.GREEN], CurseHelper.YELLOW)
+    sign = np.where(diff > 0, "+", "")
+    percentage = np.char.add(sign, np.char.mod("%.2f%%", ratio * 100))
+
+    order = np.argsort(-ratio, kind="mergesort")
+    result = df.iloc[order].reset_index(drop=True)
+    result["ratio"] = ratio[order]
+    result["color"] = color[order]
+    result["percentage"] = percentage[order]
+    return result
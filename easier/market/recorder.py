@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+import threading
+
+from datetime import datetime as dte
+from queue import Queue, Empty, Full
+
+import numpy as np
+import pandas as pd
+
+from ..db import STORAGE_DIR
+
+TICK_DIR = os.path.join(STORAGE_DIR, "ticks")
+
+# one record per polled quotation, fixed width so the files can be memory mapped
+TICK_FIELDS = ["price", "open", "high", "low", "pre_close", "volume", "amount"]
+TICK_DTYPE = np.dtype([("ts", "<f8")] + [(field, "<f8") for field in TICK_FIELDS])
+
+
+def tick_path(code, day, root=None):
+    """
+    :param code: stock code
+    :param day: string, such as 20190708
+    :param root: root directory of tick store
+    :return: file path
+    """
+    return os.path.join(root or TICK_DIR, day, "{}.bin".format(code))
+
+
+def to_ticks(df, ts):
+    """trans quotation snapshot to tick records, column by column
+
+    :param df: DataFrame of realtime quotation
+    :param ts: timestamp of the snapshot
+    :return: tuple, (codes, records)
+    """
+    records = np.empty(len(df), dtype=TICK_DTYPE)
+    records["ts"] = ts
+    for field in TICK_FIELDS:
+        if field in df:
+            records[field] = pd.to_numeric(df[field], errors="coerce").to_numpy(dtype="float64")
+        else:
+            records[field] = np.nan
+    return df["code"].to_numpy(dtype=str), records
+
+
+def read_ticks(code, day, start=None, end=None, root=None):
+    """read ticks of one stock in one day, the file is memory mapped, and the
+        time range is found by binary search.
+
+            ticks = read_ticks("601318", "20190708", start=ts0, end=ts1)
+            ticks["price"]
+
+    :param code: stock code
+    :param day: string, such as 20190708
+    :param start: min timestamp, include
+    :param end: max timestamp, exclude
+    :param root: root directory of tick store
+    :return: numpy structured array of `TICK_DTYPE`
+    """
+    path = tick_path(code, day, root)
+    if not os.path.exists(path) or os.path.getsize(path) < TICK_DTYPE.itemsize:
+        return np.empty(0, dtype=TICK_DTYPE)
+
+    # a record may be partially written by a running recorder, map the
+    # complete ones only
+    ticks = np.memmap(path, dtype=TICK_DTYPE, mode="r", shape=(os.path.getsize(path) // TICK_DTYPE.itemsize,))
+    lo = 0 if start is None else np.searchsorted(ticks["ts"], start, side="left")
+    hi = len(ticks) if end is None else np.searchsorted(ticks["ts"], end, side="left")
+    return ticks[lo:hi]
+
+
+def list_tick_days(root=None):
+    root = root or TICK_DIR
+    if not os.path.exists(root):
+        return []
+    return sorted(os.listdir(root))
+
+
+def list_tick_codes(day, root=None):
+    path = os.path.join(root or TICK_DIR, day)
+    if not os.path.exists(path):
+        return []
+    return sorted(os.path.splitext(name)[0] for name in os.listdir(path))
+
+
+class TickRecorder(object):
+    """append polled quotation snapshots to the per day, per stock tick files.
+
+        snapshots are queued and written by a background thread in batches,
+        so recording doesn't block rendering. the queue is bounded, when the
+        disk can't keep up, new snapshots are dropped instead of piling up in
+        memory.
+
+        recorder = TickRecorder()
+        recorder.record(quotation)
+        recorder.close()
+    """
+
+    def __init__(self, root=None, flush_interval=5.0, max_pending=64):
+        self.root = root or TICK_DIR
+        self.flush_interval = flush_interval
+        self.dropped = 0
+
+        self._queue = Queue(maxsize=max_pending)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="tick-recorder")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def record(self, df, ts=None):
+        """queue one snapshot
+
+        :param df: DataFrame of realtime quotation
+        :param ts: timestamp of the snapshot, default is now
+        :return: bool, False if the snapshot is dropped
+        """
+        if df is None or not len(df):
+            return True
+        ts = time.time() if ts is None else ts
+        try:
+            self._queue.put_nowait((ts, to_ticks(df, ts)))
+        except Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def _drain(self, timeout):
+        batch = []
+        deadline = time.time() + timeout
+        while not self._stopped.is_set() and time.time() < deadline:
+            try:
+                batch.append(self._queue.get(timeout=max(min(deadline - time.time(), 0.2), 0)))
+            except Empty:
+                continue
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self.write(self._drain(self.flush_interval))
+        self.write(self._drain(0))
+
+    def write(self, batch):
+        """write a batch of snapshots, grouped by day and stock, one append
+            per file.
+
+        :param batch: list of (ts, (codes, records))
+        """
+        days = {}
+        for ts, (codes, records) in batch:
+            day = dte.fromtimestamp(ts).strftime("%Y%m%d")
+            days.setdefault(day, []).append((codes, records))
+
+        for day, snapshots in days.items():
+            codes = np.concatenate([codes for codes, _ in snapshots])
+            records = np.concatenate([records for _, records in snapshots])
+            order = np.argsort(codes, kind="mergesort")
+            codes, records = codes[order], records[order]
+            uniques, starts = np.unique(codes, return_index=True)
+            ends = list(starts[1:]) + [len(codes)]
+
+            dirname = os.path.join(self.root, day)
+            if not os.path.exists(dirname):
+                os.makedirs(dirname)
+            for code, start, end in zip(uniques, starts, ends):
+                with open(tick_path(code, day, self.root), "ab") as f:
+                    f.write(records[start:end].tobytes())
+
+    def close(self):
+        """flush queued snapshots and stop the writer thread
+        """
+        self._stopped.set()
+        self._thread.join()
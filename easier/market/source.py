@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+import time
+import threading
+
+import numpy as np
+import pandas as pd
+
+from abc import ABCMeta, abstractmethod
+from datetime import datetime as dte
+
+from .recorder import TICK_FIELDS, read_ticks, list_tick_codes
+from ..stats import network_calls
+
+QUOTE_COLUMNS = ["code", "name"] + TICK_FIELDS + ["date", "time"]
+
+# characters of synthetic stock names
+SYNTHETIC_HANZI = "中国平安银行科技电子能源医药股份建设招商证券万科华夏光大东方"
+
+
+class QuotationSource(metaclass=ABCMeta):
+    """data source of `Stock` topic, the frames are in the format of tushare:
+
+        get_stock_basics()          DataFrame with `code`, `name` columns
+        get_realtime_quotes(codes)  DataFrame with `QUOTE_COLUMNS`
+    """
+
+    name = None
+    # whether the basics table should be cached on local disk
+    cache_basics = False
+
+    @abstractmethod
+    def get_stock_basics(self):
+        """
+        :return: DataFrame with `code`, `name` columns
+        """
+
+    @abstractmethod
+    def get_realtime_quotes(self, codes):
+        """
+        :param codes: list of stock code
+        :return: DataFrame with `QUOTE_COLUMNS`
+        """
+
+
+class TushareSource(QuotationSource):
+
+    name = "tushare"
+    cache_basics = True
+
+    def get_stock_basics(self):
+        import tushare
+
+        network_calls.incr()
+        basis = tushare.get_stock_basics()
+        if basis is None:
+            return None
+        return basis.reset_index()
+
+    def get_realtime_quotes(self, codes):
+        import tushare
+
+        network_calls.incr()
+        return tushare.get_realtime_quotes(codes)
+
+
+def _quote_frame(codes, names, prices, ts):
+    """build realtime quotation frame
+
+    :param codes: list of code
+    :param names: list of name
+    :param prices: dict, field -> numpy array
+    :param ts: timestamp of quotation
+    :return: DataFrame
+    """
+    now = dte.fromtimestamp(ts)
+    data = {"code": codes, "name": names}
+    data.update(prices)
+    data["date"] = [now.strftime("%Y-%m-%d")] * len(codes)
+    data["time"] = [now.strftime("%H:%M:%S")] * len(codes)
+    return pd.DataFrame(data, columns=QUOTE_COLUMNS)
+
+
+class SyntheticSource(QuotationSource):
+    """random walk quotations, for load testing without network.
+
+        every simulated second, each price moves by a normal distributed
+        return, and it's limited in ±10% of pre close as A-share market.
+
+        SyntheticSource(size=5000, speed=10)     # 5000 stocks, 10x market speed
+        SyntheticSource(basics=frame)           # the given stocks
+    """
+
+    name = "synthetic"
+
+    def __init__(self, size=1000, basics=None, seed=0, volatility=0.001, speed=1.0, clock=time.time):
+        self.speed = speed
+        self.volatility = volatility
+        self._clock = clock
+        self._random = np.random.RandomState(seed)
+        self._basics = basics if basics is not None else self._make_basics(size)
+
+        codes = self._basics["code"].tolist()
+        self._positions = {code: idx for idx, code in enumerate(codes)}
+        self._pre_close = np.round(self._random.uniform(2, 200, len(codes)), 2)
+        self._open = np.round(self._pre_close * self._random.uniform(0.98, 1.02, len(codes)), 2)
+        self._price = self._open.copy()
+        self._high = self._open.copy()
+        self._low = self._open.copy()
+        self._volume = np.zeros(len(codes))
+        self._amount = np.zeros(len(codes))
+        self._started = self._last = clock()
+        # quotes of chunks are fetched in parallel
+        self._lock = threading.Lock()
+
+    def _make_basics(self, size):
+        codes = ["{:06d}".format(600000 + idx) for idx in range(size)]
+        chars = self._random.randint(0, len(SYNTHETIC_HANZI), size=(size, 4))
+        names = ["".join(SYNTHETIC_HANZI[c] for c in row) for row in chars]
+        return pd.DataFrame({"code": codes, "name": names})
+
+    def get_stock_basics(self):
+        return self._basics.copy()
+
+    def _walk(self):
+        now = self._clock()
+        steps = int((now - self._last) * self.speed)
+        if steps <= 0:
+            return
+        self._last += steps / self.speed
+
+        returns = self._random.normal(0, self.volatility * np.sqrt(steps), len(self._price))
+        limit_up, limit_down = self._pre_close * 1.1, self._pre_close * 0.9
+        self._price = np.round(np.clip(self._price * np.exp(returns), limit_down, limit_up), 2)
+        self._high = np.maximum(self._high, self._price)
+        self._low = np.minimum(self._low, self._price)
+        volume = self._random.poisson(100 * steps, len(self._price)) * 100
+        self._volume += volume
+        self._amount += volume * self._price
+
+    def get_realtime_quotes(self, codes):
+        with self._lock:
+            self._walk()
+        idx = [self._positions[code] for code in codes if code in self._positions]
+        if not idx:
+            return None
+        prices = {
+            "price": self._price[idx], "open": self._open[idx],
+            "high": self._high[idx], "low": self._low[idx],
+            "pre_close": self._pre_close[idx],
+            "volume": self._volume[idx], "amount": self._amount[idx],
+        }
+        simulated = self._started + (self._last - self._started) * self.speed
+        return _quote_frame(self._basics["code"].values[idx], self._basics["name"].values[idx], prices, simulated)
+
+
+class ReplaySource(QuotationSource):
+    """play back the ticks recorded by `TickRecorder`, at real or accelerated
+        speed. the replay starts from the first tick of the day when the
+        source is created.
+
+        ReplaySource("20190708", speed=10)
+    """
+
+    name = "replay"
+
+    def __init__(self, day, speed=1.0, basics=None, root=None, clock=time.time):
+        self.day = day
+        self.speed = speed
+        self.root = root
+        self._clock = clock
+        self._ticks = {code: read_ticks(code, day, root=root) for code in list_tick_codes(day, root)}
+
+        if basics is None:
+            codes = sorted(self._ticks)
+            basics = pd.DataFrame({"code": codes, "name": codes})
+        self._basics = basics
+        self._names = dict(zip(basics["code"], basics["name"]))
+
+        starts = [ticks["ts"][0] for ticks in self._ticks.values() if len(ticks)]
+        self._first = min(starts) if starts else 0
+        self._started = clock()
+
+    def get_stock_basics(self):
+        return self._basics.copy()
+
+    def replay_time(self):
+        """the recorded time which is being played
+        """
+        return self._first + (self._clock() - self._started) * self.speed
+
+    def get_realtime_quotes(self, codes):
+        ts = self.replay_time()
+        found, rows = [], []
+        for code in codes:
+            ticks = self._ticks.get(code)
+            if ticks is None or not len(ticks):
+                continue
+            pos = np.searchsorted(ticks["ts"], ts, side="right") - 1
+            if pos < 0:
+                continue
+            found.append(code)
+            rows.append(ticks[pos])
+        if not rows:
+            return None
+
+        rows = np.array(rows)
+        prices = {field: rows[field] for field in TICK_FIELDS}
+        return _quote_frame(found, [self._names.get(code, code) for code in found], prices, ts)
+
+
+def create_source(spec):
+    """create data source from spec string
+
+        tushare
+        synthetic[:size[:speed]]
+        replay:day[:speed]
+
+    :param spec: string
+    :return: QuotationSource
+    """
+    parts = (spec or "tushare").split(":")
+    name, args = parts[0], parts[1:]
+    if name == "tushare":
+        return TushareSource()
+    if name == "synthetic":
+        size = int(args[0]) if args else 1000
+        speed = float(args[1]) if len(args) > 1 else 1.0
+        return SyntheticSource(size=size, speed=speed)
+    if name == "replay" and args:
+        speed = float(args[1]) if len(args) > 1 else 1.0
+        return ReplaySource(args[0], speed=speed)
+    raise ValueError("unknown quotation source: {}".format(spec))
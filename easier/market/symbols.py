@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+import re
+
+from bisect import bisect_left
+from ..util import quanjiao2banjiao
+
+# market index name to tushare index code
+INDEX_SYMBOLS = {
+    "上证指数": "sh",
+    "深圳成指": "sz",
+    "沪深300指数": "hs300",
+    "上证50": "sz50",
+    "中小板": "zxb",
+    "创业板": "cyb"
+}
+
+_non_alnum = re.compile(r"[^0-9a-z]")
+
+
+def symbol_key(symbol):
+    """the lookup key of a symbol, half width and lower case
+
+    :param symbol: code, name or pinyin initials
+    :return: string
+    """
+    return quanjiao2banjiao(symbol).strip().lower()
+
+
+def pinyin_initials(name):
+    """pinyin initials of stock name, such as:
+            pinyin_initials("中国平安")   # zgpa
+            pinyin_initials("*ST信通")    # stxt
+
+    :param name: stock name
+    :return: string
+    """
+    from pypinyin import lazy_pinyin, Style
+
+    initials = "".join(lazy_pinyin(symbol_key(name), style=Style.FIRST_LETTER))
+    return _non_alnum.sub("", initials.lower())
+
+
+def add_pinyin_column(basis):
+    """add `pinyin` column to stock basis table, it's slow, so do it once
+        before the table is cached.
+
+    :param basis: DataFrame with `name` column
+    :return: DataFrame
+    """
+    basis["pinyin"] = [pinyin_initials(name) for name in basis["name"]]
+    return basis
+
+
+class SymbolIndex(object):
+    """hash index from stock identifier to stock code, build it once per
+        stock basis table, and every lookup is O(1).
+
+        identifier can be:
+            code            601318
+            name            中国平安, full width and half width are the same
+            pinyin initials zgpa
+            index name      上证指数
+    """
+
+    def __init__(self, codes, names, initials=None):
+        # code or name -> code
+        self.exact = {}
+        # pinyin initials -> codes, initials is not unique
+        self.initials = {}
+
+        for code, name in zip(codes, names):
+            self.exact[code] = code
+            self.exact.setdefault(symbol_key(name), code)
+
+        for code, initial in zip(codes, initials or []):
+            if initial:
+                self.initials.setdefault(initial, []).append(code)
+
+        for name, code in INDEX_SYMBOLS.items():
+            self.exact[name] = code
+            self.exact[code] = code
+
+    @classmethod
+    def from_frame(cls, basis):
+        """build index from stock basis table
+
+        :param basis: DataFrame with `code`, `name` and optional `pinyin` columns
+        :return: SymbolIndex
+        """
+        codes = basis["code"].tolist()
+        names = basis["name"].tolist()
+        if "pinyin" in basis:
+            initials = basis["pinyin"].tolist()
+        else:
+            initials = [pinyin_initials(name) for name in names]
+        return cls(codes, names, initials)
+
+    def resolve(self, symbol):
+        """return all codes of symbol
+
+        :param symbol: code, name, pinyin initials or index name
+        :return: list of code
+        """
+        if symbol in self.exact:
+            return [self.exact[symbol]]
+        key = symbol_key(symbol)
+        if key in self.exact:
+            return [self.exact[key]]
+        return list(self.initials.get(key, ()))
+
+    def normalize(self, stocks):
+        """resolve symbols to codes, keep the input order and without duplicate
+
+        :param stocks: string of symbol or list of symbols
+        :return: list of code
+        """
+        if isinstance(stocks, str):
+            stocks = [stocks]
+
+        codes = []
+        seen = set()
+        for symbol in stocks:
+            for code in self.resolve(symbol):
+                if code in seen:
+                    continue
+                seen.add(code)
+                codes.append(code)
+        return codes
+
+
+class SymbolCompleter(object):
+    """prefix completion of stock symbols, backed by sorted arrays of codes,
+        pinyin initials and names. finding the matched range is a binary
+        search, so every completion costs O(log n + limit).
+
+        completer = SymbolCompleter.from_frame(basis)
+        completer.complete("zg")    # [("601318", "中国平安"), ...]
+    """
+
+    def __init__(self, codes, names, initials=None):
+        self.names = dict(zip(codes, names))
+
+        # ranked by match quality: code, pinyin initials, name
+        self._kinds = []
+        for keys in (codes, initials or [], [symbol_key(name) for name in names]):
+            pairs = sorted(zip(keys, codes))
+            self._kinds.append(([key for key, _ in pairs], [code for _, code in pairs]))
+
+    @classmethod
+    def from_frame(cls, basis):
+        """build completer from stock basis table
+
+        :param basis: DataFrame with `code`, `name` and optional `pinyin` columns
+        :return: SymbolCompleter
+        """
+        codes = basis["code"].tolist()
+        names = basis["name"].tolist()
+        if "pinyin" in basis:
+            initials = basis["pinyin"].tolist()
+        else:
+            initials = [pinyin_initials(name) for name in names]
+        return cls(codes, names, initials)
+
+    def complete(self, prefix, limit=10):
+        """top matched stocks of prefix, exact matches rank first, then code,
+            pinyin initials and name prefix matches.
+
+        :param prefix: the typing symbol
+        :param limit: max size of result
+        :return: list of (code, name)
+        """
+        prefix = symbol_key(prefix)
+        if not prefix:
+            return []
+
+        ranges = []
+        for keys, codes in self._kinds:
+            start = bisect_left(keys, prefix)
+            ranges.append((keys, codes, start))
+
+        matched = []
+        for keys, codes, start in ranges:
+            idx = start
+            while idx < len(keys) and keys[idx] == prefix:
+                matched.append(codes[idx])
+                idx += 1
+
+        for keys, codes, start in ranges:
+            idx = start
+            while idx < len(keys) and len(matched) < limit * 3 and keys[idx].startswith(prefix):
+                matched.append(codes[idx])
+                idx += 1
+
+        result = []
+        seen = set()
+        for code in matched:
+            if code in seen:
+                continue
+            seen.add(code)
+            result.append((code, self.names[code]))
+            if len(result) >= limit:
+                break
+        return result
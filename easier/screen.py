@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import curses
+
+from .util import common_ljust
+
+
+class GridRenderer(object):
+    """draw a table of fixed width cells on a curses window, and only redraw
+        the cells whose text or color changed since last frame.
+
+        renderer = GridRenderer(scr, widths=[12, 12])
+        renderer.set_header(["code", "name"], color=CurseHelper.CYAN)
+        renderer.render([("601318", "中国平安")], colors=[(0, CurseHelper.RED)])
+
+        rows are identified by their first cell. when one row moves up or
+        down across other rows, such as re-sorted by price, the lines between
+        are shifted by `deleteln` and `insertln` rather than redrawn, and with
+        `idlok` ncurses scrolls them on the terminal instead of rewriting
+        them. other changes are redrawn cell by cell.
+    """
+
+    # shift lines only when a row moves across more lines than this
+    min_shift = 2
+
+    # max size of formatted text cache
+    cache_size = 100000
+
+    def __init__(self, scr, widths):
+        self.scr = scr
+        self.widths = list(widths)
+        self.offsets = [sum(self.widths[:i]) for i in range(len(self.widths))]
+        self.header = None
+
+        # last frame, line number -> (values, colors)
+        self._lines = {}
+        # (value, width) -> formatted text
+        self._texts = {}
+        self._size = self.scr.getmaxyx()
+
+        self.scr.idlok(True)
+
+    def set_header(self, titles, color=0):
+        self.header = (tuple(titles), (color,) * len(titles))
+
+    def _format(self, value, width):
+        key = (value, width)
+        text = self._texts.get(key)
+        if text is None:
+            if len(self._texts) >= self.cache_size:
+                self._texts.clear()
+            text = common_ljust(value, width)
+            self._texts[key] = text
+        return text
+
+    def _terminal_size(self):
+        try:
+            cols, lines = os.get_terminal_size(sys.__stdout__.fileno())
+        except (OSError, AttributeError, ValueError):
+            return self.scr.getmaxyx()
+        return lines, cols
+
+    def check_resize(self):
+        """resize curses screen if terminal size changed, and forget last
+            frame so that the next frame is fully redrawn.
+
+        :return: bool, resized or not
+        """
+        size = self._terminal_size()
+        if size == self._size:
+            return False
+        if hasattr(curses, "resizeterm"):
+            curses.resizeterm(*size)
+        self.scr.clear()
+        self._lines = {}
+        self._size = self.scr.getmaxyx()
+        return True
+
+    def _addstr(self, y, x, text, color):
+        lines, cols = self._size
+        if y >= lines or x >= cols:
+            return
+        try:
+            self.scr.addstr(y, x, text[:cols - x], curses.color_pair(color) if color else 0)
+        except curses.error:        # writing the bottom right corner
+            pass
+
+    def _draw_line(self, y, values, colors):
+        old = self._lines.get(y)
+        if old is not None and old[0] == values and old[1] == colors:
+            return
+        for idx, (value, color, width) in enumerate(zip(values, colors, self.widths)):
+            if old is not None and idx < len(old[0]) and old[0][idx] == value and old[1][idx] == color:
+                continue
+            self._addstr(y, self.offsets[idx], self._format(value, width), color)
+        self._lines[y] = (values, colors)
+
+    def _key(self, line):
+        return line[0][0] if line is not None and line[0] else None
+
+    def _shift_lines(self, lines):
+        """shift the lines on screen and in last frame, if one row moved
+            across others
+
+        :param lines: list of (values, colors) of this frame, visible ones
+        :return: bool, shifted or not
+        """
+        old = [self._key(self._lines.get(y)) for y in range(len(lines))]
+        new = [self._key(line) for line in lines]
+        changed = [y for y in range(len(lines)) if old[y] != new[y]]
+        if not changed:
+            return False
+        lo, hi = changed[0], changed[-1]
+        if hi - lo < self.min_shift:
+            return False
+
+        if new[lo] == old[hi] and new[lo + 1:hi + 1] == old[lo:hi]:
+            # moved up, the lines between go down by one
+            removed, inserted, step = hi, lo, 1
+        elif new[hi] == old[lo] and new[lo:hi] == old[lo + 1:hi + 1]:
+            # moved down, the lines between go up by one
+            removed, inserted, step = lo, hi, -1
+        else:
+            return False
+
+        self.scr.move(removed, 0)
+        self.scr.deleteln()
+        self.scr.move(inserted, 0)
+        self.scr.insertln()
+        if step > 0:
+            for y in range(hi, lo, -1):
+                self._lines[y] = self._lines[y - 1]
+        else:
+            for y in range(lo, hi):
+                self._lines[y] = self._lines[y + 1]
+        # a blank line
+        self._lines[inserted] = ((), ())
+        return True
+
+    def _clear_line(self, y):
+        if y >= self._size[0]:
+            return
+        self.scr.move(y, 0)
+        self.scr.clrtoeol()
+
+    def render(self, rows, colors=None):
+        """draw one frame
+
+        :param rows: list of tuple of cell value
+        :param colors: list of tuple of cell color, default is no color
+        """
+        self.check_resize()
+        if colors is None:
+            colors = [(0,) * len(self.widths)] * len(rows)
+
+        lines = list(zip(rows, colors))
+        if self.header:
+            lines.insert(0, self.header)
+
+        visible = min(len(lines), self._size[0])
+        self._shift_lines([(tuple(values), tuple(line_colors)) for values, line_colors in lines[:visible]])
+        for y in range(visible):
+            values, line_colors = lines[y]
+            self._draw_line(y, tuple(values), tuple(line_colors))
+
+        # rows of last frame which are out of this frame
+        for y in [y for y in self._lines if y >= visible]:
+            self._clear_line(y)
+            del self._lines[y]
+
+        self.scr.refresh()
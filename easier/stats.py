@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+import math
+import time
+import threading
+
+# relative error of histogram buckets
+BUCKET_GROWTH = 1.05
+# values below it share the first bucket, seconds
+MIN_VALUE = 1e-6
+
+# bucket of value is int(log(value) * _SCALE - _OFFSET)
+_SCALE = 1 / math.log(BUCKET_GROWTH)
+_OFFSET = math.log(MIN_VALUE) * _SCALE
+_log = math.log
+_perf_counter = time.perf_counter
+_process_time = time.process_time
+
+
+class Counter(object):
+    """thread safe counter, such as sql statements executed
+
+        queries = Counter()
+        queries.incr()
+        queries.value
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def incr(self, n=1):
+        with self._lock:
+            self.value += n
+
+
+# statements executed by `easier.db.database`
+sql_queries = Counter()
+# requests sent to remote data sources
+network_calls = Counter()
+
+
+class Histogram(object):
+    """histogram of log scaled buckets, every bucket is `BUCKET_GROWTH` times
+        of the previous one, so a percentile is within 5% of the real value
+        while memory is constant.
+
+        hist = Histogram()
+        hist.add(0.012)
+        hist.percentile(99)
+    """
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        idx = int(_log(value) * _SCALE - _OFFSET) if value > MIN_VALUE else 0
+        buckets = self.buckets
+        buckets[idx] = buckets.get(idx, 0) + 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, p):
+        """
+        :param p: 0 ~ 100
+        :return: upper bound of the bucket, not bigger than max
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, int(math.ceil(self.count * p / 100.0)))
+        seen = 0
+        for idx in sorted(self.buckets):
+            seen += self.buckets[idx]
+            if seen >= rank:
+                return min(MIN_VALUE * BUCKET_GROWTH ** (idx + 1), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+
+class CommandRecord(object):
+    """latency of one command of a topic
+    """
+
+    def __init__(self):
+        self.wall = Histogram()
+        self.cpu = Histogram()
+        self.sql = 0
+        self.network = 0
+        self.failed = 0
+
+    @property
+    def count(self):
+        return self.wall.count
+
+
+class CommandStats(object):
+    """wall time, cpu time, sql statements and network calls of every command
+
+        mark = command_stats.start()
+        ...
+        command_stats.stop("bujo", "list_bullet", mark, ok=True)
+
+    set `trace` to a list to keep every command as a dict, in order.
+    """
+
+    def __init__(self):
+        # (topic, command) -> CommandRecord
+        self.records = {}
+        self.trace = None
+
+    def start(self):
+        return _perf_counter(), _process_time(), sql_queries.value, network_calls.value
+
+    def stop(self, topic, cmd, mark, ok=True):
+        wall = _perf_counter() - mark[0]
+        cpu = _process_time() - mark[1]
+        sql = sql_queries.value - mark[2]
+        network = network_calls.value - mark[3]
+
+        key = (topic, cmd)
+        record = self.records.get(key)
+        if record is None:
+            record = self.records[key] = CommandRecord()
+        record.wall.add(wall)
+        record.cpu.add(cpu)
+        record.sql += sql
+        record.network += network
+        if not ok:
+            record.failed += 1
+
+        if self.trace is not None:
+            self.trace.append({
+                "topic": topic,
+                "command": cmd,
+                "start": time.time() - wall,
+                "wall": wall,
+                "cpu": cpu,
+                "sql": sql,
+                "network": network,
+                "ok": ok,
+            })
+
+    def clear(self):
+        self.records = {}
+
+
+command_stats = CommandStats()
@@ -1,22 +1,56 @@
 # -*- coding: utf-8 -*-
 import os
-import importlib
+import ast
 
-from .core import (Topic, TopicMeta, DefaultTopic)
+from .core import (Topic, TopicMeta, TopicSpec, DefaultTopic)
 from ..db import BaseModel
 
-__all__ = (Topic, TopicMeta, DefaultTopic)
+__all__ = (Topic, TopicMeta, TopicSpec, DefaultTopic)
+
+
+def scan_topic_classes(filename):
+    """find topic classes in a python source file without importing it.
+
+        a topic class is a class whose body assign a literal string to `_name`,
+        `_description` is optional.
+
+    :param filename: python source file
+    :return: generator of (name, description)
+    """
+    with open(filename, "rb") as f:
+        tree = ast.parse(f.read(), filename)
+
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        attrs = {}
+        for stmt in node.body:
+            if not isinstance(stmt, ast.Assign) or len(stmt.targets) != 1:
+                continue
+            target = stmt.targets[0]
+            if not isinstance(target, ast.Name) or target.id not in ("_name", "_description"):
+                continue
+            try:
+                attrs[target.id] = ast.literal_eval(stmt.value)
+            except ValueError:
+                continue
+        if isinstance(attrs.get("_name"), str) and attrs["_name"]:
+            yield attrs["_name"], attrs.get("_description", "")
 
 
 def load_topic_module():
+    """register every topic under this package, the modules are imported
+        lazily by `TopicMeta.get_topic_class`.
+    """
     cur_dir = os.path.dirname(os.path.abspath(__file__))
     for par, dirs, files in os.walk(cur_dir):
         for pyfile in files:
             if not pyfile.endswith(".py") or pyfile in ["__init__.py"]:
                 continue
             rel_name = os.path.relpath(os.path.join(par, pyfile), cur_dir)
-            module_name = "." + rel_name.rstrip(".py").replace(os.path.sep, ".")
-            importlib.import_module(module_name, package="easier.topic")
+            module_name = "easier.topic." + os.path.splitext(rel_name)[0].replace(os.path.sep, ".")
+            for name, description in scan_topic_classes(os.path.join(par, pyfile)):
+                TopicMeta.register_topic(TopicSpec(name, description, module_name))
 
 
 load_topic_module()
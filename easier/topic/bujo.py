@@ -1,10 +1,21 @@
 # -*- coding: utf-8 -*-
+import re
+import sys
+import csv
+import json
+import bisect
+import operator
+import threading
 import peewee as pw
+import tableprint
 
-from datetime import datetime as dte
+from functools import reduce
+from datetime import datetime as dte, timedelta
 from .core import Topic, entrypoint
-from ..db import BaseModel
+from ..util import parse_options, parse_ids, page_lines, ngram_tokens, ngram_match_query
+from ..db import BaseModel, database, migration, batch
 from prompt_toolkit import print_formatted_text, HTML
+from prompt_toolkit.completion import Completion
 
 BulletType = {
     "task": "•",
@@ -47,15 +58,34 @@ class Bullet(BaseModel):
         when `date_str` is blank or `date_str` is a future date (the value greater than today).
     """
 
-    date_str = pw.CharField(null=False, index=True, default="")
+    class Meta:
+        # match the access paths of `BujoTopic`, filter columns first and
+        # `create_date` last, so sqlite filters and sorts by index only
+        indexes = (
+            (("date_str", "create_date"), False),
+            (("parent", "create_date"), False),
+            (("bullet_type", "task_status", "parent", "create_date"), False),
+        )
+
+    date_str = pw.CharField(null=False, default="")
     content = pw.CharField(null=False)
-    bullet_type = pw.CharField(choices=list(zip(BulletType.keys(), BulletType.keys())), index=True)
-    task_status = pw.CharField(choices=list(zip(TaskStatus.keys(), TaskStatus.keys())), index=True, default="incomplete")
-    parent = pw.ForeignKeyField("self", related_name='children', null=True)
+    bullet_type = pw.CharField(choices=list(zip(BulletType.keys(), BulletType.keys())))
+    task_status = pw.CharField(choices=list(zip(TaskStatus.keys(), TaskStatus.keys())), default="incomplete")
+    parent = pw.ForeignKeyField("self", related_name='children', null=True, index=False)
     create_date = pw.DateTimeField(default=dte.now)
     update_date = pw.DateTimeField(default=dte.now)
 
-    def get_show_text(self, with_date=False, align=0):
+    def save(self, *args, **kwargs):
+        """save the bullet, and its tokens of full text index
+        """
+        with batch():
+            rows = super(Bullet, self).save(*args, **kwargs)
+            index_bullet(self.id, self.content)
+        return rows
+
+    def get_text(self, with_date=False, align=0):
+        """the line of bullet in plain text
+        """
         if self.bullet_type == "task":
             sign = TaskStatus.get(self.task_status)
         else:
@@ -73,20 +103,785 @@ class Bullet(BaseModel):
             "content": self.content.strip(),
             "id": self.id,
         }
-        line = HTML(txt.format(**params))
-        return line
+        return txt.format(**params)
+
+    def get_show_text(self, with_date=False, align=0):
+        return HTML(self.get_text(with_date=with_date, align=align))
+
+    def iter_lines(self, parent_depth=0, with_date=False):
+        """lines of the bullet and its descendants, in plain text
+        """
+        yield self.get_text(align=parent_depth, with_date=with_date)
+        for child in self.get_children():
+            for line in child.iter_lines(parent_depth=parent_depth + 1, with_date=with_date):
+                yield line
+
+    def get_children(self):
+        """children loaded by `load_trees`, or query them if not loaded
+        """
+        children = getattr(self, "_loaded_children", None)
+        if children is None:
+            return list(self.children)
+        return children
 
     def print_text(self, parent_depth=0, with_date=False):
         print_formatted_text(self.get_show_text(align=parent_depth, with_date=with_date))
-        for child in self.children:
+        for child in self.get_children():
             child.print_text(parent_depth=parent_depth + 1, with_date=with_date)
 
+    @classmethod
+    def descendants(cls, roots):
+        """query all descendants of roots by a recursive CTE
+
+        :param roots: query of root bullets
+        :return: query
+        """
+        base = cls.select(cls.id) \
+                  .where(cls.parent.in_(roots.select(cls.id))) \
+                  .cte("descendants", recursive=True)
+        child = cls.alias()
+        # UNION rather than UNION ALL, stop at a cycle of broken data
+        tree = base.union(child.select(child.id).join(base, on=(child.parent == base.c.id)))
+        return cls.select() \
+                  .join(tree, on=(cls.id == tree.c.id)) \
+                  .with_cte(tree) \
+                  .order_by(cls.id)
+
+    @classmethod
+    def load_trees(cls, roots):
+        """load roots and all their descendants, by two queries no matter how
+            many bullets or how deep they are. the children are attached in
+            memory, so `print_text` doesn't query any more.
+
+        :param roots: query of root bullets
+        :return: list of root bullets
+        """
+        bullets = list(roots)
+        if not bullets:
+            return bullets
+
+        descendants = list(cls.descendants(roots))
+
+        children = {}
+        for bullet in descendants:
+            children.setdefault(bullet.parent_id, []).append(bullet)
+        for bullet in bullets + descendants:
+            bullet._loaded_children = children.get(bullet.id, [])
+        return bullets
+
+    @classmethod
+    def history(cls, after=None, start=None, end=None, btype=None, status=None, limit=50):
+        """one page of root bullets, newest first. the page is located by the
+            `(create_date, id)` of the last bullet of previous page, instead of
+            offset, so every page costs the same.
+
+        :param after: (create_date, id) of the last bullet of previous page
+        :param start: min date_str, include
+        :param end: max date_str, include
+        :param btype: bullet type
+        :param status: task status
+        :param limit: page size
+        :return: query
+        """
+        parent = cls.parent
+        if end:
+            # a closed date range is found by the date index, `+` stops sqlite
+            # from walking the parent index back from the newest bullet
+            parent = pw.NodeList((pw.SQL("+"), cls.parent), glue="")
+        query = cls.select().where(parent.is_null())
+        if after is not None:
+            created, bullet_id = after
+            query = query.where(pw.Tuple(cls.create_date, cls.id) < pw.Tuple(cls.create_date.to_value(created), bullet_id))
+        for condition in cls.conditions(start=start, end=end, btype=btype, status=status):
+            query = query.where(condition)
+        return query.order_by(cls.create_date.desc(), cls.id.desc()).limit(limit)
+
+    @classmethod
+    def conditions(cls, ids=None, start=None, end=None, btype=None, status=None):
+        """where conditions of bullet filters
+
+        :param ids: list of (min id, max id), include
+        :param start: min date_str, include
+        :param end: max date_str, include
+        :param btype: bullet type
+        :param status: task status
+        :return: list of expression
+        """
+        conditions = []
+        if ids:
+            singles = [lo for lo, hi in ids if lo == hi]
+            ranges = [cls.id.between(lo, hi) for lo, hi in ids if lo != hi]
+            if singles:
+                ranges.append(cls.id.in_(singles))
+            conditions.append(reduce(operator.or_, ranges))
+        if start:
+            conditions.append(cls.date_str >= start)
+        if end:
+            conditions.append(cls.date_str <= end)
+        if btype:
+            conditions.append(cls.bullet_type == btype)
+        if status:
+            conditions.append(cls.task_status == status)
+        return conditions
+
+    @classmethod
+    def iter_history(cls, page_size=50, **filters):
+        """stream root bullets with their trees loaded, page by page, a page
+            is queried only when the previous one is consumed.
+
+            for bullet in Bullet.iter_history(btype="task", start="2019-07-01"):
+                bullet.print_text()
+
+        :param page_size: bullets per page
+        :param filters: the filters of `history`
+        :return: generator of bullet
+        """
+        after = None
+        while True:
+            page = cls.load_trees(cls.history(after=after, limit=page_size, **filters))
+            for bullet in page:
+                yield bullet
+            if len(page) < page_size:
+                return
+            after = (page[-1].create_date, page[-1].id)
+
+
+@migration("bujo_0001_composite_indexes")
+def migrate_composite_indexes():
+    """replace single column indexes of bullet by composite indexes
+    """
+    for name in ["bullet_date_str", "bullet_bullet_type", "bullet_task_status", "bullet_parent_id"]:
+        database.execute_sql('DROP INDEX IF EXISTS "{}"'.format(name))
+    Bullet._schema.create_indexes(safe=True)
+
+
+# tokens of full text index are made by python. this connection indexes the
+# bullets it writes, the triggers are plain sql, they only remove the tokens
+# of deleted or changed bullets, so any sqlite client can write bullets, and
+# `rebuild_fulltext` indexes the bullets written by others.
+database.register_function(ngram_tokens, "ngram_tokens", 1, deterministic=True)
+
+FULLTEXT_TABLE_SQL = "CREATE VIRTUAL TABLE IF NOT EXISTS bullet_fts USING fts5(tokens, tokenize='unicode61')"
+FULLTEXT_TRIGGERS = {
+    "bullet_fts_delete": "AFTER DELETE ON bullet BEGIN DELETE FROM bullet_fts WHERE rowid = old.id; END",
+    "bullet_fts_update": "AFTER UPDATE OF content ON bullet BEGIN DELETE FROM bullet_fts WHERE rowid = old.id; END",
+}
+
+
+def create_fulltext_triggers():
+    for name, sql in sorted(FULLTEXT_TRIGGERS.items()):
+        database.execute_sql("CREATE TRIGGER IF NOT EXISTS {} {}".format(name, sql))
+
+
+def index_bullet(bullet_id, content):
+    """add or replace the tokens of one bullet
+    """
+    database.execute_sql("INSERT OR REPLACE INTO bullet_fts (rowid, tokens) VALUES (?, ?)",
+                         (bullet_id, ngram_tokens(content)))
+
+
+def index_bullets_after(offset):
+    """index the bullets whose id is greater than offset, by one statement
+    """
+    database.execute_sql("INSERT OR REPLACE INTO bullet_fts (rowid, tokens) "
+                         "SELECT id, ngram_tokens(content) FROM bullet WHERE id > ?", (offset,))
+
+
+def rebuild_fulltext():
+    """index all bullets again
+    """
+    with batch():
+        database.execute_sql("DELETE FROM bullet_fts")
+        index_bullets_after(0)
+        database.execute_sql("INSERT INTO bullet_fts (bullet_fts) VALUES ('optimize')")
+
+
+@migration("bujo_0002_fulltext")
+def migrate_fulltext():
+    """full text index of bullet content
+    """
+    database.execute_sql(FULLTEXT_TABLE_SQL)
+    create_fulltext_triggers()
+    rebuild_fulltext()
+
+
+@migration("bujo_0004_fulltext_without_function")
+def migrate_fulltext_without_function():
+    """the full text index of early databases is contentless, kept by the
+        triggers calling `ngram_tokens`, other sqlite clients can't write
+        bullets without the function. build it again as `bujo_0002_fulltext`
+        does now.
+    """
+    row = database.execute_sql("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'bullet_fts_insert'") \
+                  .fetchone()
+    if row is None:
+        return
+    for name in ["bullet_fts_insert", "bullet_fts_delete", "bullet_fts_update"]:
+        database.execute_sql("DROP TRIGGER IF EXISTS {}".format(name))
+    database.execute_sql("DROP TABLE IF EXISTS bullet_fts")
+    migrate_fulltext()
+
+
+def search_bullets(words, limit=20):
+    """search bullets by content, the best match first
+
+        search_bullets("项目 meet*")
+
+    :param words: search words, all of them must match
+    :param limit: max number of bullets
+    :return: list of bullet
+    """
+    query = ngram_match_query(words)
+    if not query:
+        return []
+    sql = ("SELECT bullet.* FROM bullet_fts JOIN bullet ON bullet.id = bullet_fts.rowid "
+           "WHERE bullet_fts MATCH ? ORDER BY bm25(bullet_fts) LIMIT ?")
+    return list(Bullet.raw(sql, query, limit))
+
+
+def set_status(task_status, **filters):
+    """set status of the tasks matched by filters, by one UPDATE
+
+        set_status("complete", ids=[(1, 1), (5, 9)])
+        set_status("movefuture", status="incomplete", end="2019-07-31")
+
+    :param task_status: new status
+    :param filters: the filters of `Bullet.conditions`, one at least
+    :return: number of updated tasks
+    """
+    conditions = Bullet.conditions(**filters)
+    if not conditions:
+        raise ValueError("no filter")
+    with batch():
+        return Bullet.update(task_status=task_status, update_date=dte.now()) \
+                     .where(Bullet.bullet_type == "task", *conditions) \
+                     .execute()
+
+
+def migrate_tasks(before, today=None):
+    """migrate open tasks to today like bullet journal, the tasks created
+        before the date are marked `movefuture` and copied to today, by one
+        INSERT ... SELECT and one UPDATE in a transaction. only root tasks
+        are migrated, the sub tasks stay with their parent.
+
+    :param before: date string, the tasks before it are migrated
+    :param today: date string of the copies, default is today
+    :return: number of migrated tasks
+    """
+    today = today or dte.today().strftime("%Y-%m-%d")
+    now = dte.now()
+    incomplete = (Bullet.bullet_type == "task") & (Bullet.task_status == "incomplete")
+    condition = incomplete & Bullet.parent.is_null() & (Bullet.date_str != "") & (Bullet.date_str < before)
+    with batch():
+        last = Bullet.select(pw.fn.MAX(Bullet.id)).scalar() or 0
+        copies = Bullet.select(pw.Value(0), pw.Value(today), Bullet.content, Bullet.bullet_type,
+                               pw.Value("incomplete"), pw.Value(now), pw.Value(now)) \
+                       .where(condition) \
+                       .order_by(Bullet.create_date)
+        Bullet.insert_from(copies, [Bullet.version, Bullet.date_str, Bullet.content, Bullet.bullet_type,
+                                    Bullet.task_status, Bullet.create_date, Bullet.update_date]).execute()
+        index_bullets_after(last)
+        # the copies may match too, if `before` is later than today
+        return Bullet.update(task_status="movefuture", update_date=now) \
+                     .where(condition, Bullet.id <= last) \
+                     .execute()
+
+
+class BulletDaily(BaseModel):
+    """number of bullets per day, type and status, it's kept by the triggers
+        of bullet in the same transaction, so reports don't scan bullets.
+    """
+
+    class Meta:
+        primary_key = pw.CompositeKey("date_str", "bullet_type", "task_status")
+
+    date_str = pw.CharField()
+    bullet_type = pw.CharField()
+    task_status = pw.CharField()
+    count = pw.IntegerField(default=0)
+
+
+def _rollup_sql(row, delta):
+    """statements to add `delta` to the rollup of `row`, `new` or `old`
+    """
+    key = "{row}.date_str, {row}.bullet_type, {row}.task_status".format(row=row)
+    return (
+        "INSERT OR IGNORE INTO bulletdaily (version, date_str, bullet_type, task_status, count) "
+        "VALUES (0, {key}, 0); "
+        "UPDATE bulletdaily SET count = count {delta} "
+        "WHERE date_str = {row}.date_str AND bullet_type = {row}.bullet_type "
+        "AND task_status = {row}.task_status; "
+    ).format(key=key, row=row, delta=delta)
+
+
+ROLLUP_TRIGGERS = {
+    "bullet_daily_insert": "AFTER INSERT ON bullet BEGIN " + _rollup_sql("new", "+ 1") + "END",
+    "bullet_daily_delete": "AFTER DELETE ON bullet BEGIN " + _rollup_sql("old", "- 1") + "END",
+    "bullet_daily_update": "AFTER UPDATE OF date_str, bullet_type, task_status ON bullet BEGIN {}{}END".format(
+        _rollup_sql("old", "- 1"), _rollup_sql("new", "+ 1")),
+}
+
+
+def rebuild_rollup():
+    """count all bullets into the rollup again
+    """
+    with batch():
+        BulletDaily.delete().execute()
+        database.execute_sql(
+            "INSERT INTO bulletdaily (version, date_str, bullet_type, task_status, count) "
+            "SELECT 0, date_str, bullet_type, task_status, COUNT(*) FROM bullet "
+            "GROUP BY date_str, bullet_type, task_status")
+
+
+@migration("bujo_0003_daily_rollup")
+def migrate_daily_rollup():
+    for name, sql in sorted(ROLLUP_TRIGGERS.items()):
+        database.execute_sql("CREATE TRIGGER IF NOT EXISTS {} {}".format(name, sql))
+    rebuild_rollup()
+
+
+def daily_report(start, end):
+    """statistics of bullets per day, by the rollup
+
+    :param start: min date_str, include
+    :param end: max date_str, include
+    :return: list of (date_str, dict), the keys of dict are bullet types,
+        `created` and the task statuses
+    """
+    days = {}
+    rollups = BulletDaily.select() \
+                         .where(BulletDaily.date_str.between(start, end), BulletDaily.count > 0) \
+                         .order_by(BulletDaily.date_str)
+    for rollup in rollups:
+        stat = days.setdefault(rollup.date_str, {})
+        stat["created"] = stat.get("created", 0) + rollup.count
+        stat[rollup.bullet_type] = stat.get(rollup.bullet_type, 0) + rollup.count
+        if rollup.bullet_type == "task":
+            stat[rollup.task_status] = stat.get(rollup.task_status, 0) + rollup.count
+    return sorted(days.items())
+
+
+def report_range(kind, today=None):
+    """date range of report
+
+        report_range("week")                            # monday to today
+        report_range("month")                           # 1st to today
+        report_range("range 2019-07-01 2019-07-31")
+
+    :param kind: week, month or range with two dates
+    :param today: date, default is today
+    :return: (start, end) date strings
+    """
+    today = today or dte.today()
+    parts = kind.split()
+    if parts == ["week"]:
+        start = today - timedelta(days=today.weekday())
+    elif parts == ["month"]:
+        start = today.replace(day=1)
+    elif len(parts) == 3 and parts[0] == "range":
+        return tuple(dte.strptime(day, "%Y-%m-%d").strftime("%Y-%m-%d") for day in parts[1:])
+    else:
+        raise ValueError("invalid report: {}".format(kind))
+    return start.strftime("%Y-%m-%d"), today.strftime("%Y-%m-%d")
+
+
+# columns of report, (title, keys of `daily_report` summed)
+REPORT_COLUMNS = [
+    ("created", ["created"]),
+    ("task", ["task"]),
+    ("event", ["event"]),
+    ("note", ["note"]),
+    ("completed", ["complete", "delaycomplete"]),
+    ("migrated", ["movefuture"]),
+    ("open", ["incomplete"]),
+]
+
+# columns of exported bullets, `parent` is the id of parent bullet
+EXPORT_FIELDS = ["id", "date_str", "content", "bullet_type", "task_status", "parent", "create_date", "update_date"]
+
+
+def dump_bullets(f, fmt="jsonl"):
+    """write all bullets to a file in id order, rows are streamed from the
+        cursor, so the memory doesn't grow with journal.
+
+    :param f: text file object
+    :param fmt: jsonl or csv
+    :return: number of bullets
+    """
+    fields = [getattr(Bullet, name) for name in EXPORT_FIELDS]
+    # the raw values of cursor, converting dates to python and back is slow
+    rows = database.execute(Bullet.select(*fields).order_by(Bullet.id))
+    if fmt == "csv":
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_FIELDS)
+        write = writer.writerow
+    else:
+        encoder = json.JSONEncoder(ensure_ascii=False)
+
+        def write(row):
+            f.write(encoder.encode(dict(zip(EXPORT_FIELDS, row))) + "\n")
+
+    count = 0
+    for row in rows:
+        write(row)
+        count += 1
+    return count
+
+
+def _read_records(f, fmt):
+    if fmt == "csv":
+        for record in csv.DictReader(f):
+            yield record
+        return
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+
+def load_bullets(f, fmt="jsonl", chunk_size=500):
+    """import bullets from a file exported by `dump_bullets`, in one
+        transaction by chunks, memory is bounded by the chunk size.
+
+        the ids of file are shifted after the max id of database, so the
+        parent of sub task still points to the bullet of the same file. a
+        parent which isn't in the file is cleared.
+
+    :param f: text file object
+    :param fmt: jsonl or csv
+    :param chunk_size: bullets per insert
+    :return: number of bullets
+    """
+    now = str(dte.now())
+    # statement of one row is built once and executed for each chunk, building
+    # sql for every row costs more than inserting the row
+    columns = [getattr(Bullet, name).column_name for name in ["version"] + EXPORT_FIELDS]
+    sql = 'INSERT INTO "{}" ({}) VALUES ({})'.format(
+        Bullet._meta.table_name, ", ".join('"{}"'.format(column) for column in columns), ", ".join("?" * len(columns)))
+
+    count = 0
+    with batch():
+        offset = Bullet.select(pw.fn.MAX(Bullet.id)).scalar() or 0
+        chunk = []
+        for record in _read_records(f, fmt):
+            if record.get("bullet_type") not in BulletType or not record.get("content") or \
+                    (record.get("task_status") or "incomplete") not in TaskStatus:
+                raise ValueError("invalid bullet: {}".format(record))
+            parent = record.get("parent")
+            created = record.get("create_date") or now
+            chunk.append((
+                0,
+                int(record["id"]) + offset,
+                record.get("date_str") or created[:10],
+                record["content"],
+                record["bullet_type"],
+                record.get("task_status") or "incomplete",
+                int(parent) + offset if parent not in (None, "") else None,
+                created,
+                record.get("update_date") or created,
+            ))
+            if len(chunk) >= chunk_size:
+                database.cursor().executemany(sql, chunk)
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            database.cursor().executemany(sql, chunk)
+            count += len(chunk)
+
+        orphans = Bullet.alias()
+        orphan = ~pw.fn.EXISTS(orphans.select().where(orphans.id == Bullet.parent))
+        Bullet.update(parent=None) \
+              .where((Bullet.id > offset) & Bullet.parent.is_null(False) & orphan) \
+              .execute()
+        # index the imported bullets by one statement
+        index_bullets_after(offset)
+    return count
+
+
+def _file_format(path):
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+# approximate bytes of a bullet in memory, as an entry of `BulletIndex`, and
+# as a model of today's log with its children
+BULLET_ENTRY_BYTES = 600
+BULLET_BYTES = 1600
+
+
+class BulletIndex(object):
+    """in memory index of open bullets for completion, they are the
+        incomplete tasks and today's bullets. it's loaded at the first
+        completion, and kept by the writes of topic.
+
+            index = BulletIndex()
+            index.complete("12")        # id prefix
+            index.complete("会议")      # content substring
+
+        the contents are joined in one string in id order, so a substring
+        is found by `str.rfind` from the newest bullet.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # id -> (content, status, date_str, bullet_type)
+        self._entries = None
+        self._day = None
+        self._dirty = True
+        self._ids = {}          # length -> sorted id strings
+        self._blob = ""         # "\n" + contents, lower case
+        self._offsets = []      # start of each content in blob
+        self._blob_ids = []     # id of each content in blob
+
+    @staticmethod
+    def is_open(status, date_str, bullet_type, today):
+        return (bullet_type == "task" and status == "incomplete") or date_str == today
+
+    def clear(self):
+        with self._lock:
+            self._entries = None
+            self._ids = {}
+            self._blob = ""
+            self._offsets = []
+            self._blob_ids = []
+
+    def memory_usage(self):
+        """approximate bytes of entries and the built lookup
+        """
+        entries = self._entries
+        if entries is None:
+            return 0
+        return len(entries) * BULLET_ENTRY_BYTES + sys.getsizeof(self._blob)
+
+    def put(self, bullet):
+        """add or update a bullet, it's removed if not open any more
+        """
+        with self._lock:
+            if self._entries is None:
+                return
+            values = (bullet.content, bullet.task_status, bullet.date_str, bullet.bullet_type)
+            if self.is_open(*values[1:], today=self._day):
+                self._entries[bullet.id] = values
+            else:
+                self._entries.pop(bullet.id, None)
+            self._dirty = True
+
+    def set_content(self, bullet_id, content):
+        with self._lock:
+            if self._entries is None or bullet_id not in self._entries:
+                return
+            self._entries[bullet_id] = (content,) + self._entries[bullet_id][1:]
+            self._dirty = True
+
+    def discard(self, ids):
+        with self._lock:
+            if self._entries is None:
+                return
+            for bullet_id in ids:
+                self._entries.pop(bullet_id, None)
+            self._dirty = True
+
+    def set_status(self, ids, status):
+        """
+        :param ids: list of (min id, max id)
+        :param status: new status of tasks
+        """
+        if self._entries is None:
+            return
+        # reopened tasks are open whatever the date, they may be not indexed
+        reopened = []
+        if self.is_open(status, "", "task", self._day):
+            reopened = Bullet.select(Bullet.id, Bullet.content, Bullet.date_str) \
+                             .where(Bullet.bullet_type == "task", *Bullet.conditions(ids=ids)) \
+                             .tuples()
+            reopened = list(reopened)
+        with self._lock:
+            if self._entries is None:
+                return
+            for bullet_id, (content, _, date_str, btype) in list(self._entries.items()):
+                if btype != "task" or not any(lo <= bullet_id <= hi for lo, hi in ids):
+                    continue
+                if self.is_open(status, date_str, btype, self._day):
+                    self._entries[bullet_id] = (content, status, date_str, btype)
+                else:
+                    del self._entries[bullet_id]
+            for bullet_id, content, date_str in reopened:
+                self._entries[bullet_id] = (content, status, date_str, "task")
+            self._dirty = True
+
+    def _load(self):
+        today = dte.today().strftime("%Y-%m-%d")
+        if self._entries is not None and self._day == today:
+            return
+        incomplete = (Bullet.bullet_type == "task") & (Bullet.task_status == "incomplete")
+        query = Bullet.select(Bullet.id, Bullet.content, Bullet.task_status, Bullet.date_str, Bullet.bullet_type) \
+                      .where(incomplete | (Bullet.date_str == today)) \
+                      .tuples()
+        self._entries = {row[0]: row[1:] for row in query}
+        self._day = today
+        self._dirty = True
+
+    def _build(self):
+        ids = sorted(self._entries)
+        self._ids = {}
+        for bullet_id in ids:
+            text = str(bullet_id)
+            self._ids.setdefault(len(text), []).append(text)
+        self._blob_ids = ids
+        self._offsets = []
+        parts, offset = [], 0
+        for bullet_id in ids:
+            content = "\n" + self._entries[bullet_id][0].lower()
+            self._offsets.append(offset)
+            parts.append(content)
+            offset += len(content)
+        self._blob = "".join(parts)
+        self._dirty = False
+
+    def complete(self, word, limit=10):
+        """open bullets matching the word, ids start with it first (short
+            ids first), then contents contain it (newest first).
+
+        :param word: id prefix or content substring
+        :param limit: max number of matches
+        :return: list of (id, content, status, date_str)
+        """
+        with self._lock:
+            self._load()
+            if self._dirty:
+                self._build()
+
+            found = []
+            if word.isdigit():
+                for size in sorted(self._ids):
+                    if size < len(word) or len(found) >= limit:
+                        continue
+                    ids = self._ids[size]
+                    lo = bisect.bisect_left(ids, word)
+                    hi = bisect.bisect_left(ids, word + ":")     # ":" follows "9"
+                    found.extend(int(bullet_id) for bullet_id in ids[lo:min(hi, lo + limit - len(found))])
+
+            needle, end = word.lower(), len(self._blob)
+            while needle and len(found) < limit:
+                pos = self._blob.rfind(needle, 0, end)
+                if pos < 0:
+                    break
+                idx = bisect.bisect_right(self._offsets, pos) - 1
+                bullet_id = self._blob_ids[idx]
+                if bullet_id not in found:
+                    found.append(bullet_id)
+                # continue before this content
+                end = self._offsets[idx]
+
+            entries = self._entries
+            return [(bullet_id,) + entries[bullet_id][:3] for bullet_id in found[:limit]]
+
 
 class BujoTopic(Topic):
 
     _name = "bujo"
     _description = "plan manager, simple version of bullet journal"
 
+    def __init__(self, context):
+        super(BujoTopic, self).__init__(context)
+        # today's log with trees loaded, (date_str, bullets), it's cleared or
+        # patched by the writes of this topic
+        self._daily = None
+        # bullet ids by display index of last `list_bullet`
+        self._listing = None
+        # open bullets for completion
+        self._index = BulletIndex()
+
+    def release(self):
+        self._daily = None
+        self._listing = None
+        self._index.clear()
+        super(BujoTopic, self).release()
+
+    def memory_usage(self):
+        usage = self._index.memory_usage()
+        if self._daily is not None:
+            usage += len(self._daily[1]) * BULLET_BYTES
+        return usage
+
+    def hibernate(self):
+        """today's log and the completion index are loaded from database again
+        """
+        self._daily = None
+        self._index.clear()
+
+    def _bullet_completions(self, content):
+        """complete bullet id of the first argument, and task status of the
+            others
+
+        :param content: command content, such as "12 comp"
+        :return:
+        """
+        words = content.split(" ")
+        word = words[-1]
+        if len(words) > 1 or word.startswith("status="):
+            word = word.split("=", 1)[-1]
+            for status in TaskStatus:
+                if status.startswith(word):
+                    yield Completion(status, start_position=-len(word),
+                                     display="{} {}".format(TaskStatus[status], status), style='bg:skyblue')
+            return
+
+        # the last id of list, such as "1,3,5-9"
+        word = re.split(r"[,-]", word)[-1]
+        if not word:
+            return
+        for bullet_id, text, status, date_str in self._index.complete(word):
+            yield Completion(
+                str(bullet_id),
+                start_position=-len(word),
+                display="{} {} {} {}".format(bullet_id, date_str, TaskStatus.get(status, ""), text[:30]),
+                style='bg:skyblue'
+            )
+
+    def daily_log(self):
+        """today's bullets with their trees, queried once a day unless this
+            topic changes them. the bullets written by other process are not
+            seen until the view is cleared.
+
+        :return: list of bullet
+        """
+        today = dte.today().strftime("%Y-%m-%d")
+        if self._daily is None or self._daily[0] != today:
+            self._daily = (today, Bullet.load_trees(self.get_today_bullets()))
+        return self._daily[1]
+
+    def _invalidate(self):
+        self._daily = None
+
+    def _patch(self, match, **values):
+        """update the cached copies of bullets, a bullet may be a root and a
+            child of another bullet at the same time.
+
+        :param match: function, return True if the bullet should be updated
+        :param values: field -> value
+        """
+        if self._daily is None:
+            return
+        stack = list(self._daily[1])
+        while stack:
+            bullet = stack.pop()
+            if match(bullet):
+                for key, value in values.items():
+                    setattr(bullet, key, value)
+            stack.extend(bullet.get_children())
+
+    def _bullet_id(self, idx):
+        """map the display index to bullet id, by the last listing if there
+            is, so the index points to the bullet the user has seen.
+
+        :param idx: 1 based index
+        :return: bullet id, None if out of range
+        """
+        if self._listing is None:
+            self._listing = [bullet.id for bullet in self.daily_log()]
+        if not 0 < idx <= len(self._listing):
+            return None
+        return self._listing[idx - 1]
+
     def get_today_bullets(self):
         today = dte.today().strftime("%Y-%m-%d")
         bullets = Bullet.select().where(Bullet.date_str == today).order_by(Bullet.create_date.desc())
@@ -118,92 +913,237 @@ class BujoTopic(Topic):
                    bullet_type=btype,
                    content=content.strip())
         t.save()
+        self._invalidate()
+        self._index.put(t)
         self.print_success()
 
-    @entrypoint(doc="eg: `> add_sub_task parent_id content`")
+    @entrypoint(doc="eg: `> add_sub_task parent_id content`", complete="_bullet_completions")
     def add_sub_task(self, text):
         try:
             text = text.strip()
             parent_id, content = text.split(" ", 1)
-            parent = Bullet.get(Bullet.id == parent_id)
         except Exception:
             self.print_fail()
             return
 
         today = dte.today().strftime("%Y-%m-%d")
-        t = Bullet(date_str=today,
-                   bullet_type="task",
-                   parent=parent,
-                   content=content.strip())
-        t.save()
+        with batch():
+            parent = Bullet.get_or_none(Bullet.id == parent_id)
+            if parent is None:
+                self.print_fail()
+                return
+            t = Bullet(date_str=today,
+                       bullet_type="task",
+                       parent=parent,
+                       content=content.strip())
+            t.save()
+        self._invalidate()
+        self._index.put(t)
         self.print_success()
 
-    @entrypoint(doc="remove bullet, `> remove_bullet idx`")
+    @entrypoint(doc="remove bullet by the index of `list_bullet`, `> remove_bullet idx`")
     def remove_bullet(self, idx):
-        bullets = self.get_today_bullets()
         try:
-            idx = int(idx)
-            bullet = bullets[idx - 1]
-        except (ValueError, IndexError):
+            bullet_id = self._bullet_id(int(idx))
+        except ValueError:
+            bullet_id = None
+        if bullet_id is None:
             self.print_fail()
             return
-        qs = Bullet.delete().where(Bullet.id == bullet.id)
-        qs.execute()
+        Bullet.delete().where(Bullet.id == bullet_id).execute()
+        self._invalidate()
+        self._index.discard([bullet_id])
         self.print_success()
 
-    @entrypoint(doc="eg: `modify_bullet idx new_value`")
+    @entrypoint(doc="modify bullet by the index of `list_bullet`, eg: `modify_bullet idx new_value`")
     def modify_bullet(self, text):
-        bullets = self.get_today_bullets()
         text = text.strip()
         try:
             idx, content = text.split(" ", 1)
-            idx = int(idx.strip())
-            bullet = bullets[idx - 1]
+            bullet_id = self._bullet_id(int(idx.strip()))
         except Exception:
+            bullet_id = None
+        if bullet_id is None:
             self.print_fail()
             return
-        bullet.content = content
-        bullet.update_date = dte.now()
-        bullet.save()
+        now = dte.now()
+        with batch():
+            if not Bullet.update(content=content, update_date=now).where(Bullet.id == bullet_id).execute():
+                self.print_fail()       # removed already
+                return
+            index_bullet(bullet_id, content)
+        self._patch(lambda bullet: bullet.id == bullet_id, content=content, update_date=now)
+        self._index.set_content(bullet_id, content)
         self.print_success()
 
-    @entrypoint(doc="eg: `set_task_status idx [complete|movefuture|incomplete]`")
+    @entrypoint(doc="set status of tasks by ids or filters, eg: `set_task_status 1,3,5-9 complete`, "
+                    "`set_task_status status=incomplete to=2019-07-31 movefuture`",
+                complete="_bullet_completions")
     def set_task_status(self, text):
-        text = text.strip()
         try:
-            idx, content = text.split(" ", 1)
-            idx = int(idx.strip())
-            bullet = Bullet.get(Bullet.id == idx)
-        except Exception:
+            *selector, status = text.split()
+            if status not in TaskStatus or not selector:
+                raise ValueError(status)
+            if "=" in selector[0]:
+                options = parse_options(" ".join(selector), ["from", "to", "status"])
+                filters = {"start": options.get("from"), "end": options.get("to"), "status": options.get("status")}
+            else:
+                filters = {"ids": parse_ids(" ".join(selector))}
+            count = set_status(status, **filters)
+        except ValueError:
             self.print_fail()
             return
-        bullet.task_status = content.strip()
-        bullet.save()
+
+        if "ids" in filters:
+            ids = filters["ids"]
+            self._patch(lambda bullet: bullet.bullet_type == "task" and any(lo <= bullet.id <= hi for lo, hi in ids),
+                        task_status=status)
+            self._index.set_status(ids, status)
+        else:
+            self._invalidate()
+            self._index.clear()
+        print_formatted_text("{} tasks updated".format(count))
         self.print_success()
 
-    @entrypoint(doc="list today log")
-    def list_bullet(self):
-        bullets = self.get_today_bullets()
+    @entrypoint(doc="migrate incomplete tasks before a date to today, eg: `migrate [2019-07-31]`, "
+                    "default is the tasks before today")
+    def migrate(self, before=None):
+        try:
+            before = dte.strptime(before.strip(), "%Y-%m-%d") if before else dte.today()
+        except ValueError:
+            self.print_fail()
+            return
+        count = migrate_tasks(before.strftime("%Y-%m-%d"))
+        self._invalidate()
+        self._index.clear()
+        print_formatted_text("{} tasks migrated".format(count))
+        self.print_success()
+
+    def _queries(self):
+        """the queries of bujo commands, for diagnosis
+        """
+        today = self.get_today_bullets()
+        return [
+            ("today bullets", today),
+            ("all bullets", self.get_all_bullets()),
+            ("incomplete tasks", self.get_incomplete_tasks()),
+            ("descendants", Bullet.descendants(today)),
+            ("history page", Bullet.history(after=(dte.now(), 0))),
+            ("history page of tasks", Bullet.history(after=(dte.now(), 0), btype="task", status="incomplete")),
+        ]
+
+    @entrypoint(doc="show sqlite query plan of bujo queries")
+    def explain(self):
+        for name, query in self._queries():
+            sql, params = query.sql()
+            print_formatted_text(HTML("\n<ansicyan>{}</ansicyan>".format(name)))
+            for row in database.execute_sql("EXPLAIN QUERY PLAN " + sql, params):
+                print_formatted_text("    " + str(row[-1]))
+
+    @entrypoint(doc="search bullets, eg: `search_bullet 项目 meet*`")
+    def search_bullet(self, words):
+        try:
+            bullets = search_bullets(words)
+        except pw.OperationalError:     # syntax error of fts query
+            self.print_fail()
+            return
         if bullets:
             print_formatted_text("")
-
         for bullet in bullets:
-            bullet.print_text()
+            print_formatted_text(bullet.get_show_text(with_date=True))
+        self.print_success()
+
+    @entrypoint(doc="rebuild the full text index of bullets")
+    def rebuild_search_index(self):
+        rebuild_fulltext()
+        self.print_success()
+
+    @entrypoint(doc="export all bullets to JSON Lines or csv, eg: `export_bullets bujo.jsonl`")
+    def export_bullets(self, path):
+        path = path.strip()
+        try:
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                count = dump_bullets(f, _file_format(path))
+        except (IOError, OSError) as e:
+            print_formatted_text(str(e))
+            self.print_fail()
+            return
+        print_formatted_text("{} bullets exported".format(count))
+        self.print_success()
+
+    @entrypoint(doc="import bullets from JSON Lines or csv, eg: `import_bullets bujo.csv`")
+    def import_bullets(self, path):
+        path = path.strip()
+        try:
+            with open(path, encoding="utf-8", newline="") as f:
+                count = load_bullets(f, _file_format(path))
+            self._invalidate()
+            self._index.clear()
+        except (IOError, ValueError, KeyError) as e:
+            print_formatted_text(str(e))
+            self.print_fail()
+            return
+        print_formatted_text("{} bullets imported".format(count))
+        self.print_success()
+
+    @entrypoint(doc="statistics of bullets, eg: `report week|month|range 2019-07-01 2019-07-31`")
+    def report(self, kind):
+        try:
+            start, end = report_range(kind)
+        except ValueError:
+            self.print_fail()
+            return
+
+        rows = []
+        total = dict.fromkeys([title for title, _ in REPORT_COLUMNS], 0)
+        for date_str, stat in daily_report(start, end):
+            row = [date_str]
+            for title, keys in REPORT_COLUMNS:
+                value = sum(stat.get(key, 0) for key in keys)
+                total[title] += value
+                row.append(value)
+            rows.append(row)
+        rows.append(["total"] + [total[title] for title, _ in REPORT_COLUMNS])
+
+        header = ["date"] + [title for title, _ in REPORT_COLUMNS]
+        print_formatted_text("\n{} ~ {}".format(start, end))
+        tableprint.table(rows, header, width=[12] + [10] * len(REPORT_COLUMNS), style="clean")
+
+    @entrypoint(doc="count the statistics of report again")
+    def rebuild_report(self):
+        rebuild_rollup()
         self.print_success()
 
-    @entrypoint(doc="list history bullet")
-    def list_history_bullet(self):
-        bullets = self.get_all_bullets()
+    @entrypoint(doc="list today log, the index is used by `modify_bullet` and `remove_bullet`")
+    def list_bullet(self):
+        bullets = self.daily_log()
         if bullets:
             print_formatted_text("")
 
-        for bullet in bullets:
-            bullet.print_text()
+        self._listing = [bullet.id for bullet in bullets]
+        for idx, bullet in enumerate(bullets, 1):
+            for row, line in enumerate(bullet.iter_lines()):
+                prefix = "{:>3}. ".format(idx) if row == 0 else "     "
+                print_formatted_text(HTML(prefix + line))
+        self.print_success()
+
+    @entrypoint(doc="list history bullet in pager, eg: `list_history_bullet [from=2019-07-01] [to=2019-07-31] "
+                    "[type=task] [status=incomplete]`")
+    def list_history_bullet(self, text=""):
+        try:
+            options = parse_options(text, ["from", "to", "type", "status"])
+        except ValueError:
+            self.print_fail()
+            return
+
+        bullets = Bullet.iter_history(start=options.get("from"), end=options.get("to"),
+                                      btype=options.get("type"), status=options.get("status"))
+        page_lines(line for bullet in bullets for line in bullet.iter_lines(with_date=True))
         self.print_success()
 
     @entrypoint(doc="list incomplete task")
     def list_incomplete_task(self):
-        tasks = self.get_incomplete_tasks()
+        tasks = Bullet.load_trees(self.get_incomplete_tasks())
         for bullet in tasks:
             bullet.print_text(with_date=True)
         self.print_success()
@@ -1,13 +1,25 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
+import time
+import heapq
+import bisect
+import pstats
+import cProfile
+import importlib
 import tableprint
 
 from abc import ABCMeta
 from prompt_toolkit import PromptSession, print_formatted_text, HTML
-from prompt_toolkit.auto_suggest import AutoSuggestFromHistory
-from prompt_toolkit.history import FileHistory
 from prompt_toolkit.completion import Completion
+from ..db import BaseModel, SystemParameter, DATA_DIR, check_storage_setting
+from ..history import get_history, HistoryAutoSuggest
+from ..stats import command_stats
+from ..util import parse_command
+
+# cProfile files of `profile` command
+PROFILE_DIR = os.path.join(DATA_DIR, "profile")
 
 
 def entrypoint(alias=None, doc="", complete=None, base=False):
@@ -41,22 +53,117 @@ def entrypoint(alias=None, doc="", complete=None, base=False):
     return wrap
 
 
+class TopicSpec(object):
+    """the registry record of one topic, it's known without importing the
+        module which define the topic class.
+    """
+
+    def __init__(self, name, description, module):
+        self.name = name
+        self.description = description
+        self.module = module
+
+    def load(self):
+        """import the topic module if necessary, and return the topic class
+
+        :return: topic class, or None if the module doesn't define it
+        """
+        if self.name not in TopicMeta.topic_classes:
+            importlib.import_module(self.module)
+            # tables of models defined in the new imported module
+            BaseModel.check_schema_migration()
+        return TopicMeta.topic_classes.get(self.name)
+
+
+class CommandIndex(object):
+    """command names of a topic for completion, built once per topic class.
+
+        names are matched by prefix, by the initials of `_` separated words,
+        by substring, and at last by subsequence, in this order of rank.
+        aliases of one entrypoint are merged into its best match.
+
+            index = CommandIndex(entrypoints)
+            index.complete("lhb")       # ["list_history_bullet"]
+
+        the matches of last word are kept, when the word grows, only they
+        are matched again.
+    """
+
+    def __init__(self, entrypoints):
+        self.names = sorted(entrypoints)
+        funcs = {}
+        # entrypoint of each name, aliases share the number
+        self._funcs = [funcs.setdefault(entrypoints[name], len(funcs)) for name in self.names]
+        self._initials = ["".join(word[:1] for word in name.split("_")) for name in self.names]
+        # (word, positions of names matched by subsequence)
+        self._last = ("", list(range(len(self.names))))
+
+    def _candidates(self, word):
+        last_word, last = self._last
+        pool = last if word.startswith(last_word) else range(len(self.names))
+        names = self.names
+        if len(word) == 1:
+            matched = [pos for pos in pool if word in names[pos]]
+        else:
+            search = re.compile(".*?".join(re.escape(char) for char in word)).search
+            matched = [pos for pos in pool if search(names[pos])]
+        self._last = (word, matched)
+        return matched
+
+    def complete(self, word, limit=50):
+        """
+        :param word: typed word
+        :param limit: max number of names, a longer menu is not readable
+        :return: list of command names, best first, one per entrypoint
+        """
+        names, funcs, initials = self.names, self._funcs, self._initials
+        # names start with the word are adjacent in sorted names
+        lo = bisect.bisect_left(names, word)
+        hi = bisect.bisect_left(names, word + "\U0010ffff")
+
+        best = {}
+        for pos in self._candidates(word):
+            name = names[pos]
+            if lo <= pos < hi:
+                rank = (0, len(name), name)
+            elif initials[pos].startswith(word):
+                rank = (1, len(name), name)
+            elif word in name:
+                rank = (2, len(name), name)
+            else:
+                rank = (3, len(name), name)
+            func = funcs[pos]
+            if func not in best or rank < best[func]:
+                best[func] = rank
+        return [rank[2] for rank in heapq.nsmallest(limit, best.values())]
+
+
 class TopicMeta(ABCMeta):
 
-    # all topic class
+    # all imported topic class
     # eg: {"": DefaultTopic, "other": OtherTopic}
     topic_classes = {}
 
+    # all known topic, imported or not
+    # eg: {"default": <TopicSpec default>, "stock": <TopicSpec stock>}
+    topic_specs = {}
+
     # topic entrypoint per topic
     # eg: {'': {'select_topic': <function Topic.select_topic at 0x109d9bc80>}}
     topic_entrypoints = {}
 
+    # command completion index per topic
+    # eg: {"": <CommandIndex>}
+    command_indexes = {}
+
     def __init__(self, name, bases, members):
         super(TopicMeta, self).__init__(name, bases, members)
         mcls = self.__class__
 
         mcls.topic_classes[self._name] = self
         mcls.topic_entrypoints[self._name] = {}
+        if self._name:
+            mcls.register_topic(TopicSpec(self._name, getattr(self, "_description", ""), self.__module__))
 
         for attr, method in members.items():
             if not getattr(method, "_entrypoint", False):
@@ -68,6 +175,32 @@ class TopicMeta(ABCMeta):
                 continue
             mcls.topic_entrypoints[self._name].update(mcls.topic_entrypoints[base._name])
 
+        mcls.command_indexes[self._name] = CommandIndex(mcls.topic_entrypoints[self._name])
+
+    @classmethod
+    def register_topic(mcls, spec):
+        """register a topic without importing it, the first registration wins
+
+        :param mcls: TopicMeta
+        :param spec: `TopicSpec` object
+        """
+        mcls.topic_specs.setdefault(spec.name, spec)
+
+    @classmethod
+    def get_topic_class(mcls, name):
+        """return topic class by name, import the topic module on first use
+
+        :param mcls: TopicMeta
+        :param name: topic name
+        :return: topic class or None
+        """
+        if name in mcls.topic_classes:
+            return mcls.topic_classes[name]
+        spec = mcls.topic_specs.get(name)
+        if spec is None:
+            return None
+        return spec.load()
+
     @classmethod
     def create_topic(mcls, name, context):
         """create a topic instance
@@ -77,9 +210,10 @@ class TopicMeta(ABCMeta):
         :param context: `easier.Context` object
         :return: topic object
         """
-        if name not in mcls.topic_classes:
+        tcls = mcls.get_topic_class(name)
+        if tcls is None:
             return None
-        topic = mcls.topic_classes[name](context)
+        topic = tcls(context)
         return topic
 
 
@@ -89,22 +223,37 @@ class Topic(object, metaclass=TopicMeta):
 
     def __init__(self, context):
         self.context = context
-        self.session = PromptSession("%s> " % self.name,
-                                     history=FileHistory(self._history_filename()),
-                                     auto_suggest=AutoSuggestFromHistory())
+        self._session = None
+        # set by `print_fail`, reset before every command
+        self._failed = False
+
+    @property
+    def session(self):
+        """the prompt session, created on first use, scripts never need it
+        """
+        if self._session is None:
+            self._session = PromptSession("%s> " % self.name,
+                                          history=get_history(self._name),
+                                          auto_suggest=HistoryAutoSuggest())
+        return self._session
 
     def release(self):
         """relase resource and reference
         """
         self.context = None
-        self.session = None
+        self._session = None
 
-    def _history_filename(self):
-        filename = '.history/{}'.format(self._name)
-        dirname = os.path.dirname(filename)
-        if not os.path.exists(dirname):
-            os.makedirs(dirname)
-        return filename
+    def memory_usage(self):
+        """approximate bytes of the data this topic keeps in memory, `Context`
+            hibernates the least recently used topics when they exceed its budget.
+        """
+        return 0
+
+    def hibernate(self):
+        """drop the data counted by `memory_usage`, the topic is still usable
+            and loads them again when they are needed.
+        """
+        pass
 
     def get_entrypoint(self, cmd):
         """find entrypoint by command name
@@ -121,30 +270,46 @@ class Topic(object, metaclass=TopicMeta):
         """
         return TopicMeta.topic_entrypoints.get(self._name, {})
 
+    def complete_command(self, word):
+        """command names matching the typed word, best first
+        """
+        return TopicMeta.command_indexes[self._name].complete(word)
+
     @staticmethod
     def _get_topics():
-        """return all topic name
+        """return all topic spec, without importing topic modules
         """
-        return {name: obj for name, obj in TopicMeta.topic_classes.items() if bool(name)}
+        return {name: spec for name, spec in TopicMeta.topic_specs.items() if bool(name)}
 
     def execute_command(self, cmd, content):
         """determine entrypoint funcion, and call it.
 
         :param cmd: command name, also is entrypoint function name
         :param content: command content, also is entrypoint function arguments
+        :return: False if the command is unknown, misused or failed
         """
         func = self.get_entrypoint(cmd)
         if not func:
             self.command_not_found(cmd)
-            return
+            return False
 
         args = [content] if content else []
 
+        self._failed = False
+        ok = False
+        mark = command_stats.start()
         try:
             func(self, *args)
+            ok = not self._failed
         except TypeError as e:
             print(e)
             self.lack_command_options(cmd)
+        except EOFError:
+            ok = True
+            raise
+        finally:
+            command_stats.stop(self._name, cmd, mark, ok)
+        return ok
 
     @staticmethod
     def command_not_found(cmd):
@@ -195,6 +360,7 @@ class Topic(object, metaclass=TopicMeta):
         """
         topic = self.context.get_topic(name)
         if not topic:
+            self._failed = True
             self.topic_not_found(name)
             return
         self.context.set_current(topic)
@@ -208,14 +374,47 @@ class Topic(object, metaclass=TopicMeta):
         mx_topic_size = len(header[0])
         mx_desc_size = len(header[1])
 
-        for topic, tcls in self._get_topics().items():
+        for topic, spec in self._get_topics().items():
             mx_topic_size = max(mx_topic_size, len(topic))
-            mx_desc_size = max(mx_desc_size, len(tcls._description))
-            rows.append((topic, tcls._description))
+            mx_desc_size = max(mx_desc_size, len(spec.description))
+            rows.append((topic, spec.description))
 
         rows.sort(key=lambda k: "z" if k[0] in ["default"] else k[0])
         tableprint.table(rows, ("topic", "description"), width=(mx_topic_size + 5, mx_desc_size + 5), style="clean")
 
+    @entrypoint(doc="show or set parameters, eg: `> config stock.source synthetic:5000`", base=True)
+    def config(self, text=""):
+        """`config` shows all parameters, `config key` shows one, and
+            `config key value` sets it.
+        """
+        parts = text.strip().split(" ", 1)
+        key = parts[0]
+        if len(parts) > 1:
+            value = parts[1].strip()
+            if key.startswith("storage."):
+                try:
+                    check_storage_setting(key[len("storage."):], value)
+                except ValueError as e:
+                    print_formatted_text(str(e))
+                    self.print_fail()
+                    return
+            SystemParameter.insert(key=key, value=value) \
+                .on_conflict(conflict_target=[SystemParameter.key],
+                             update={SystemParameter.value: value}) \
+                .execute()
+            self.print_success()
+            return
+
+        query = SystemParameter.select().order_by(SystemParameter.key)
+        if key:
+            query = query.where(SystemParameter.key == key)
+        rows = [(param.key, param.value) for param in query]
+        if not rows:
+            self.print_fail()
+            return
+        width = (max(len(k) for k, _ in rows) + 5, max(len(v) for _, v in rows) + 5)
+        tableprint.table(rows, ("key", "value"), width=width, style="clean")
+
     @entrypoint(alias=["quit"], doc="quit program", base=True)
     def exit(self, *args):
         raise EOFError
@@ -226,6 +425,56 @@ class Topic(object, metaclass=TopicMeta):
         """
         os.system("clear")
 
+    @entrypoint(doc="show latency of commands, `> stats [reset]`", base=True)
+    def stats(self, text=""):
+        """p50/p95/p99 of wall time, cpu time, and sql statements and network
+            calls per command, of every command run in this process
+        """
+        if text.strip() == "reset":
+            command_stats.clear()
+            self.print_success()
+            return
+
+        rows = []
+        for (topic, cmd), record in sorted(command_stats.records.items()):
+            wall, cpu = record.wall, record.cpu
+            rows.append((topic, cmd, record.count, record.failed,
+                         wall.percentile(50) * 1000, wall.percentile(95) * 1000, wall.percentile(99) * 1000,
+                         cpu.percentile(50) * 1000,
+                         float(record.sql) / record.count, float(record.network) / record.count))
+        if not rows:
+            self.print_fail()
+            return
+        header = ("topic", "command", "count", "failed", "p50 ms", "p95 ms", "p99 ms", "cpu p50 ms", "sql", "network")
+        width = (max(len(row[0]) for row in rows) + 2, max(len(row[1]) for row in rows) + 2) + (10,) * 8
+        tableprint.table(rows, header, width=width, format_spec="4g", style="clean")
+
+    @entrypoint(doc="run a command with cProfile, eg: `> profile list_bullet`", base=True)
+    def profile(self, text):
+        """profile one command, the stats are saved in `PROFILE_DIR` and the
+            top functions by cumulative time are printed
+        """
+        parsed = parse_command(text.strip())
+        if not parsed:
+            self.print_fail()
+            return
+        cmd, content = parsed["cmd"].strip(), (parsed["content"] or "").strip()
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            ok = self.execute_command(cmd, content)
+        finally:
+            profiler.disable()
+
+        if not os.path.exists(PROFILE_DIR):
+            os.makedirs(PROFILE_DIR)
+        path = os.path.join(PROFILE_DIR, "{}-{}-{}.prof".format(self._name, cmd, time.strftime("%Y%m%d-%H%M%S")))
+        profiler.dump_stats(path)
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+        print("profile saved to {}, view it by `python -m pstats {}`".format(path, path))
+        self._failed = not ok
+
     @entrypoint(doc="show all available commands", base=True)
     def help(self):
         header = ("command", "description")
@@ -257,6 +506,7 @@ class Topic(object, metaclass=TopicMeta):
         print_formatted_text(HTML('<ansigreen>SUCCESS!</ansigreen>'))
 
     def print_fail(self):
+        self._failed = True
         print_formatted_text("")
         print_formatted_text((HTML('<ansired>ERROR!</ansired>')))
 
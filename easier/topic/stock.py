@@ -1,10 +1,27 @@
 # -*- coding: utf-8 -*-
-import curses
-import time
-import tushare
+import os
+import pickle
+import threading
+
+from prompt_toolkit.completion import Completion
 
 from .core import Topic, entrypoint
-from ..util import pandas_to_list, CurseHelper, common_ljust
+from ..cache import FrameCache, HIBERNATE_DIR, hibernate_file
+from ..db import SystemParameter
+from ..market.fetcher import QuotationFetcher, fixed_schedule
+from ..market.quotation import prepare_quotation, to_float_prices
+from ..market.recorder import TickRecorder
+from ..market.source import create_source
+from ..market.symbols import SymbolIndex, SymbolCompleter, add_pinyin_column
+from ..screen import GridRenderer
+from ..util import CurseHelper
+
+# stock basis table rarely changes, it's refreshed once a trading day
+BASIS_CACHE_TTL = 24 * 3600
+basis_cache = FrameCache("stock_basis", ttl=BASIS_CACHE_TTL)
+
+# approximate bytes of symbol index and completer per stock
+SYMBOL_BYTES = 450
 
 
 class Stock(Topic):
@@ -12,9 +29,100 @@ class Stock(Topic):
     _name = "stock"
     _description = "stock market quotation"
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, context, source=None):
+        """
+        :param context: `easier.Context` object
+        :param source: `QuotationSource` object, default is set by system
+                       parameter `stock.source`, such as "tushare",
+                       "synthetic:5000:10", "replay:20190708:10"
+        """
+        self._source = source
         self._stock_basis = None
-        super(Stock, self).__init__(*args, **kwargs)
+        self._symbols = None
+        self._completer = None
+        self._fetcher = None
+        # pickle file of the state dropped by `hibernate`
+        self._hibernated = None
+        # stock basis is loaded by commands, or by a thread for completion
+        self._basis_lock = threading.Lock()
+        self._basis_loader = None
+        super(Stock, self).__init__(context)
+
+    def get_source(self):
+        """return the quotation data source, create it on first use
+        """
+        if self._source is None:
+            self._source = create_source(SystemParameter.get_value("stock.source", "tushare"))
+        return self._source
+
+    def release(self):
+        if self._fetcher is not None:
+            self._fetcher.close()
+            self._fetcher = None
+        self._drop_hibernated()
+        super(Stock, self).release()
+
+    def memory_usage(self):
+        if self._stock_basis is None:
+            return 0
+        basis = self._stock_basis
+        return int(basis.memory_usage(deep=True).sum()) + len(basis) * SYMBOL_BYTES
+
+    def hibernate(self):
+        """pickle the stock basis with its indexes, unpickling them is faster
+            than fetching and indexing again
+        """
+        if self._fetcher is not None:
+            self._fetcher.close()
+            self._fetcher = None
+        with self._basis_lock:
+            if self._stock_basis is None:
+                return
+
+            fd, path = hibernate_file(self._name, HIBERNATE_DIR)
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((self._stock_basis, self._symbols, self._completer), f, protocol=pickle.HIGHEST_PROTOCOL)
+            self._drop_hibernated()
+            self._hibernated = path
+            self._stock_basis = self._symbols = self._completer = None
+            self._basis_loader = None
+
+    def _rehydrate(self):
+        """load the state pickled by `hibernate`
+
+        :return: False if there is nothing to load
+        """
+        if self._hibernated is None:
+            return False
+        try:
+            with open(self._hibernated, "rb") as f:
+                self._stock_basis, self._symbols, self._completer = pickle.load(f)
+        except Exception:       # removed or broken, load from source again
+            return False
+        finally:
+            self._drop_hibernated()
+        return True
+
+    def _drop_hibernated(self):
+        if self._hibernated is None:
+            return
+        try:
+            os.remove(self._hibernated)
+        except OSError:
+            pass
+        self._hibernated = None
+
+    def get_fetcher(self):
+        """return the quotation fetcher, create it on first use
+        """
+        if self._fetcher is None:
+            self._fetcher = QuotationFetcher(
+                self.get_source().get_realtime_quotes,
+                chunk_size=SystemParameter.get_value("stock.quote_chunk_size", 50, int),
+                max_workers=SystemParameter.get_value("stock.quote_workers", 8, int),
+                timeout=SystemParameter.get_value("stock.quote_timeout", 3.0, float),
+            )
+        return self._fetcher
 
     def get_realtime_quotation(self, stocks):
         """realtime realtime exchange data
@@ -26,17 +134,19 @@ class Stock(Topic):
         :return: DataFrame object
         """
         assert stocks is not None
-        codes = self.normalize(stocks)
-        df = tushare.get_realtime_quotes(codes)
+        return self._fetch_quotation(self.normalize(stocks))
+
+    def _fetch_quotation(self, codes):
+        """fetch realtime quotation of normalized codes
+
+        :param codes: list of stock code
+        :return: DataFrame object
+        """
+        df = self.get_fetcher().fetch(codes)
         if df is None:
             return
 
-        df.reset_index()
-        for field in ["open", "price", "low", "high", "pre_close"]:
-            df[field] = df[field].astype('float64')
-        df.round(2)
-
-        return df
+        return to_float_prices(df)
 
     def get_stock_basis(self, stocks=None):
         """
@@ -53,116 +163,139 @@ class Stock(Topic):
     def normalize(self, stocks):
         """
             > normalize(["中国平安", "000725"])
-              ['000725', '601318']
+              ['601318', '000725']
 
             > normalize("中国平安")
               ['601318']
 
+            > normalize("zgpa")
+              ['601318']
+
             > normalize(["上证指数", "深圳成指"])
+              ['sh', 'sz']
 
-        :param stocks:
-        :return: string of stock code, or list
+        :param stocks: name, code, pinyin initials, or list of them
+        :return: list of stock code
         """
-        # indexs = topic.normalize(["上证指数", "深圳成指", "沪深300指数", "上证50", "中小板", "创业板"])
-        # indexs_std = ['sh', 'sz', 'hs300', 'sz50', 'zxb', 'cyb']
-        index_data = {
-            "上证指数": "sh",
-            "深圳成指": "sz",
-            "沪深300指数": "hs300",
-            "上证50": "sz50",
-            "中小板": "zxb",
-            "创业板": "cyb"
-        }
-
         self.check_load_stock_basis()
-        if isinstance(stocks, str):
-            stocks = [stocks]
-        else:
-            stocks = list(stocks)
-
-        indexes = []
-        for code in stocks:
-            if code in index_data:
-                indexes.append(index_data[code])
-                continue
-            if code in index_data.values():
-                indexes.append(code)
-
-        basis = self._stock_basis
-        stocks = basis[basis["name"].isin(stocks) | basis["code"].isin(stocks)]["code"].to_list()
-        return indexes + stocks
+        return self._symbols.normalize(stocks)
 
     def check_load_stock_basis(self):
-        if self._stock_basis is not None and self._stock_basis.size:
+        with self._basis_lock:
+            if self._stock_basis is not None and self._stock_basis.size:
+                return
+            if self._rehydrate():
+                return
+            self._load_all_stock_basis()
+
+    def _load_stock_basis_async(self):
+        """load stock basis in a thread, once, so that completion never waits
+            for the download. if it fails, the next command loads it again and
+            shows the error.
+        """
+        if self._basis_loader is not None:
             return
-        self._load_all_stock_basis()
+
+        def load():
+            try:
+                self.check_load_stock_basis()
+            except Exception:
+                pass
+
+        self._basis_loader = threading.Thread(target=load, name="stock-basis")
+        self._basis_loader.daemon = True
+        self._basis_loader.start()
 
     def _load_all_stock_basis(self):
         """
-        load stock data to memory
+        load stock data to memory, from local cache if it's fresh
         """
-        basis = tushare.get_stock_basics()
-        self._stock_basis = basis.reset_index()
-
-    def _calculate_price_changed(self, price, pre_close):
-        """ compute percentage of stock price rise
+        if self.get_source().cache_basics:
+            ttl = SystemParameter.get_value("stock.basis_ttl", BASIS_CACHE_TTL, int)
+            self._stock_basis = basis_cache.get(self._fetch_stock_basis, ttl=ttl)
+        else:
+            self._stock_basis = self._fetch_stock_basis()
+        self._symbols = SymbolIndex.from_frame(self._stock_basis)
+        self._completer = SymbolCompleter.from_frame(self._stock_basis)
 
-        :param price: current stock price
-        :param pre_close: last day close price
-        :return: tuple, (ratio, color, symbol)
+    def _fetch_stock_basis(self):
+        """
+        download stock basis table
+        """
+        basis = self.get_source().get_stock_basics()
+        if basis is None:
+            return None
+        return add_pinyin_column(basis)
+
+    @staticmethod
+    def _quotation_rows(quotation, columns):
+        """ trans quotation to the rows and colors of `GridRenderer`, sorted
+            by ratio
+
+        :param quotation: DataFrame of realtime quotation
+        :param columns: columns to show, percentage is appended
+        :return: tuple, (rows, colors)
         """
-        price, pre_close = float(price), float(pre_close)
-        diff = price - pre_close
-        ratio = diff / pre_close
+        df = prepare_quotation(quotation)
+        rows = list(zip(*[df[col].tolist() for col in columns + ["percentage"]]))
+        plain = (0,) * len(columns)
+        colors = [plain + (color,) for color in df["color"].tolist()]
+        return rows, colors
 
-        if diff > 0:
-            return ratio, CurseHelper.RED, "+"
-        elif diff < 0:
-            return ratio, CurseHelper.GREEN, ""
-        else:
-            return ratio, CurseHelper.YELLOW, ""
+    def _symbol_completions(self, content):
+        """ auto complete the last stock symbol of command content
 
-    @entrypoint(doc="show stock realtime price")
-    def watch(self, stocks=None):
-        stocks = stocks.split(" ")
+        :param content: command content, such as "601318 zg"
+        :return:
+        """
+        words = content.split(" ")
+        word = words[-1]
+        if not word:
+            return
 
-        curse = CurseHelper()
-        curse.scr.clear()
+        # completion runs in a thread of prompt_toolkit, no completions until
+        # the stock basis is loaded
+        completer = self._completer
+        if completer is None:
+            self._load_stock_basis_async()
+            return
+        for code, name in completer.complete(word, limit=10):
+            yield Completion(
+                code,
+                start_position=-len(word),
+                display="{} {}".format(code, name),
+                style='bg:skyblue'
+            )
+
+    @entrypoint(doc="show stock realtime price, eg: `> watch [--record] 601318 zgpa 京东方A`",
+                complete="_symbol_completions")
+    def watch(self, stocks=None):
+        symbols = stocks.split(" ")
+        codes = self.normalize([symbol for symbol in symbols if symbol != "--record"])
 
         width = 12
         columns = ["code", "name", "open", "low", "high", "price"]
-
-        # header
-        def _add_header():
-            row0 = "".join([common_ljust(s, width) for s in columns])
-            row1 = common_ljust("percentage", width)
-            curse.scr.addstr(0, 0, row0, curses.color_pair(CurseHelper.CYAN))
-            curse.scr.addstr(0, len(columns) * width, row1, curses.color_pair(CurseHelper.CYAN))
-
-        def _add_row(i, d):
-            row0 = "".join(common_ljust(d[col], width) for col in columns)
-            row1 = common_ljust(d["percentage"], width)
-            curse.scr.addstr(i+1, 0, row0)
-            curse.scr.addstr(i+1, len(columns) * width, row1, curses.color_pair(d["color"]))
-
-        _add_header()
+        recorder, curse = None, None
         try:
-            while 1:
-                quotation = self.get_realtime_quotation(stocks)
-                records = pandas_to_list(quotation)
-
-                for d in records:
-                    ratio, color, sig = self._calculate_price_changed(d["price"], d["pre_close"])
-                    percentage = "%s%.2f%%" % (sig, ratio * 100)
-                    d.update({"ratio": ratio, "color": color, "percentage": percentage})
-
-                records.sort(key=lambda item: -item["ratio"])
-                for idx, d in enumerate(records):
-                    _add_row(idx, d)
-
-                curse.scr.refresh()
-                time.sleep(1)
+            if "--record" in symbols:
+                recorder = TickRecorder()
+            curse = CurseHelper()
+            curse.scr.clear()
+            renderer = GridRenderer(curse.scr, [width] * (len(columns) + 1))
+            renderer.set_header(columns + ["percentage"], color=CurseHelper.CYAN)
+
+            for _ in fixed_schedule(1):
+                quotation = self._fetch_quotation(codes)
+                if quotation is None:
+                    continue
+                if recorder is not None:
+                    recorder.record(quotation)
+                rows, colors = self._quotation_rows(quotation, columns)
+                renderer.render(rows, colors)
         except KeyboardInterrupt:
             pass
         finally:
-            curse.finish()
+            if curse is not None:
+                curse.finish()
+            if recorder is not None:
+                recorder.close()
@@ -1,6 +1,11 @@
 # -*- coding: utf-8 -*-
+import os
 import re
+import sys
+import shlex
 import curses
+import shutil
+import subprocess
 
 pattern = re.compile(r"(?P<cmd>\w+) ?(?P<content>.*)?")
 
@@ -50,10 +55,82 @@ def parse_command(text):
     return None
 
 
+def parse_options(text, keys):
+    """parse `key=value` options of command content
+
+        parse_options("from=2019-07-01 type=task", ["from", "to", "type"])
+        # {"from": "2019-07-01", "type": "task"}
+
+    :param text: command content
+    :param keys: allowed option keys
+    :return: dict
+    """
+    options = {}
+    for item in (text or "").split():
+        key, sep, value = item.partition("=")
+        if not sep or key not in keys:
+            raise ValueError("invalid option: {}".format(item))
+        options[key] = value
+    return options
+
+
+def parse_ids(text):
+    """parse id list, ranges are included
+
+        parse_ids("1,3,5-9")    # [(1, 1), (3, 3), (5, 9)]
+
+    :param text: ids separated by comma or space
+    :return: list of (min id, max id)
+    """
+    ids = []
+    for item in re.split(r"[,\s]+", (text or "").strip()):
+        if not item:
+            continue
+        lo, sep, hi = item.partition("-")
+        lo, hi = int(lo), int(hi) if sep else int(lo)
+        if lo > hi:
+            raise ValueError("invalid range: {}".format(item))
+        ids.append((lo, hi))
+    if not ids:
+        raise ValueError("no id")
+    return ids
+
+
+def page_lines(lines, pager=None):
+    """write lines into a pager, such as `less`, the lines are written while
+        they are generated, and the generation stops once the pager quits.
+        without a terminal or pager, the lines are printed directly.
+
+    :param lines: iterable of string
+    :param pager: pager command, default is $PAGER or `less -RFX`
+    """
+    command = shlex.split(pager or os.environ.get("PAGER") or "less -RFX")
+    if not sys.stdout.isatty() or not command or not shutil.which(command[0]):
+        for line in lines:
+            print(line)
+        return
+
+    proc = subprocess.Popen(command, stdin=subprocess.PIPE)
+    try:
+        for line in lines:
+            proc.stdin.write((line + "\n").encode("utf-8"))
+        proc.stdin.close()
+    except BrokenPipeError:     # quit the pager before the end
+        pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        try:
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        proc.wait()
+
+
 def pandas_to_list(dataframe):
     """
     trans dataframe to dict, what different from `DataFrame.to_dict` is that use
-    column name as dict key.
+    column name as dict key. the index of dataframe is ignored.
 
             import pandas as pd
             df = pd.DataFrame([[1, 1], [2, 2]], columns=["A", "B"])
@@ -63,28 +140,18 @@ def pandas_to_list(dataframe):
     :param dataframe:
     :return: list object
     """
-    lst = [{} for i in range(len(dataframe))]
-    for column, dict_val in dataframe.to_dict().items():
-        for idx, val in dict_val.items():
-            lst[idx][column] = val
-    return lst
+    return dataframe.to_dict("records")
+
+
+# full width char to half width char, include full width space
+_QUANJIAO_TABLE = dict((code, code - 65248) for code in range(65281, 65375))
+_QUANJIAO_TABLE[12288] = 32
 
 
 def quanjiao2banjiao(ustring):
     """全角字符转半角
     """
-    ss = []
-    for s in ustring:
-        rstring = ""
-        for uchar in s:
-            inside_code = ord(uchar)
-            if inside_code == 12288:
-                inside_code = 32
-            elif (inside_code >= 65281 and inside_code <= 65374):
-                inside_code -= 65248
-            rstring += chr(inside_code)
-        ss.append(rstring)
-    return "".join(ss)
+    return ustring.translate(_QUANJIAO_TABLE)
 
 
 def is_hanzi(uchar):
@@ -116,6 +183,56 @@ def is_other(uchar):
     return not (is_hanzi(uchar) or is_alphabet(uchar) or is_number(uchar))
 
 
+# runs of hanzi, and runs of other text
+_HANZI_SPLIT = re.compile(u"([\u4e00-\u9fa5]+)")
+
+
+def ngram_tokens(text):
+    """split hanzi into bigrams and unigrams for full text index, since
+        chinese words are not separated by space. bigrams of one run come
+        first, so they are adjacent and a run can be found by phrase. the
+        other text is kept for the tokenizer of index.
+
+        ngram_tokens("项目会议 meeting")  # "项目 目会 会议 项 目 会 议 meeting"
+
+    :param text: string
+    :return: string of tokens separated by space
+    """
+    tokens = []
+    for part in _HANZI_SPLIT.split(quanjiao2banjiao(text or "")):
+        if not part:
+            continue
+        if is_hanzi(part[0]):
+            tokens.extend(part[i:i + 2] for i in range(len(part) - 1))
+            tokens.extend(part)
+        else:
+            tokens.append(part)
+    return " ".join(tokens)
+
+
+def ngram_match_query(text):
+    """trans search words to fts5 MATCH expression, all words must match.
+        a hanzi word is a phrase of its bigrams, other words are quoted, and
+        they are prefix query if end with `*`.
+
+        ngram_match_query("项目会议 meet*")  # '"项目 目会 会议" AND "meet"*'
+
+    :param text: search words
+    :return: string, None if no word
+    """
+    terms = []
+    for word in quanjiao2banjiao(text or "").split():
+        parts = [part for part in _HANZI_SPLIT.split(word.rstrip("*")) if part]
+        for idx, part in enumerate(parts):
+            if is_hanzi(part[0]):
+                grams = [part[i:i + 2] for i in range(len(part) - 1)] or [part]
+                terms.append('"{}"'.format(" ".join(grams)))
+            else:
+                prefix = word.endswith("*") and idx == len(parts) - 1
+                terms.append('"{}"{}'.format(part.replace('"', '""'), "*" if prefix else ""))
+    return " AND ".join(terms) or None
+
+
 def common_ljust(string, width, fillchar=" "):
     """支持中英文字符对齐"""
     string = str(string)
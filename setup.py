@@ -31,7 +31,7 @@ setup(
     license="BSD",
     url="http://xluke.info",
     #packages=find_packages(),
-    packages=['easier'],
+    packages=['easier', 'easier.topic', 'easier.market'],
     description=description,
     long_description=open("README.md").read(),
     install_requires=reqs,
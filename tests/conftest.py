@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from easier import cache, db, history
+from easier.db import database, BaseModel
+from easier.market import recorder
+from easier.topic import core, stock
+
+
+@pytest.fixture(scope="session", autouse=True)
+def isolated_storage(tmp_path_factory):
+    """bind the models to a temporary database, and keep runtime data in a
+        temporary directory, so tests never touch the user's data. it's
+        session scoped to be set up before fixtures of any scope.
+    """
+    root = tmp_path_factory.mktemp("easier")
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        # for the processes started by tests
+        monkeypatch.setenv("EASIER_HOME", str(root.joinpath("home")))
+        monkeypatch.setenv("EASIER_CONFIG", str(root.joinpath("easier.ini")))
+        monkeypatch.setenv("EASIER_HISTORY_DIR", str(root.joinpath("history")))
+
+        monkeypatch.setattr(db, "CONFIG_FILE", str(root.joinpath("easier.ini")))
+        monkeypatch.setattr(history, "HISTORY_DIR", str(root.joinpath("history")))
+        monkeypatch.setattr(history, "LEGACY_HISTORY_DIR", str(root.joinpath(".history")))
+        monkeypatch.setattr(core, "PROFILE_DIR", str(root.joinpath("profile")))
+        monkeypatch.setattr(cache, "CACHE_DIR", str(root.joinpath("cache")))
+        monkeypatch.setattr(cache, "HIBERNATE_DIR", str(root.joinpath("hibernate")))
+        monkeypatch.setattr(stock, "HIBERNATE_DIR", str(root.joinpath("hibernate")))
+        monkeypatch.setattr(recorder, "TICK_DIR", str(root.joinpath("ticks")))
+
+        origin = database.database, database.connect_params.copy()
+        database.close()
+        database.init(str(root.joinpath("easier.db")))
+        BaseModel.check_schema_migration()
+
+        yield
+
+        database.close()
+        database.init(origin[0], **origin[1])
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import pytest
+import pandas as pd
+
+from datetime import datetime as dte
+
+from easier import cache
+from easier.cache import FrameCache, last_trading_open, hibernate_file, sweep_hibernated
+
+
+@pytest.fixture()
+def frame_cache(tmpdir, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmpdir))
+    return FrameCache("test", ttl=3600)
+
+
+def test_last_trading_open():
+    # 2019-07-06 is saturday
+    assert last_trading_open(dte(2019, 7, 6, 12)) == dte(2019, 7, 5, 9)
+    assert last_trading_open(dte(2019, 7, 8, 8)) == dte(2019, 7, 5, 9)
+    assert last_trading_open(dte(2019, 7, 8, 10)) == dte(2019, 7, 8, 9)
+
+
+class TestFrameCache(object):
+
+    def test_fetch_once(self, frame_cache, monkeypatch):
+        monkeypatch.setattr(cache, "last_trading_open", lambda now: dte.min)
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            return pd.DataFrame({"code": ["601318"], "name": ["中国平安"]})
+
+        frame_cache.get(fetch)
+        frame_cache.get(fetch)
+        assert len(calls) == 1
+        assert FrameCache("test").load()[0]["code"].tolist() == ["601318"]
+
+    def test_fallback_to_stale(self, frame_cache):
+        frame_cache.save(pd.DataFrame({"code": ["000725"]}))
+
+        def fail():
+            raise IOError("network down")
+
+        assert frame_cache.get(fail, ttl=0)["code"].tolist() == ["000725"]
+        assert frame_cache.get(lambda: None, ttl=0)["code"].tolist() == ["000725"]
+
+        frame_cache.clear()
+        with pytest.raises(IOError):
+            frame_cache.get(fail)
+
+    def test_is_fresh(self, frame_cache):
+        now = time.mktime(dte(2019, 7, 8, 10).timetuple())
+        assert frame_cache.is_fresh(now - 60, now=now)
+        assert not frame_cache.is_fresh(now - 7200, now=now)      # before open
+        assert not frame_cache.is_fresh(now - 60, ttl=30, now=now)
+
+
+def test_sweep_hibernated(tmpdir):
+    root = str(tmpdir)
+    fd, mine = hibernate_file("stock", root)
+    os.close(fd)
+    assert os.path.basename(mine).startswith("stock-{}-".format(os.getpid()))
+    # left by an exited process, and by an old version without pid
+    for filename in ("stock-999999999-x.pkl", "stock-x.pkl"):
+        tmpdir.join(filename).write("")
+
+    assert sweep_hibernated(root) == 2
+    assert tmpdir.listdir() == [tmpdir.join(os.path.basename(mine))]
+    assert sweep_hibernated(str(tmpdir.join("nosuch"))) == 0
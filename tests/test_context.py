@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+from easier.context import Context
+
+
+class FakeTopic(object):
+
+    def __init__(self, name, usage=0):
+        self.name = name
+        self.usage = usage
+        self.hibernated = 0
+        self.released = False
+
+    def memory_usage(self):
+        return self.usage
+
+    def hibernate(self):
+        self.hibernated += 1
+        self.usage = 0
+
+    def release(self):
+        self.released = True
+
+
+def test_get_topic():
+    context = Context()
+    bujo = FakeTopic("bujo")
+    context.set_current(bujo)
+    assert context.get_topic("bujo") is bujo
+    context.set_current(FakeTopic("stock"))
+    assert context.get_topic("bujo") is bujo
+    assert list(context.topics) == ["default", "bujo"]
+
+    context.set_current(bujo)
+    assert list(context.topics) == ["default", "stock"]
+    assert context.get_topic("default") is context.topics["default"]
+
+
+def test_replace_same_name():
+    context = Context()
+    first, second = FakeTopic("bujo"), FakeTopic("bujo")
+    context.set_current(first)
+    context.set_current(FakeTopic("stock"))
+    context.set_current(second)
+    assert first.released
+    assert context.get_topic("bujo") is second
+
+
+def test_close():
+    context = Context()
+    bujo, stock = FakeTopic("bujo"), FakeTopic("stock")
+    context.set_current(bujo)
+    context.set_current(stock)
+    context.close()
+    assert bujo.released and stock.released
+    assert not context.topics
+
+
+def test_memory_budget():
+    context = Context()
+    context.memory_budget = 100
+    a, b, c = FakeTopic("a", 60), FakeTopic("b", 30), FakeTopic("c", 50)
+    context.set_current(a)
+    context.set_current(b)
+    assert context.memory_usage() == 90
+    assert not a.hibernated
+
+    # a is the least recently used
+    context.set_current(c)
+    assert a.hibernated == 1 and not b.hibernated
+    assert context.memory_usage() == 80
+
+    # least recently used first, until within budget
+    context.set_current(a)
+    a.usage = 200
+    context.set_current(b)
+    assert (c.hibernated, a.hibernated, b.hibernated) == (1, 2, 0)
+    assert context.memory_usage() == 30
+
+    # the current topic is never hibernated
+    d = FakeTopic("d", 500)
+    context.set_current(d)
+    assert d.hibernated == 0 and context.memory_usage() == 500
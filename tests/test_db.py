@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from easier.context import Context
+from easier.db import database, BaseModel, SystemParameter, batch, storage_settings, apply_storage_profile, \
+    STORAGE_PROFILES
+
+
+@pytest.fixture()
+def db(tmpdir):
+    origin = database.database, database._pragmas
+    database.init(str(tmpdir.join("easier.db")))
+    BaseModel.check_schema_migration()
+
+    yield database
+
+    database.close()
+    database.init(origin[0], pragmas=origin[1])
+
+
+class TestStorageProfile(object):
+
+    def test_settings(self, db, tmpdir):
+        config = tmpdir.join("easier.ini")
+        config.write("[storage]\nprofile = fast\ncache_size = -1000\nmmap_size = 0\n")
+        SystemParameter.create(key="storage.mmap_size", value="4096")
+
+        settings = storage_settings(path=str(config))
+        assert settings["synchronous"] == "off"
+        assert settings["cache_size"] == "-1000"
+        assert settings["mmap_size"] == "4096"
+        assert storage_settings("safe", path=str(config))["mmap_size"] == 0
+
+        with pytest.raises(ValueError):
+            storage_settings("unknown")
+
+    def test_invalid_settings(self, db, tmpdir):
+        config = tmpdir.join("easier.ini")
+        config.write("[storage]\ncache_size = big\nmmap_size = 0\n")
+        SystemParameter.create(key="storage.profile", value="bogus")
+        SystemParameter.create(key="storage.journal_mode", value="wall")
+
+        # start with the default profile instead of failing
+        with pytest.warns(UserWarning) as record:
+            settings = apply_storage_profile(path=str(config))
+        assert len(record) == 3
+        assert settings == dict(STORAGE_PROFILES["default"], mmap_size="0")
+
+    def test_config_command(self, db):
+        topic = Context().current
+        for text in ["storage.profile bogus", "storage.cache_sizee 100", "storage.cache_size big",
+                     "storage.synchronous sometimes"]:
+            assert not topic.execute_command("config", text)
+        assert SystemParameter.select().where(SystemParameter.key.startswith("storage.")).count() == 0
+
+        assert topic.execute_command("config", "storage.profile fast")
+        assert topic.execute_command("config", "storage.journal_mode WAL")
+        assert storage_settings()["synchronous"] == "off"
+
+    def test_apply(self, db, tmpdir):
+        apply_storage_profile("default", path=str(tmpdir.join("missing.ini")))
+        assert db.pragma("journal_mode") == "wal"
+        # applied to new connections
+        db.close()
+        assert db.pragma("synchronous") == 1
+        assert db.pragma("cache_size") == -16000
+
+
+class TestBatch(object):
+
+    def test_commit_once(self, db):
+        with batch():
+            SystemParameter.create(key="a", value="1")
+            with batch():
+                SystemParameter.create(key="b", value="2")
+            assert db.in_transaction()
+        assert not db.in_transaction()
+        assert SystemParameter.select().where(SystemParameter.key.in_(["a", "b"])).count() == 2
+
+    def test_rollback(self, db):
+        with pytest.raises(KeyError):
+            with batch():
+                SystemParameter.create(key="a", value="1")
+                raise KeyError("a")
+        assert SystemParameter.get_or_none(SystemParameter.key == "a") is None
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+from prompt_toolkit.buffer import Buffer
+from prompt_toolkit.document import Document
+
+from easier.history import CommandHistory, HistoryAutoSuggest, read_file_history
+
+
+def make_history(tmpdir, lines=None, max_size=100):
+    filename = tmpdir.join("bujo")
+    if lines is not None:
+        filename.write("".join(line + "\n" for line in lines))
+    return CommandHistory(str(filename), max_size=max_size)
+
+
+def test_load_deduplicated(tmpdir):
+    history = make_history(tmpdir, ["list_bullet", "add_bullet task a", "list_bullet"])
+    assert history.get_strings() == ["add_bullet task a", "list_bullet"]
+    assert list(history.load_history_strings()) == ["list_bullet", "add_bullet task a"]
+
+
+def test_lazy_load(tmpdir):
+    history = make_history(tmpdir, ["list_bullet"])
+    assert not history._loaded
+    assert history.suggest("li") == "list_bullet"
+
+
+def test_store(tmpdir):
+    history = make_history(tmpdir)
+    history.append_string("add_bullet task a")
+    history.append_string("list_bullet")
+    history.append_string("add_bullet task a")
+    history.append_string("  ")
+    assert history.get_strings() == ["list_bullet", "add_bullet task a"]
+    assert make_history(tmpdir).get_strings() == ["list_bullet", "add_bullet task a"]
+
+
+def test_import_file_history(tmpdir):
+    legacy = tmpdir.join("legacy")
+    legacy.write("\n# 2019-07-08 10:00:00.000000\n+list_bullet\n"
+                 "\n# 2019-07-08 10:01:00.000000\n+add_bullet task\n+ a\n"
+                 "\n# 2019-07-08 10:02:00.000000\n+list_bullet\n")
+    assert list(read_file_history(str(legacy))) == ["list_bullet", "add_bullet task  a", "list_bullet"]
+
+    history = CommandHistory(str(tmpdir.join("bujo")), max_size=100, legacy=str(legacy))
+    assert history.get_strings() == ["add_bullet task  a", "list_bullet"]
+    # imported once, to the new file
+    assert tmpdir.join("bujo").read() == "add_bullet task  a\nlist_bullet\n"
+    legacy.remove()
+    assert make_history(tmpdir).get_strings() == ["add_bullet task  a", "list_bullet"]
+
+
+def test_max_size(tmpdir):
+    history = make_history(tmpdir, ["cmd %d" % idx for idx in range(10)], max_size=5)
+    assert history.get_strings() == ["cmd %d" % idx for idx in range(5, 10)]
+    history.append_string("cmd 10")
+    assert history.get_strings() == ["cmd %d" % idx for idx in range(6, 11)]
+    assert history.suggest("cmd 5") is None
+
+
+def test_compact(tmpdir):
+    history = make_history(tmpdir, max_size=5)
+    for idx in range(30):
+        history.append_string("cmd %d" % (idx % 3))
+    assert len(tmpdir.join("bujo").readlines()) <= 10
+    assert make_history(tmpdir).get_strings() == ["cmd 0", "cmd 1", "cmd 2"]
+
+
+def test_suggest(tmpdir):
+    history = make_history(tmpdir, ["add_bullet task a", "add_sub_task 1 b", "add_bullet note c"])
+    assert history.suggest("add_") == "add_bullet note c"
+    assert history.suggest("add_bullet t") == "add_bullet task a"
+    assert history.suggest("list") is None
+    history.append_string("add_bullet task a")
+    assert history.suggest("add_") == "add_bullet task a"
+
+
+def test_suggest_many(tmpdir):
+    history = make_history(tmpdir, ["cmd %d" % idx for idx in range(1000)], max_size=1000)
+    assert history.suggest("cmd") == "cmd 999"
+    assert history.suggest("cmd 1") == "cmd 199"
+    assert history.suggest("cmd 10") == "cmd 109"
+
+
+def test_auto_suggest(tmpdir):
+    history = make_history(tmpdir, ["add_bullet task a"])
+    suggest = HistoryAutoSuggest()
+    buffer = Buffer(history=history)
+    assert suggest.get_suggestion(buffer, Document("add_")).text == "bullet task a"
+    assert suggest.get_suggestion(buffer, Document("add_bullet task a")) is None
+    assert suggest.get_suggestion(buffer, Document(" ")) is None
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import pytest
+import subprocess
+
+from easier.context import Context
+from easier.db import database, BaseModel
+from easier.main import iter_commands, split_commands, run_script, main
+from easier.topic.bujo import Bullet
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# `--json` captures the output at fd level, which pytest's capture would hide
+SCRIPT = """
+import sys
+from easier.db import database
+database.init(sys.argv[1])
+from easier.main import main
+sys.exit(main(sys.argv[2:]))
+"""
+
+
+def run_easier(tmpdir, *args, **kwargs):
+    """run easier in a new process with its own database
+
+    :return: (exit status, stdout)
+    """
+    process = subprocess.run([sys.executable, "-c", SCRIPT, str(tmpdir.join("easier.db"))] + list(args),
+                             cwd=ROOT_DIR, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                             input=kwargs.get("input", "").encode("utf-8"))
+    return process.returncode, process.stdout.decode("utf-8")
+
+
+@pytest.fixture()
+def context(tmpdir):
+    origin = database.database
+    database.init(str(tmpdir.join("easier.db")))
+    BaseModel.check_schema_migration()
+
+    yield Context()
+
+    database.close()
+    database.init(origin)
+
+
+def test_iter_commands():
+    lines = ["select_topic bujo\n", "\n", "  # comment\n", "add_bullet note buy milk; eggs\n"]
+    assert list(iter_commands(lines)) == ["select_topic bujo", "add_bullet note buy milk; eggs"]
+    assert split_commands("select_topic bujo; list_bullet\nlist_topic") == [
+        "select_topic bujo", " list_bullet", "list_topic"]
+
+
+def test_run_script(context):
+    status = run_script(context, ["select_topic bujo", "add_bullet task a", "add_bullet note b"])
+    assert status == 0
+    assert context.current.name == "bujo"
+    assert [bullet.content for bullet in Bullet.select().order_by(Bullet.id)] == ["a", "b"]
+    # the prompt session is never created
+    assert context.current._session is None
+
+
+def test_run_script_failed(context):
+    assert run_script(context, ["select_topic nosuch"]) == 1
+    assert run_script(context, ["no_such_command"]) == 1
+    # commands after a failed one still run
+    assert run_script(context, ["select_topic bujo", "add_bullet", "add_bullet task a"]) == 1
+    assert Bullet.select().count() == 1
+
+
+def test_run_script_exit(context):
+    assert run_script(context, ["select_topic bujo", "exit", "add_bullet task a"]) == 0
+    assert Bullet.select().count() == 0
+
+
+def test_main_json(tmpdir):
+    status, out = run_easier(tmpdir, "-c", "select_topic bujo; add_bullet task a; list_bullet; nope", "--json")
+    records = [json.loads(line) for line in out.splitlines()]
+    assert status == 1
+    assert [(r["command"], r["ok"]) for r in records] == [
+        ("select_topic bujo", True), ("add_bullet task a", True), ("list_bullet", True), ("nope", False)]
+    assert "1. " in records[2]["output"]
+    assert "invalid command" in records[3]["output"]
+
+
+def test_main_stdin(tmpdir):
+    status, out = run_easier(tmpdir, "--json", input="select_topic bujo\nadd_bullet task a\nlist_topic\n")
+    records = [json.loads(line) for line in out.splitlines()]
+    assert status == 0
+    assert "stock" in records[2]["output"]
+
+
+def test_main_file(context, tmpdir):
+    script = tmpdir.join("script.txt")
+    script.write_text("select_topic bujo\nadd_bullet task 买菜; 鸡蛋\nadd_bullet task b\n", encoding="utf-8")
+    assert main(["-f", str(script)]) == 0
+    assert [bullet.content for bullet in Bullet.select().order_by(Bullet.id)] == ["买菜; 鸡蛋", "b"]
+
+
+def test_main_usage(context):
+    with pytest.raises(SystemExit) as e:
+        main(["--no-such-option"])
+    assert e.value.code == 2
+
+
+def test_main_trace(tmpdir):
+    trace = tmpdir.join("trace.json")
+    status, _ = run_easier(tmpdir, "-c", "select_topic bujo; add_bullet task a; list_bullet", "--trace", str(trace))
+    commands = json.loads(trace.read())["commands"]
+    assert status == 0
+    assert [(c["topic"], c["command"]) for c in commands] == [
+        ("default", "select_topic"), ("bujo", "add_bullet"), ("bujo", "list_bullet")]
+    assert commands[1]["sql"] >= 1
+    assert commands[0]["start"] <= commands[1]["start"] <= commands[2]["start"]
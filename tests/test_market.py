@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+import time
+import threading
+import numpy as np
+import pandas as pd
+
+from datetime import datetime as dte
+
+from easier.market.fetcher import QuotationFetcher, fixed_schedule, chunked
+from easier.market.quotation import prepare_quotation
+from easier.market.recorder import TickRecorder, read_ticks, list_tick_days, list_tick_codes, tick_path
+from easier.market.symbols import SymbolIndex, SymbolCompleter, pinyin_initials
+from easier.util import CurseHelper, pandas_to_list
+
+
+def stock_basis():
+    basis = pd.DataFrame({
+        "code": ["601318", "000725", "000002", "601988", "601881"],
+        "name": ["中国平安", "京东方Ａ", "万科Ａ", "中国银行", "中国银河"],
+    })
+    return basis
+
+
+class TestSymbolIndex(object):
+
+    def test_pinyin_initials(self):
+        assert pinyin_initials("中国平安") == "zgpa"
+        assert pinyin_initials("万科Ａ") == "wka"
+        assert pinyin_initials("*ST信通") == "stxt"
+
+    def test_resolve(self):
+        index = SymbolIndex.from_frame(stock_basis())
+        assert index.resolve("601318") == ["601318"]
+        assert index.resolve("中国平安") == ["601318"]
+        assert index.resolve("zgpa") == ["601318"]
+        assert index.resolve("ZGPA") == ["601318"]
+        assert index.resolve("京东方A") == ["000725"]
+        assert index.resolve("京东方Ａ") == ["000725"]
+        assert index.resolve("６０１３１８") == ["601318"]
+        assert index.resolve("上证指数") == ["sh"]
+        assert sorted(index.resolve("zgyh")) == ["601881", "601988"]
+        assert index.resolve("") == []
+
+    def test_normalize(self):
+        index = SymbolIndex.from_frame(stock_basis())
+        assert index.normalize("中国平安") == ["601318"]
+        assert index.normalize(["中国平安", "000725", "zgpa", "unknown"]) == ["601318", "000725"]
+        assert index.normalize(["上证指数", "sz"]) == ["sh", "sz"]
+
+
+class TestSymbolCompleter(object):
+
+    def test_complete(self):
+        completer = SymbolCompleter.from_frame(stock_basis())
+        assert completer.complete("601318") == [("601318", "中国平安")]
+        assert [code for code, _ in completer.complete("601")] == ["601318", "601881", "601988"]
+        assert [code for code, _ in completer.complete("zg")] == ["601318", "601881", "601988"]
+        assert [code for code, _ in completer.complete("中国")] == ["601318", "601881", "601988"]
+        assert completer.complete("京东方a") == [("000725", "京东方Ａ")]
+        assert len(completer.complete("0", limit=2)) == 2
+        assert completer.complete("") == []
+
+
+class TestQuotationFetcher(object):
+
+    def test_fetch_chunks(self):
+        requests = []
+
+        def fetch(codes):
+            requests.append(codes)
+            return pd.DataFrame({"code": codes})
+
+        fetcher = QuotationFetcher(fetch, chunk_size=2, max_workers=2)
+        df = fetcher.fetch(["1", "2", "3", "4", "5"])
+        fetcher.close()
+        assert df["code"].tolist() == ["1", "2", "3", "4", "5"]
+        assert sorted(requests) == [["1", "2"], ["3", "4"], ["5"]]
+        assert chunked([], 2) == []
+
+    def test_timeout_chunk(self):
+        blocker = threading.Event()
+
+        def fetch(codes):
+            if "slow" in codes:
+                blocker.wait()
+            if "bad" in codes:
+                raise IOError("upstream error")
+            return pd.DataFrame({"code": codes})
+
+        fetcher = QuotationFetcher(fetch, chunk_size=1, max_workers=4, timeout=0.1)
+        df = fetcher.fetch(["1", "slow", "bad", "2"])
+        assert df["code"].tolist() == ["1", "2"]
+        assert fetcher.fetch(["bad"]) is None
+        blocker.set()
+        fetcher.close()
+
+
+def test_fixed_schedule():
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    ticks = fixed_schedule(1, clock=lambda: now[0], sleep=sleep)
+    assert next(ticks) == 0
+    now[0] += 0.3           # caller's work doesn't delay the next tick
+    assert next(ticks) == 1
+    now[0] += 2.5           # missed ticks are skipped
+    assert next(ticks) == 4
+    assert sleeps == [0.7, 0.5]
+
+
+def test_prepare_quotation():
+    df = pd.DataFrame({
+        "code": ["a", "b", "c"],
+        "price": [9.0, 10.0, 11.0],
+        "pre_close": [10.0, 10.0, 10.0],
+    }, index=[5, 6, 7])
+    result = prepare_quotation(df)
+    assert result["code"].tolist() == ["c", "b", "a"]
+    assert result["percentage"].tolist() == ["+10.00%", "0.00%", "-10.00%"]
+    assert result["color"].tolist() == [CurseHelper.RED, CurseHelper.YELLOW, CurseHelper.GREEN]
+    assert pandas_to_list(df)[0] == {"code": "a", "price": 9.0, "pre_close": 10.0}
+
+
+def test_tick_recorder(tmpdir):
+    root = str(tmpdir)
+    recorder = TickRecorder(root=root, flush_interval=0.05)
+    ts = time.mktime(dte(2019, 7, 8, 10).timetuple())
+    for i in range(3):
+        df = pd.DataFrame({"code": ["601318", "000725"], "price": [str(10 + i), "3.5"], "volume": ["100", ""]})
+        assert recorder.record(df, ts=ts + i)
+    recorder.close()
+
+    assert list_tick_days(root) == ["20190708"]
+    assert list_tick_codes("20190708", root) == ["000725", "601318"]
+    ticks = read_ticks("601318", "20190708", root=root)
+    assert ticks["price"].tolist() == [10, 11, 12]
+    assert read_ticks("601318", "20190708", start=ts + 1, end=ts + 2, root=root)["price"].tolist() == [11]
+    assert ticks["volume"].tolist() == [100] * 3
+    assert np.isnan(read_ticks("000725", "20190708", root=root)["volume"]).all()
+    assert len(read_ticks("600000", "20190708", root=root)) == 0
+
+
+def test_read_partial_tick(tmpdir):
+    root = str(tmpdir)
+    recorder = TickRecorder(root=root, flush_interval=0.05)
+    ts = time.mktime(dte(2019, 7, 8, 10).timetuple())
+    for i in range(3):
+        recorder.record(pd.DataFrame({"code": ["601318"], "price": [str(10 + i)], "volume": ["100"]}), ts=ts + i)
+    recorder.close()
+
+    # the recorder is writing the 4th record
+    with open(tick_path("601318", "20190708", root), "ab") as f:
+        f.write(b"\0" * 10)
+    assert read_ticks("601318", "20190708", root=root)["price"].tolist() == [10, 11, 12]
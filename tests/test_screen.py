@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+import curses
+import pytest
+
+from easier.screen import GridRenderer
+
+
+class FakeScreen(object):
+
+    def __init__(self, lines=10, cols=40):
+        self.size = (lines, cols)
+        self.writes = []
+        self.cleared = []
+        self.shifts = []
+        self.cursor = 0
+
+    def getmaxyx(self):
+        return self.size
+
+    def idlok(self, flag):
+        pass
+
+    def addstr(self, y, x, text, attr=0):
+        self.writes.append((y, x, text))
+
+    def move(self, y, x):
+        self.cursor = y
+
+    def clrtoeol(self):
+        self.cleared.append(self.cursor)
+
+    def deleteln(self):
+        self.shifts.append(("deleteln", self.cursor))
+
+    def insertln(self):
+        self.shifts.append(("insertln", self.cursor))
+
+    def clear(self):
+        pass
+
+    def refresh(self):
+        pass
+
+
+@pytest.fixture()
+def renderer(monkeypatch):
+    monkeypatch.setattr(curses, "color_pair", lambda color: color)
+    renderer = GridRenderer(FakeScreen(), [8, 8])
+    monkeypatch.setattr(renderer, "_terminal_size", lambda: renderer.scr.size)
+    monkeypatch.setattr(curses, "resizeterm", lambda lines, cols: None, raising=False)
+    return renderer
+
+
+class TestGridRenderer(object):
+
+    def test_redraw_changed_cells(self, renderer):
+        scr = renderer.scr
+        renderer.render([("a", "1"), ("b", "2")], colors=[(0, 1), (0, 1)])
+        assert len(scr.writes) == 4
+
+        scr.writes = []
+        renderer.render([("a", "1"), ("b", "3")], colors=[(0, 1), (0, 1)])
+        assert scr.writes == [(1, 8, "3       ")]
+
+        scr.writes = []
+        renderer.render([("a", "1")], colors=[(0, 2)])
+        assert scr.writes == [(0, 8, "1       ")]
+        assert scr.cleared == [1]
+
+    def test_resize(self, renderer):
+        scr = renderer.scr
+        renderer.render([("a", "1")] * 5)
+        scr.writes = []
+        scr.size = (3, 12)
+        renderer.render([("a", "1")] * 5)
+        assert scr.writes == [(y, x, text) for y in range(3) for x, text in ((0, "a       "), (8, "1   "))]
+
+    def test_shift_moved_row(self, renderer):
+        scr = renderer.scr
+        rows = [(code, "1") for code in "abcde"]
+        renderer.render(rows)
+
+        # e moves to the top, the lines between are shifted, not redrawn
+        scr.writes = []
+        renderer.render([("e", "2")] + rows[:4])
+        assert scr.shifts == [("deleteln", 4), ("insertln", 0)]
+        assert scr.writes == [(0, 0, "e       "), (0, 8, "2       ")]
+
+        # and back to the bottom
+        scr.shifts, scr.writes = [], []
+        renderer.render(rows[:4] + [("e", "2")])
+        assert scr.shifts == [("deleteln", 0), ("insertln", 4)]
+        assert scr.writes == [(4, 0, "e       "), (4, 8, "2       ")]
+
+        # swapped neighbours are redrawn
+        scr.shifts, scr.writes = [], []
+        renderer.render([rows[1], rows[0]] + rows[2:4] + [("e", "2")])
+        assert scr.shifts == []
+        assert len(scr.writes) == 2
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from easier.context import Context
+from easier.db import database, BaseModel
+from easier.stats import Histogram, CommandStats, command_stats, sql_queries, BUCKET_GROWTH
+from easier.topic.bujo import BujoTopic
+
+
+@pytest.fixture()
+def topic(tmpdir, monkeypatch):
+    origin = database.database
+    database.init(str(tmpdir.join("easier.db")))
+    BaseModel.check_schema_migration()
+    monkeypatch.setattr("easier.topic.core.PROFILE_DIR", str(tmpdir.join("profile")))
+    command_stats.clear()
+
+    yield BujoTopic(Context())
+
+    command_stats.clear()
+    database.close()
+    database.init(origin)
+
+
+class TestHistogram(object):
+
+    def test_percentile(self):
+        hist = Histogram()
+        assert hist.percentile(50) == 0.0
+        for ms in range(1, 101):
+            hist.add(ms / 1000.0)
+        assert hist.count == 100
+        assert hist.max == 0.1
+        for p in (50, 95, 99):
+            assert p / 1000.0 <= hist.percentile(p) <= p / 1000.0 * BUCKET_GROWTH
+        assert hist.percentile(100) == 0.1
+        assert abs(hist.mean - 0.0505) < 1e-9
+
+    def test_tiny_values(self):
+        hist = Histogram()
+        hist.add(0.0)
+        hist.add(1e-9)
+        assert hist.percentile(99) == 1e-9
+
+
+class TestCommandStats(object):
+
+    def test_record(self):
+        stats = CommandStats()
+        for ok in (True, False):
+            mark = stats.start()
+            sql_queries.incr(2)
+            stats.stop("bujo", "list_bullet", mark, ok)
+        record = stats.records["bujo", "list_bullet"]
+        assert (record.count, record.failed, record.sql, record.network) == (2, 1, 4, 0)
+        assert stats.trace is None
+
+    def test_trace(self):
+        stats = CommandStats()
+        stats.trace = []
+        stats.stop("bujo", "list_bullet", stats.start())
+        assert [(event["topic"], event["command"], event["ok"]) for event in stats.trace] == [
+            ("bujo", "list_bullet", True)]
+
+    def test_execute_command(self, topic):
+        topic.execute_command("add_bullet", "task a")
+        topic.execute_command("add_bullet", "")
+        topic.execute_command("list_bullet", "")
+        record = command_stats.records["bujo", "add_bullet"]
+        assert (record.count, record.failed) == (2, 1)
+        assert record.sql >= 1
+        assert command_stats.records["bujo", "list_bullet"].count == 1
+
+    def test_stats_command(self, topic, monkeypatch):
+        tables = []
+        monkeypatch.setattr("tableprint.table", lambda rows, header, **kwargs: tables.append(rows))
+        assert not topic.execute_command("stats", "")
+        topic.execute_command("add_bullet", "task a")
+        assert topic.execute_command("stats", "")
+        assert [row[:4] for row in tables[0]] == [("bujo", "add_bullet", 1, 0), ("bujo", "stats", 1, 1)]
+        assert topic.execute_command("stats", "reset")
+        assert list(command_stats.records) == [("bujo", "stats")]
+
+    def test_profile_command(self, topic, tmpdir, capsys):
+        assert topic.execute_command("profile", "add_bullet task a")
+        assert len(tmpdir.join("profile").listdir()) == 1
+        assert "cumulative" in capsys.readouterr().out
+        assert not topic.execute_command("profile", "add_bullet")
+        assert ("bujo", "profile") in command_stats.records
@@ -0,0 +1,429 @@
+# -*- coding: utf-8 -*-
+
+import io
+import json
+import pytest
+import sqlite3
+
+from datetime import datetime as dte, timedelta
+
+from easier.context import Context
+from easier.db import database, BaseModel, SystemParameter
+from easier.topic.bujo import (BujoTopic, Bullet, BulletDaily, search_bullets, dump_bullets, load_bullets,
+                               daily_report, report_range, set_status, migrate_tasks,
+                               migrate_fulltext_without_function)
+
+
+@pytest.fixture()
+def topic(tmpdir):
+    origin = database.database
+    database.init(str(tmpdir.join("easier.db")))
+    BaseModel.check_schema_migration()
+
+    yield BujoTopic(Context())
+
+    database.close()
+    database.init(origin)
+
+
+@pytest.fixture()
+def queries(monkeypatch):
+    """record sql executed"""
+    executed = []
+    execute_sql = database.execute_sql
+
+    def wrapper(sql, params=None, *args, **kwargs):
+        executed.append(sql)
+        return execute_sql(sql, params, *args, **kwargs)
+
+    monkeypatch.setattr(database, "execute_sql", wrapper)
+    return executed
+
+
+def add_tree(topic, depth, content="task"):
+    topic.add_bullet("task " + content)
+    parent = Bullet.select().order_by(Bullet.id.desc()).get()
+    for level in range(depth):
+        topic.add_sub_task("{} {} {}".format(parent.id, content, level))
+        parent = Bullet.select().order_by(Bullet.id.desc()).get()
+
+
+class TestBulletTree(object):
+
+    def test_load_trees(self, topic):
+        add_tree(topic, 3, "a")
+        add_tree(topic, 1, "b")
+        roots = Bullet.load_trees(topic.get_all_bullets())
+        assert [root.content for root in roots] == ["b", "a"]
+        assert [child.content for child in roots[1].get_children()] == ["a 0"]
+        assert roots[1].get_children()[0].get_children()[0].get_children()[0].content == "a 2"
+
+    def test_constant_queries(self, topic, queries):
+        add_tree(topic, 2, "a")
+        del queries[:]
+        topic.list_history_bullet()
+        small = len(queries)
+
+        for idx in range(5):
+            add_tree(topic, 4, str(idx))
+        del queries[:]
+        topic.list_history_bullet()
+        assert len(queries) == small == 2
+
+
+class TestSchema(object):
+
+    def indexes(self):
+        return set(name for name, in database.execute_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'bullet'"))
+
+    def test_composite_index_migration(self, topic):
+        # database created before composite indexes
+        for name in ["bullet_date_str_create_date", "bullet_parent_id_create_date",
+                     "bullet_bullet_type_task_status_parent_id_create_date"]:
+            database.execute_sql('DROP INDEX "{}"'.format(name))
+        database.execute_sql('CREATE INDEX "bullet_date_str" ON "bullet" ("date_str")')
+        SystemParameter.delete().where(SystemParameter.key == "migration.bujo_0001_composite_indexes").execute()
+
+        BaseModel.check_schema_migration()
+        assert "bullet_date_str" not in self.indexes()
+        assert "bullet_bullet_type_task_status_parent_id_create_date" in self.indexes()
+
+    def test_query_plan(self, topic):
+        for name, query in topic._queries()[:3]:
+            sql, params = query.sql()
+            plan = " ".join(row[-1] for row in database.execute_sql("EXPLAIN QUERY PLAN " + sql, params))
+            assert "USING INDEX" in plan and "TEMP B-TREE" not in plan
+
+
+class TestHistory(object):
+
+    def test_pages(self, topic, queries):
+        created = dte(2019, 7, 8, 10)
+        for idx in range(5):
+            # the same create date, ordered by id
+            Bullet.create(date_str="2019-07-08", bullet_type="task", content=str(idx), create_date=created)
+        Bullet.create(date_str="2019-07-09", bullet_type="note", content="5", create_date=created + timedelta(1))
+        Bullet.create(date_str="2019-07-09", bullet_type="task", content="5.0", parent=6)
+
+        del queries[:]
+        bullets = Bullet.iter_history(page_size=2)
+        assert next(bullets).content == "5"
+        # only the first page is queried
+        assert len(queries) == 2
+        assert [bullet.content for bullet in bullets] == ["4", "3", "2", "1", "0"]
+
+    def test_filters(self, topic):
+        for day in range(1, 6):
+            for btype in ["task", "note"]:
+                Bullet.create(date_str="2019-07-0%d" % day, bullet_type=btype,
+                              content="%d %s" % (day, btype), create_date=dte(2019, 7, day))
+
+        def contents(**filters):
+            return [bullet.content for bullet in Bullet.iter_history(page_size=3, **filters)]
+
+        assert contents(start="2019-07-02", end="2019-07-03", btype="note") == ["3 note", "2 note"]
+        assert contents(start="2019-07-04") == ["5 note", "5 task", "4 note", "4 task"]
+        assert len(contents(end="2019-07-03", btype="task")) == 3
+
+    def test_list_history_bullet(self, topic, capsys):
+        add_tree(topic, 1, "a")
+        topic.list_history_bullet("type=task")
+        lines = capsys.readouterr().out.splitlines()
+        assert [line.split(" [")[0] for line in lines] == [
+            "{}： • a".format(dte.today().strftime("%Y-%m-%d")),
+            "    {}： • a 0".format(dte.today().strftime("%Y-%m-%d")),
+        ]
+
+
+class TestSearch(object):
+
+    def test_search(self, topic):
+        for content in ["周一项目会议", "项目复盘 meeting notes", "买菜", "review release notes"]:
+            topic.add_bullet("note " + content)
+
+        def search(words):
+            return sorted(bullet.content for bullet in search_bullets(words))
+
+        assert search("项目") == ["周一项目会议", "项目复盘 meeting notes"]
+        assert search("会议") == ["周一项目会议"]
+        assert search("项会") == []
+        assert search("项目 meet*") == ["项目复盘 meeting notes"]
+        assert search("notes") == ["review release notes", "项目复盘 meeting notes"]
+        assert search("rel*") == ["review release notes"]
+        assert search("菜") == ["买菜"]
+
+    def test_ranking(self, topic):
+        topic.add_bullet("note 会议 " + "其他的内容" * 20)
+        topic.add_bullet("note 会议")
+        assert [bullet.content for bullet in search_bullets("会议")][0] == "会议"
+
+    def test_triggers(self, topic):
+        topic.add_bullet("note 项目会议")
+        topic.modify_bullet("1 发布计划")
+        assert search_bullets("项目") == []
+        assert [bullet.content for bullet in search_bullets("发布")] == ["发布计划"]
+        topic.remove_bullet("1")
+        assert search_bullets("发布") == []
+
+    def test_other_client(self, topic):
+        """a connection without `ngram_tokens` can write bullets"""
+        topic.add_bullet("note 项目会议")
+        conn = sqlite3.connect(database.database)
+        with conn:
+            conn.execute("INSERT INTO bullet (version, date_str, content, bullet_type, task_status, "
+                         "create_date, update_date) VALUES (0, '2019-07-08', '发布计划', 'note', 'incomplete', "
+                         "'2019-07-08 10:00:00', '2019-07-08 10:00:00')")
+            conn.execute("UPDATE bullet SET content = '复盘' WHERE id = 1")
+        conn.close()
+        # the changed bullet isn't found by its old content, the bullets
+        # written by others are found after rebuild
+        assert search_bullets("项目") == []
+        assert search_bullets("发布") == []
+        topic.rebuild_search_index()
+        assert [bullet.content for bullet in search_bullets("发布")] == ["发布计划"]
+        assert [bullet.content for bullet in search_bullets("复盘")] == ["复盘"]
+
+        conn = sqlite3.connect(database.database)
+        with conn:
+            conn.execute("DELETE FROM bullet WHERE id = 2")
+        conn.close()
+        assert search_bullets("发布") == []
+
+    def test_migrate_function_triggers(self, topic):
+        """the index kept by triggers calling `ngram_tokens` is replaced"""
+        database.execute_sql("DROP TABLE bullet_fts")
+        database.execute_sql("CREATE VIRTUAL TABLE bullet_fts USING fts5(tokens, content='', tokenize='unicode61')")
+        database.execute_sql("CREATE TRIGGER bullet_fts_insert AFTER INSERT ON bullet BEGIN "
+                             "INSERT INTO bullet_fts (rowid, tokens) VALUES (new.id, ngram_tokens(new.content)); END")
+        topic.add_bullet("note 项目会议")
+        migrate_fulltext_without_function()
+        triggers = [row[0] for row in database.execute_sql("SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                                                           "AND name LIKE 'bullet_fts%' ORDER BY name")]
+        assert triggers == ["bullet_fts_delete", "bullet_fts_update"]
+        assert len(search_bullets("项目")) == 1
+
+
+class TestImportExport(object):
+
+    @pytest.mark.parametrize("fmt", ["jsonl", "csv"])
+    def test_round_trip(self, topic, fmt):
+        add_tree(topic, 2, "项目")
+        Bullet.create(date_str="2019-07-08", bullet_type="note", content='say "hi", ok', task_status="incomplete",
+                      create_date=dte(2019, 7, 8, 10, 30), update_date=dte(2019, 7, 9))
+        origin = [(b.content, b.bullet_type, b.task_status, b.date_str, b.create_date, b.update_date)
+                  for b in Bullet.select().order_by(Bullet.id)]
+
+        f = io.StringIO()
+        assert dump_bullets(f, fmt) == 4
+        f.seek(0)
+        assert load_bullets(f, fmt, chunk_size=3) == 4
+
+        imported = list(Bullet.select().where(Bullet.id > 4).order_by(Bullet.id))
+        assert [(b.content, b.bullet_type, b.task_status, b.date_str, b.create_date, b.update_date)
+                for b in imported] == origin
+        assert [b.parent_id for b in imported] == [None, 5, 6, None]
+        assert len(search_bullets("项目")) == 6
+
+    def test_orphan_and_invalid(self, topic):
+        lines = [
+            {"id": 7, "content": "a", "bullet_type": "task", "parent": 3},
+            {"id": 8, "content": "b", "bullet_type": "task", "parent": 7, "create_date": "2019-07-08 10:00:00"},
+        ]
+        load_bullets(io.StringIO("\n".join(json.dumps(line) for line in lines)))
+        assert [(b.content, b.parent_id, b.date_str) for b in Bullet.select().order_by(Bullet.id)] == [
+            ("a", None, dte.now().strftime("%Y-%m-%d")), ("b", 7, "2019-07-08")]
+
+        with pytest.raises(ValueError):
+            load_bullets(io.StringIO(json.dumps({"id": 1, "content": "c", "bullet_type": "goal"})))
+        with pytest.raises(ValueError):
+            load_bullets(io.StringIO(json.dumps({"id": 1, "content": "c", "bullet_type": "task",
+                                                 "task_status": "done"})))
+        assert Bullet.select().count() == 2
+        topic.add_bullet("note 发布计划")
+        assert len(search_bullets("发布")) == 1
+
+    def test_export_fail(self, topic, tmpdir):
+        assert not topic.execute_command("export_bullets", str(tmpdir.join("missing", "bujo.jsonl")))
+
+
+class TestDailyLog(object):
+
+    def test_cached(self, topic, queries):
+        add_tree(topic, 1, "a")
+        topic.list_bullet()
+        del queries[:]
+        topic.list_bullet()
+        topic.modify_bullet("2 b")
+        topic.set_task_status("1 complete")
+        # only the writes, and the full text index of the modified content
+        assert [sql.split()[0] for sql in queries] == ["UPDATE", "INSERT", "UPDATE"]
+        assert [(b.content, b.task_status) for b in topic.daily_log()] == [("a 0", "incomplete"), ("b", "complete")]
+        assert topic.daily_log()[1].get_children()[0].content == "a 0"
+        # the sub task is both a root and a child of today's log
+        topic.modify_bullet("1 c")
+        assert topic.daily_log()[1].get_children()[0].content == "c"
+
+        topic.add_bullet("note d")
+        del queries[:]
+        assert [b.content for b in topic.daily_log()] == ["d", "c", "b"]
+        assert len(queries) == 2
+
+    def test_stable_index(self, topic):
+        topic.add_bullet("note a")
+        topic.add_bullet("note b")
+        topic.list_bullet()
+        # index 1 is "b" of the listing, though "c" is the newest now
+        Bullet.create(date_str=dte.today().strftime("%Y-%m-%d"), bullet_type="note", content="c")
+        topic.modify_bullet("1 bb")
+        topic.remove_bullet("2")
+        assert [b.content for b in Bullet.select().order_by(Bullet.id)] == ["bb", "c"]
+        assert Bullet.get_by_id(2).content == "bb"
+
+        topic.modify_bullet("2 aa")
+        assert Bullet.select().where(Bullet.content == "aa").count() == 0
+        topic.modify_bullet("3 x")
+        assert Bullet.select().where(Bullet.content == "x").count() == 0
+
+
+class TestReport(object):
+
+    def rollups(self):
+        return sorted((r.date_str, r.bullet_type, r.task_status, r.count)
+                      for r in BulletDaily.select().where(BulletDaily.count > 0))
+
+    def test_rollup_triggers(self, topic):
+        add_tree(topic, 1, "a")
+        topic.add_bullet("note b")
+        today = dte.today().strftime("%Y-%m-%d")
+        assert self.rollups() == [(today, "note", "incomplete", 1), (today, "task", "incomplete", 2)]
+
+        topic.set_task_status("1 complete")
+        Bullet.update(date_str="2019-07-08").where(Bullet.id == 3).execute()
+        assert self.rollups() == [("2019-07-08", "note", "incomplete", 1),
+                                  (today, "task", "complete", 1), (today, "task", "incomplete", 1)]
+
+        topic.remove_bullet("2")
+        assert self.rollups() == [("2019-07-08", "note", "incomplete", 1), (today, "task", "incomplete", 1)]
+
+        # the same as counted from bullets
+        add_tree(topic, 2, "c")
+        expected = self.rollups()
+        BulletDaily.delete().execute()
+        topic.rebuild_report()
+        assert self.rollups() == expected
+
+    def test_daily_report(self, topic):
+        for day, btype, status in [(1, "task", "complete"), (1, "task", "movefuture"), (1, "note", "incomplete"),
+                                   (2, "task", "delaycomplete"), (2, "task", "incomplete"), (9, "event", "incomplete")]:
+            Bullet.create(date_str="2019-07-0%d" % day, bullet_type=btype, task_status=status, content="x")
+
+        assert daily_report("2019-07-01", "2019-07-02") == [
+            ("2019-07-01", {"created": 3, "task": 2, "note": 1, "complete": 1, "movefuture": 1}),
+            ("2019-07-02", {"created": 2, "task": 2, "delaycomplete": 1, "incomplete": 1}),
+        ]
+        topic.report("range 2019-07-01 2019-07-31")
+
+    def test_report_range(self):
+        today = dte(2019, 7, 10)
+        assert report_range("week", today) == ("2019-07-08", "2019-07-10")
+        assert report_range("month", today) == ("2019-07-01", "2019-07-10")
+        assert report_range("range 2019-06-01 2019-06-30") == ("2019-06-01", "2019-06-30")
+        with pytest.raises(ValueError):
+            report_range("range 2019-06-01")
+
+
+class TestBulk(object):
+
+    def add_tasks(self, days):
+        for day in days:
+            Bullet.create(date_str="2019-07-%02d" % day, bullet_type="task", content="task %d" % day)
+
+    def statuses(self):
+        return [b.task_status for b in Bullet.select().order_by(Bullet.id)]
+
+    def test_set_status(self, topic, queries):
+        self.add_tasks(range(1, 11))
+        Bullet.create(date_str="2019-07-01", bullet_type="note", content="note")
+
+        del queries[:]
+        assert set_status("complete", ids=[(1, 1), (3, 5), (11, 11)]) == 4
+        assert len(queries) == 1
+        assert self.statuses()[:6] == ["complete", "incomplete", "complete", "complete", "complete", "incomplete"]
+
+        assert set_status("movefuture", status="incomplete", end="2019-07-08") == 4
+        assert self.statuses()[:10].count("movefuture") == 4
+        with pytest.raises(ValueError):
+            set_status("complete")
+
+    def test_set_task_status_command(self, topic):
+        self.add_tasks(range(1, 6))
+        topic.set_task_status("1,3-4 complete")
+        topic.set_task_status("status=incomplete from=2019-07-05 movefuture")
+        topic.set_task_status("2 unknown")
+        assert self.statuses() == ["complete", "incomplete", "complete", "complete", "movefuture"]
+
+    def test_migrate(self, topic, queries):
+        self.add_tasks([1, 2, 20])
+        topic.add_sub_task("1 sub")
+        Bullet.update(task_status="complete").where(Bullet.id == 2).execute()
+
+        del queries[:]
+        assert migrate_tasks("2019-07-10", today="2019-07-21") == 1
+        # the copies are indexed by one statement
+        assert [sql.split()[0] for sql in queries] == ["SELECT", "INSERT", "INSERT", "UPDATE"]
+        assert [(b.date_str, b.content, b.task_status) for b in Bullet.select().order_by(Bullet.id)] == [
+            ("2019-07-01", "task 1", "movefuture"),
+            ("2019-07-02", "task 2", "complete"),
+            ("2019-07-20", "task 20", "incomplete"),
+            (dte.today().strftime("%Y-%m-%d"), "sub", "incomplete"),
+            ("2019-07-21", "task 1", "incomplete"),
+        ]
+        # the copies are before the date too, but not migrated again
+        assert migrate_tasks("2019-07-30", today="2019-07-21") == 2
+        assert Bullet.select().where(Bullet.task_status == "incomplete", Bullet.parent.is_null()).count() == 2
+
+
+class TestCompletion(object):
+
+    def complete(self, topic, content):
+        return [completion.text for completion in topic._bullet_completions(content)]
+
+    def test_index(self, topic, queries):
+        for idx in range(1, 13):
+            Bullet.create(date_str="2019-07-01", bullet_type="task", content="会议 %d" % idx,
+                          task_status="complete" if idx == 11 else "incomplete")
+        Bullet.create(date_str="2019-07-01", bullet_type="note", content="old note")
+        topic.add_bullet("note 今天的会议")
+
+        del queries[:]
+        assert self.complete(topic, "1") == ["1", "10", "12", "14"]
+        assert len(queries) == 1
+        assert self.complete(topic, "会议")[:3] == ["14", "12", "10"]
+        assert self.complete(topic, "note") == []
+        assert len(queries) == 1
+
+        topic.set_task_status("10 complete")
+        topic.add_sub_task("12 周报")
+        topic.modify_bullet("2 周会")
+        # kept by the writes, not loaded again
+        del queries[:]
+        assert self.complete(topic, "1") == ["1", "12", "14", "15"]
+        assert self.complete(topic, "周") == ["15", "14"]
+        assert queries == []
+
+    def test_reopen(self, topic):
+        Bullet.create(date_str="2019-07-01", bullet_type="task", content="a")
+        assert self.complete(topic, "1") == ["1"]
+        topic.set_task_status("1 complete")
+        assert self.complete(topic, "1") == []
+        topic.set_task_status("1 incomplete")
+        assert self.complete(topic, "1") == ["1"]
+        assert self.complete(topic, "a") == ["1"]
+
+    def test_arguments(self, topic):
+        topic.add_bullet("task a")
+        assert self.complete(topic, "") == []
+        assert self.complete(topic, "3,1") == ["1"]
+        assert self.complete(topic, "1 in") == ["incomplete"]
+        assert self.complete(topic, "status=c") == ["complete"]
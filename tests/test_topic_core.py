@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import subprocess
+
+from easier.topic import TopicMeta, Topic, scan_topic_classes
+from easier.topic.core import CommandIndex
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestTopicRegistry(object):
+
+    def test_scan_topic_classes(self):
+        filename = os.path.join(ROOT_DIR, "easier", "topic", "stock.py")
+        assert list(scan_topic_classes(filename)) == [("stock", "stock market quotation")]
+
+    def test_registry_without_import(self):
+        topics = Topic._get_topics()
+        assert topics["stock"].module == "easier.topic.stock"
+        assert topics["bujo"].description == "plan manager, simple version of bullet journal"
+        assert "default" in topics
+
+    def test_startup_skip_heavy_modules(self):
+        code = "import sys, easier.main; print('tushare' in sys.modules or 'pandas' in sys.modules)"
+        output = subprocess.check_output([sys.executable, "-c", code], cwd=ROOT_DIR)
+        assert output.strip() == b"False"
+
+    def test_get_topic_class(self):
+        assert TopicMeta.get_topic_class("not_exist") is None
+        assert TopicMeta.get_topic_class("stock").__name__ == "Stock"
+
+
+class TestCommandIndex(object):
+
+    def make_index(self):
+        def func():
+            pass
+        entrypoints = {name: lambda: None for name in ["list_bullet", "list_history_bullet", "add_bullet", "help"]}
+        entrypoints.update(dict.fromkeys(["exit", "quit"], func))
+        return CommandIndex(entrypoints)
+
+    def test_rank(self):
+        index = self.make_index()
+        # prefix, then substring
+        assert index.complete("l") == ["list_bullet", "list_history_bullet", "help", "add_bullet"]
+        assert index.complete("lhb") == ["list_history_bullet"]
+        assert index.complete("bul") == ["add_bullet", "list_bullet", "list_history_bullet"]
+        assert index.complete("ab") == ["add_bullet"]
+        assert index.complete("xyz") == []
+        assert index.complete("", limit=2) == ["exit", "help"]
+
+    def test_alias_once(self):
+        index = self.make_index()
+        assert index.complete("q") == ["quit"]
+        assert index.complete("it") == ["exit", "list_bullet", "list_history_bullet"]
+
+    def test_narrow(self):
+        index = self.make_index()
+        index.complete("li")
+        assert index._last == ("li", [3, 4])
+        index.complete("lis")
+        assert index._last == ("lis", [3, 4])
+        # not a continuation, match all again
+        assert index.complete("he") == ["help", "list_history_bullet"]
+
+    def test_topic_class(self):
+        topic = TopicMeta.get_topic_class("bujo")
+        assert TopicMeta.command_indexes["bujo"].complete("sel")[0] == "select_topic"
+        assert "list_topic" in TopicMeta.command_indexes["bujo"].names
+        assert topic.complete_command(topic, "lhb") == ["list_history_bullet"]
@@ -1,16 +1,26 @@
 # -*- coding: utf-8 -*-
 
 import pytest
+import threading
+import pandas as pd
 
 from easier.topic.stock import Stock
 from easier.context import Context
+from easier.market.source import QuotationSource, SyntheticSource, ReplaySource
+from easier.market.recorder import TickRecorder
+
+
+BASICS = pd.DataFrame({
+    "code": ["601318", "000725", "000002"],
+    "name": ["中国平安", "京东方Ａ", "万科Ａ"],
+})
 
 
 @pytest.fixture(scope="module")
 def topic():
     context = Context()
 
-    topic = Stock(context)
+    topic = Stock(context, source=SyntheticSource(basics=BASICS))
     context.set_current(topic)
 
     yield topic
@@ -42,3 +52,125 @@ class TestStock(object):
 
         assert len(topic.get_stock_basis(["中国平安"])) == 1
         assert len(topic.get_stock_basis(["中国平安", "000725"])) == 2
+
+    def test_watch_release(self, topic, monkeypatch):
+        released = []
+
+        class FakeScreen(object):
+            def clear(self):
+                pass
+
+        class FakeCurse(object):
+            CYAN = 4
+
+            def __init__(self):
+                self.scr = FakeScreen()
+
+            def finish(self):
+                released.append("curse")
+
+        class FakeRecorder(object):
+            def close(self):
+                released.append("recorder")
+
+        def fail(*args, **kwargs):
+            raise RuntimeError("no terminal")
+
+        monkeypatch.setattr("easier.topic.stock.TickRecorder", FakeRecorder)
+        monkeypatch.setattr("easier.topic.stock.CurseHelper", fail)
+        with pytest.raises(RuntimeError):
+            topic.watch("--record 中国平安")
+        assert released == ["recorder"]
+
+        # the screen is restored when drawing fails
+        monkeypatch.setattr("easier.topic.stock.CurseHelper", FakeCurse)
+        monkeypatch.setattr("easier.topic.stock.GridRenderer", fail)
+        with pytest.raises(RuntimeError):
+            topic.watch("--record 中国平安")
+        assert released == ["recorder", "curse", "recorder"]
+
+
+class TestCompletion(object):
+
+    def test_load_in_background(self):
+        threads = []
+
+        class SlowSource(SyntheticSource):
+            def get_stock_basics(self):
+                threads.append(threading.current_thread())
+                return super(SlowSource, self).get_stock_basics()
+
+        topic = Stock(Context(), source=SlowSource(basics=BASICS))
+        # nothing until the basis is loaded, and it's loaded by another thread
+        assert list(topic._symbol_completions("zgpa")) == []
+        topic._basis_loader.join()
+        assert threads and threads[0] is not threading.current_thread()
+        assert [c.text for c in topic._symbol_completions("zgpa")] == ["601318"]
+        # loaded once
+        assert len(threads) == 1
+        topic.release()
+
+
+class TestHibernate(object):
+
+    def test_hibernate(self, tmpdir, monkeypatch):
+        monkeypatch.setattr("easier.topic.stock.HIBERNATE_DIR", str(tmpdir))
+        topic = Stock(Context(), source=SyntheticSource(basics=BASICS))
+        assert topic.memory_usage() == 0
+        topic.hibernate()
+        assert not tmpdir.listdir()
+
+        assert topic.normalize("zgpa") == ["601318"]
+        assert topic.memory_usage() > 0
+        topic.hibernate()
+        assert topic.memory_usage() == 0
+        assert len(tmpdir.listdir()) == 1
+
+        # loaded from the pickle, not the source
+        monkeypatch.setattr(topic, "_load_all_stock_basis", None)
+        assert topic.normalize("中国平安") == ["601318"]
+        assert not tmpdir.listdir()
+
+        topic.hibernate()
+        topic.release()
+        assert not tmpdir.listdir()
+
+
+class TestQuotationSource(object):
+
+    def test_abstract(self):
+        class BasicsOnly(QuotationSource):
+            def get_stock_basics(self):
+                return BASICS
+
+        with pytest.raises(TypeError):
+            BasicsOnly()
+
+    def test_synthetic(self):
+        now = [0.0]
+        source = SyntheticSource(size=100, speed=10, clock=lambda: now[0])
+        codes = source.get_stock_basics()["code"].tolist()[:3]
+        first = source.get_realtime_quotes(codes)
+        now[0] += 1
+        second = source.get_realtime_quotes(codes)
+        assert first["code"].tolist() == codes
+        assert (second["volume"] > first["volume"]).all()
+        assert ((second["price"] - second["pre_close"]).abs() <= second["pre_close"] * 0.1 + 0.01).all()
+
+    def test_replay(self, tmpdir):
+        root = str(tmpdir)
+        now = [1562551200.0]
+        synthetic = SyntheticSource(basics=BASICS, clock=lambda: now[0])
+        recorder = TickRecorder(root=root)
+        for _ in range(10):
+            recorder.record(synthetic.get_realtime_quotes(["601318", "000725"]), ts=now[0])
+            now[0] += 1
+        recorder.close()
+
+        day = synthetic.get_realtime_quotes(["601318"])["date"][0].replace("-", "")
+        clock = [0.0]
+        source = ReplaySource(day, speed=2, basics=BASICS, root=root, clock=lambda: clock[0])
+        assert source.get_realtime_quotes(["601318", "000725"])["name"].tolist() == ["中国平安", "京东方Ａ"]
+        clock[0] += 2
+        assert source.replay_time() == 1562551204.0
+        assert source.get_realtime_quotes(["000002"]) is None
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from easier.util import ngram_tokens, ngram_match_query, parse_options, parse_ids
+
+
+def test_ngram_tokens():
+    assert ngram_tokens("项目会议 meeting") == "项目 目会 会议 项 目 会 议  meeting"
+    assert ngram_tokens("买菜，ＯＫ") == "买菜 买 菜 ,OK"
+    assert ngram_tokens(None) == ""
+
+
+def test_ngram_match_query():
+    assert ngram_match_query("项目会议 meet*") == '"项目 目会 会议" AND "meet"*'
+    assert ngram_match_query("菜") == '"菜"'
+    assert ngram_match_query('ab项目* a"b') == '"ab" AND "项目" AND "a""b"'
+    assert ngram_match_query("  ") is None
+
+
+def test_parse_options():
+    assert parse_options("from=2019-07-01 type=task", ["from", "type"]) == {"from": "2019-07-01", "type": "task"}
+    try:
+        parse_options("size=1", ["from"])
+    except ValueError:
+        pass
+    else:
+        assert False
+
+
+def test_parse_ids():
+    assert parse_ids("1,3, 5-9") == [(1, 1), (3, 3), (5, 9)]
+    for text in ["", "9-5", "a"]:
+        with pytest.raises(ValueError):
+            parse_ids(text)